@@ -0,0 +1,58 @@
+from fastapi import APIRouter, HTTPException, Request, status, Depends, Query
+from typing import Optional
+from fastapi.security import HTTPBearer
+
+from src.core.export import EXPORT_FORMAT_PATTERN, export_response
+from src.dependencies.permission import require_permissions
+from src.services.analytics import AnalyticsService
+from src.schemas.analytics import AnalyticsSnapshotsResponse
+
+bearer = HTTPBearer()
+router = APIRouter(prefix="/api", tags=["Analytics"], dependencies=[Depends(bearer)])
+
+analytics_service = AnalyticsService()
+
+@router.get("/analytics/snapshots", response_model=AnalyticsSnapshotsResponse,
+            dependencies=[Depends(require_permissions(["all"]))])
+async def get_analytics_snapshots(request: Request):
+    """Get the computed_at staleness marker of every analytics snapshot"""
+    user = getattr(request.state, "user", None)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+
+    try:
+        return await analytics_service.get_snapshot_status()
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to fetch analytics snapshots: {str(e)}")
+
+@router.post("/analytics/snapshots/refresh", response_model=AnalyticsSnapshotsResponse,
+             dependencies=[Depends(require_permissions(["all"]))])
+async def refresh_analytics_snapshots(request: Request):
+    """Refresh analytics snapshots on demand"""
+    user = getattr(request.state, "user", None)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+
+    try:
+        return await analytics_service.refresh_snapshots()
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to refresh analytics snapshots: {str(e)}")
+
+@router.get("/analytics/snapshots/{name}/export", dependencies=[Depends(require_permissions(["all"]))])
+async def export_analytics_snapshot(name: str, request: Request,
+                                    organization_id: int = Query(..., description="Organization to export; the caller must be a member"),
+                                    export_format: str = Query("ndjson", alias="format", pattern=EXPORT_FORMAT_PATTERN)):
+    """Stream one organization's rows of an analytics snapshot (project_analytics, user_performance, sprint_velocity or team_performance)"""
+    user = getattr(request.state, "user", None)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+
+    try:
+        chunks = await analytics_service.export_snapshot(name, organization_id, user["id"])
+    except ValueError as ve:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(ve))
+    except Exception as e:
+        if "Access denied" in str(e):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to export analytics snapshot")
+    return await export_response(chunks, export_format, f"analytics-{name}")
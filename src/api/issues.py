@@ -1,14 +1,20 @@
 from fastapi import APIRouter, HTTPException, Request, status, Depends, Query
 from fastapi.security import HTTPBearer
 from src.services.issues import IssuesService
-from src.schemas.issues import IssueCreate, IssueUpdate, IssueResponse, IssueAssignmentCreate, IssueAssignmentResponse, IssueStatusUpdate
+from src.schemas.issues import IssueCreate, IssueUpdate, IssueResponse, IssueAssignmentCreate, IssueAssignmentResponse, IssueStatusUpdate, IssuePage
+from src.schemas.issues import IssueBatchCreate, IssueBatchUpdate, IssueBatchResponse
+from src.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from src.core.export import EXPORT_FORMAT_PATTERN, export_response
 from src.dependencies.permission import require_permissions
+from src.core.logger import setup_logger
 from typing import List, Optional
+from datetime import datetime
 
 bearer = HTTPBearer()
 router = APIRouter(prefix="/api", tags=["Issues"], dependencies=[Depends(bearer)])
 
 issues_service = IssuesService()
+logger = setup_logger(__name__)
 
 
 @router.post("/projects/{project_id}/issues", response_model=IssueResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(require_permissions(["all", "create_issue"]))])
@@ -31,34 +37,91 @@ async def create_issue(project_id: int, issue_data: IssueCreate, request: Reques
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to create issue")
 
 
-@router.get("/projects/{project_id}/issues", response_model=List[IssueResponse], status_code=status.HTTP_200_OK, dependencies=[Depends(require_permissions(["all", "view_issue"]))])
+@router.post("/projects/{project_id}/issues:batch", response_model=IssueBatchResponse, status_code=status.HTTP_200_OK, dependencies=[Depends(require_permissions(["all", "create_issue"]))])
+async def create_issues_batch(project_id: int, batch: IssueBatchCreate, request: Request):
+    """Create many issues in a project with one request and one permission check"""
+    user = getattr(request.state, "user", None)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+
+    try:
+        return await issues_service.create_issues_batch(project_id, batch, user["id"])
+    except Exception:
+        logger.exception("Batch issue creation failed")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to create issues")
+
+
+@router.patch("/issues:batch", response_model=IssueBatchResponse, status_code=status.HTTP_200_OK, dependencies=[Depends(require_permissions(["all", "edit_issue"]))])
+async def update_issues_batch(batch: IssueBatchUpdate, request: Request):
+    """Update many issues with one request and one permission check"""
+    user = getattr(request.state, "user", None)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+
+    try:
+        return await issues_service.update_issues_batch(batch)
+    except Exception:
+        logger.exception("Batch issue update failed")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to update issues")
+
+
+@router.get("/projects/{project_id}/issues", response_model=IssuePage, status_code=status.HTTP_200_OK, dependencies=[Depends(require_permissions(["all", "view_issue"]))])
 async def get_project_issues(
     project_id: int, 
     request: Request,
     Status: Optional[str] = Query(None, description="Filter by status"),
     priority: Optional[str] = Query(None, description="Filter by priority"),
-    type_id: Optional[int] = Query(None, description="Filter by issue type ID")
+    type_id: Optional[int] = Query(None, description="Filter by issue type ID"),
+    assigned_to: Optional[int] = Query(None, description="Filter by assignee user ID"),
+    label_id: Optional[int] = Query(None, description="Filter by label ID"),
+    sprint_id: Optional[int] = Query(None, description="Filter by sprint ID"),
+    created_from: Optional[datetime] = Query(None, description="Only issues created at or after this time"),
+    created_to: Optional[datetime] = Query(None, description="Only issues created before this time"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page")
 ):
-    """Get all issues for a specific project with optional filters"""
+    """Get a page of issues for a specific project with optional filters"""
     user = getattr(request.state, "user", None)
     if not user:
         raise HTTPException(status_code=404, detail="Not authenticated")
 
     try:
-        if Status or priority or type_id:
+        filters = [Status, priority, type_id, assigned_to, label_id, sprint_id, created_from, created_to]
+        if any(value is not None for value in filters):
             # Use filtered search
             issues = await issues_service.get_issues_with_filters(
-                project_id, Status, priority, type_id
+                project_id, Status, priority, type_id,
+                assigned_to=assigned_to,
+                label_id=label_id,
+                sprint_id=sprint_id,
+                created_from=created_from,
+                created_to=created_to,
+                limit=limit,
+                cursor=cursor
             )
         else:
-            # Get all issues
-            issues = await issues_service.get_issues_by_project(project_id)
+            # Get one page of issues
+            issues = await issues_service.get_issues_by_project(project_id, limit, cursor)
         
         return issues
+    except ValueError as ve:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(ve))
     except Exception as e:
         raise HTTPException(status_code=404, detail="Failed to fetch issues")
 
 
+@router.get("/projects/{project_id}/issues/export", status_code=status.HTTP_200_OK, dependencies=[Depends(require_permissions(["all", "view_issue"]))])
+async def export_project_issues(project_id: int, request: Request,
+                                export_format: str = Query("ndjson", alias="format", pattern=EXPORT_FORMAT_PATTERN)):
+    """Stream every issue of a project as NDJSON or CSV"""
+    user = getattr(request.state, "user", None)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+
+    chunks = issues_service.export_project_issues(project_id)
+    return await export_response(chunks, export_format, f"project-{project_id}-issues")
+
+
 @router.get("/issues/{issue_id}", response_model=IssueResponse, status_code=status.HTTP_200_OK, dependencies=[Depends(require_permissions(["all", "view_issue"]))])
 async def get_issue(issue_id: int, request: Request):
     """Get a specific issue by ID"""
@@ -112,30 +175,46 @@ async def delete_issue(issue_id: int, request: Request):
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to delete issue")
 
 
-@router.get("/projects/{project_id}/issues/status/{status}", response_model=List[IssueResponse], status_code=status.HTTP_200_OK, dependencies=[Depends(require_permissions(["all", "view_issue_by_status"]))])
-async def get_issues_by_status(project_id: int, Status: str, request: Request):
-    """Get all issues with a specific status for a project"""
+@router.get("/projects/{project_id}/issues/status/{status}", response_model=IssuePage, status_code=status.HTTP_200_OK, dependencies=[Depends(require_permissions(["all", "view_issue_by_status"]))])
+async def get_issues_by_status(
+    project_id: int,
+    Status: str,
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page")
+):
+    """Get a page of issues with a specific status for a project"""
     user = getattr(request.state, "user", None)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
 
     try:
-        issues = await issues_service.get_issues_by_status(project_id, Status)
+        issues = await issues_service.get_issues_by_status(project_id, Status, limit, cursor)
         return issues
+    except ValueError as ve:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(ve))
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to fetch issues by status")
 
 
-@router.get("/projects/{project_id}/issues/priority/{priority}", response_model=List[IssueResponse], status_code=status.HTTP_200_OK, dependencies=[Depends(require_permissions(["all", "view_issue_by_priority"]))])
-async def get_issues_by_priority(project_id: int, priority: str, request: Request):
-    """Get all issues with a specific priority for a project"""
+@router.get("/projects/{project_id}/issues/priority/{priority}", response_model=IssuePage, status_code=status.HTTP_200_OK, dependencies=[Depends(require_permissions(["all", "view_issue_by_priority"]))])
+async def get_issues_by_priority(
+    project_id: int,
+    priority: str,
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page")
+):
+    """Get a page of issues with a specific priority for a project"""
     user = getattr(request.state, "user", None)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
 
     try:
-        issues = await issues_service.get_issues_by_priority(project_id, priority)
+        issues = await issues_service.get_issues_by_priority(project_id, priority, limit, cursor)
         return issues
+    except ValueError as ve:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(ve))
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to fetch issues by priority")
 
@@ -272,12 +351,14 @@ async def get_issue_assignment(issue_id: int, request: Request):
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to fetch assignment")
 
 
-@router.get("/users/assigned-issues", response_model=List[IssueResponse], status_code=status.HTTP_200_OK, dependencies=[Depends(require_permissions(["all", "view_assigned_issues"]))])
+@router.get("/users/assigned-issues", response_model=IssuePage, status_code=status.HTTP_200_OK, dependencies=[Depends(require_permissions(["all", "view_assigned_issues"]))])
 async def get_user_assigned_issues(
     request: Request,
-    project_id: Optional[int] = Query(None, description="Filter by project ID")
+    project_id: Optional[int] = Query(None, description="Filter by project ID"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page")
 ):
-    """Get all issues assigned to the authenticated user"""
+    """Get a page of issues assigned to the authenticated user"""
     user = getattr(request.state, "user", None)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
@@ -285,7 +366,9 @@ async def get_user_assigned_issues(
     try:
         # Get user_id from JWT token
         user_id = user["id"]
-        issues = await issues_service.get_user_assigned_issues(user_id, project_id)
+        issues = await issues_service.get_user_assigned_issues(user_id, project_id, limit, cursor)
         return issues
+    except ValueError as ve:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(ve))
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to fetch assigned issues")
@@ -2,7 +2,9 @@ from fastapi import APIRouter, HTTPException, Request, status, Depends, Query
 from fastapi.security import HTTPBearer
 from src.services.labels import LabelsService
 from src.schemas.labels import LabelCreate, LabelUpdate, LabelResponse, IssueLabelAssignment, IssueLabelResponse
-from typing import List
+from src.schemas.issues import IssuePage
+from src.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from typing import List, Optional
 
 bearer = HTTPBearer()
 router = APIRouter(prefix="/api", tags=["Labels"], dependencies=[Depends(bearer)])
@@ -160,17 +162,25 @@ async def get_issue_labels(issue_id: int, request: Request):
 
 
 # Additional utility endpoints
-@router.get("/projects/{project_id}/labels/{label_id}/issues", status_code=status.HTTP_200_OK)
-async def get_issues_by_label(project_id: int, label_id: int, request: Request):
-    """Get all issues with a specific label in a project"""
+@router.get("/projects/{project_id}/labels/{label_id}/issues", response_model=IssuePage, status_code=status.HTTP_200_OK)
+async def get_issues_by_label(
+    project_id: int,
+    label_id: int,
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page")
+):
+    """Get a page of issues with a specific label in a project"""
     user = getattr(request.state, "user", None)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
 
     try:
-        issues = await labels_service.get_issues_by_label(project_id, label_id)
+        issues = await labels_service.get_issues_by_label(project_id, label_id, limit, cursor)
         return issues
     except ValueError as ve:
+        if "cursor" in str(ve).lower():
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(ve))
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(ve))
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to fetch issues by label")
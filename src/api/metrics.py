@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends
+from fastapi.security import HTTPBearer
+
+from src.core.cache import cache_stats
+from src.core.database import db
+from src.dependencies.permission import require_permissions
+
+bearer = HTTPBearer()
+router = APIRouter(prefix="/api", tags=["Metrics"], dependencies=[Depends(bearer)])
+
+
+@router.get("/metrics/database", dependencies=[Depends(require_permissions(["all"]))])
+async def get_database_metrics():
+    """Connection pool size, in-use and waiting counts and the acquire-wait histogram"""
+    return db.pool_stats()
+
+
+@router.get("/metrics/caches", dependencies=[Depends(require_permissions(["all"]))])
+async def get_cache_metrics():
+    """Size, hit and miss counts of every in-process cache"""
+    return cache_stats()
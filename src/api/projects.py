@@ -1,4 +1,5 @@
-from fastapi import APIRouter, HTTPException, Request, status, Depends
+from fastapi import APIRouter, HTTPException, Request, status, Depends, Query
+from src.core.export import EXPORT_FORMAT_PATTERN, export_response
 from src.services.projects import ProjectsService
 from src.services.velocity import VelocityService
 from src.schemas.velocity import VelocityUpdate, VelocityResponse
@@ -66,6 +67,22 @@ async def list_organization_projects(organization_id: int, request: Request):
         else:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to get organization projects")
 
+@router.get("/organizations/{organization_id}/projects/export")
+async def export_organization_projects(organization_id: int, request: Request,
+                                       export_format: str = Query("ndjson", alias="format", pattern=EXPORT_FORMAT_PATTERN)):
+    """Stream all projects in an organization as NDJSON or CSV"""
+    user = getattr(request.state, "user", None)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+
+    try:
+        chunks = await projectsService.export_organization_projects(organization_id, user["id"])
+    except Exception as e:
+        if "Access denied" in str(e):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to export organization projects")
+    return await export_response(chunks, export_format, f"organization-{organization_id}-projects")
+
 @router.put("/projects/{project_id}/decision", dependencies=[Depends(require_permissions(["all", "update_project_status"]))])
 async def update_project_status(project_id: int, decision: str, request: Request):
     """Update project status"""
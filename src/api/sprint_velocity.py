@@ -1,10 +1,11 @@
-from fastapi import APIRouter, HTTPException, Request, status, Depends
+from fastapi import APIRouter, HTTPException, Request, status, Depends, Query
 from fastapi.security import HTTPBearer
 
 from src.dependencies.permission import require_permissions
 from src.services.sprint_velocity import SprintVelocityService
 from src.schemas.sprint_velocity import SprintVelocityResponse
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
 bearer = HTTPBearer()
 router = APIRouter(prefix="/api", tags=["Sprint Velocity"], dependencies=[Depends(bearer)])
@@ -12,15 +13,28 @@ router = APIRouter(prefix="/api", tags=["Sprint Velocity"], dependencies=[Depend
 sprint_velocity_service = SprintVelocityService()
 
 @router.get("/sprints/velocity", response_model=List[SprintVelocityResponse], status_code=status.HTTP_200_OK,dependencies=[Depends(require_permissions(["all", "add_issue_to_sprint"]))])
-async def get_sprint_velocity_analysis(request: Request):
+async def get_sprint_velocity_analysis(
+    request: Request,
+    organization_id: int = Query(..., description="Organization to report on; the caller must be a member"),
+    workspace_id: Optional[int] = Query(None, description="Only this workspace"),
+    project_id: Optional[int] = Query(None, description="Only this project"),
+    date_from: Optional[datetime] = Query(None, description="Only activity at or after this time"),
+    date_to: Optional[datetime] = Query(None, description="Only activity before this time"),
+):
     """Get sprint velocity analysis for all sprints"""
     user = getattr(request.state, "user", None)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
 
     try:
-        sprint_metrics = await sprint_velocity_service.get_sprint_velocity_analysis()
+        sprint_metrics = await sprint_velocity_service.get_sprint_velocity_analysis(
+            user["id"], organization_id, workspace_id, project_id, date_from, date_to
+        )
         return sprint_metrics
         
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
+        if "Access denied" in str(e):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to fetch sprint velocity analysis: {str(e)}")
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException, Request, status, Depends
 from src.services.sprints import SprintsService
 from src.schemas.sprints import SprintCreate, SprintUpdate, SprintResponse
-from src.schemas.sprint_planning import IssueAddToSprint, SprintIssueResponse, SprintBacklogReorder
+from src.schemas.sprint_planning import IssueAddToSprint, SprintIssueResponse, SprintBacklogReorder, SprintIssueMove, SprintIssueMoveResponse
 from fastapi.security import HTTPBearer
 from src.dependencies.permission import require_permissions
 
@@ -237,3 +237,23 @@ async def reorder_sprint_backlog(sprint_id: int, reorder_data: SprintBacklogReor
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
         else:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to reorder sprint backlog")
+
+@router.patch("/sprints/{sprint_id}/issues/{issue_id}/move", response_model=SprintIssueMoveResponse, dependencies=[Depends(require_permissions(["all", "reorder_sprint_backlog"]))])
+async def move_sprint_issue(sprint_id: int, issue_id: int, move_data: SprintIssueMove, request: Request):
+    """Move one issue in the sprint backlog (drag and drop)"""
+    user = getattr(request.state, "user", None)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+
+    try:
+        result = await sprintsService.move_sprint_issue(sprint_id, issue_id, move_data, user["id"])
+        return result
+    except ValueError as ve:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(ve))
+    except Exception as e:
+        if "Access denied" in str(e):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+        elif "Sprint not found" in str(e):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+        else:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to move sprint issue")
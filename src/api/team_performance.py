@@ -1,10 +1,11 @@
-from fastapi import APIRouter, HTTPException, Request, status, Depends
+from fastapi import APIRouter, HTTPException, Request, status, Depends, Query
 from fastapi.security import HTTPBearer
 
 from src.dependencies.permission import require_permissions
 from src.services.team_performance import TeamPerformanceService
 from src.schemas.team_performance import TeamPerformanceResponse
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
 bearer = HTTPBearer()
 router = APIRouter(prefix="/api", tags=["Team Performance"], dependencies=[Depends(bearer)])
@@ -13,15 +14,28 @@ team_performance_service = TeamPerformanceService()
 
 @router.get("/teams/performance", response_model=List[TeamPerformanceResponse], status_code=status.HTTP_200_OK,
             dependencies=[Depends(require_permissions(["all"]))])
-async def get_team_performance_metrics(request: Request):
+async def get_team_performance_metrics(
+    request: Request,
+    organization_id: int = Query(..., description="Organization to report on; the caller must be a member"),
+    workspace_id: Optional[int] = Query(None, description="Only this workspace"),
+    project_id: Optional[int] = Query(None, description="Only this project"),
+    date_from: Optional[datetime] = Query(None, description="Only activity at or after this time"),
+    date_to: Optional[datetime] = Query(None, description="Only activity before this time"),
+):
     """Get team performance and collaboration metrics for all teams"""
     user = getattr(request.state, "user", None)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
 
     try:
-        team_metrics = await team_performance_service.get_team_performance_metrics()
+        team_metrics = await team_performance_service.get_team_performance_metrics(
+            user["id"], organization_id, workspace_id, project_id, date_from, date_to
+        )
         return team_metrics
         
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
+        if "Access denied" in str(e):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to fetch team performance metrics: {str(e)}")
@@ -1,10 +1,11 @@
-from fastapi import APIRouter, HTTPException, Request, status, Depends
+from fastapi import APIRouter, HTTPException, Request, status, Depends, Query
 from fastapi.security import HTTPBearer
 
 from src.dependencies.permission import require_permissions
 from src.services.user_performance import UserPerformanceService
 from src.schemas.user_performance import UserPerformanceResponse
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
 bearer = HTTPBearer()
 router = APIRouter(prefix="/api", tags=["User Performance"], dependencies=[Depends(bearer)])
@@ -12,15 +13,28 @@ router = APIRouter(prefix="/api", tags=["User Performance"], dependencies=[Depen
 user_performance_service = UserPerformanceService()
 
 @router.get("/users/performance",dependencies=[Depends(require_permissions(["all"]))])
-async def get_user_performance(request: Request):
+async def get_user_performance(
+    request: Request,
+    organization_id: int = Query(..., description="Organization to report on; the caller must be a member"),
+    workspace_id: Optional[int] = Query(None, description="Only this workspace"),
+    project_id: Optional[int] = Query(None, description="Only this project"),
+    date_from: Optional[datetime] = Query(None, description="Only activity at or after this time"),
+    date_to: Optional[datetime] = Query(None, description="Only activity before this time"),
+):
     """Get user performance and workload analysis for all users"""
     user = getattr(request.state, "user", None)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
 
     try:
-        user_metrics = await user_performance_service.get_user_performance_metrics()
+        user_metrics = await user_performance_service.get_user_performance_metrics(
+            user["id"], organization_id, workspace_id, project_id, date_from, date_to
+        )
         return user_metrics
         
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
+        if "Access denied" in str(e):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to fetch user performance metrics: {str(e)}")
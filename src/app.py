@@ -5,9 +5,17 @@ from src.api.organizations import router as organizations_router
 from src.api.teams import router as teams_router
 from src.api.team_members import router as team_members_router
 from src.core.database import db
+from src.core.config import settings
+from src.core.cache import listen_for_invalidations
+from src.core.scheduler import run_periodically
+from src.core.logger import setup_logger
+from src.services.sprints import SprintsService
+from src.services.analytics import AnalyticsService
 from contextlib import asynccontextmanager
+import asyncio
 from src.api.roles import router as roles_router
 from src.middleware.auth import AuthMiddleware
+from src.middleware.db_session import DatabaseSessionMiddleware
 
 from src.api.workspaces import router as workspaces_router
 from src.api.projects import router as projects_router
@@ -22,16 +30,78 @@ from src.api.project_analysis import router as project_analysis_router
 from src.api.team_performance import router as team_performance_router
 from src.api.user_performance import router as user_performance_router
 from src.api.sprint_velocity import router as sprint_velocity_router
+from src.api.analytics import router as analytics_router
+from src.api.metrics import router as metrics_router
 from src.notification.websocket import router as web
+from src.notification.dispatcher import dispatcher, topic_dispatcher
+from src.notification.acks import ack_buffer
+from src.notification.presence import presence
+from src.notification.outbox import OutboxRelay
+from src.notification.streams import coalescer
 from src.api.notification import router as noti
 # Add to your existing routers
 
+logger = setup_logger(__name__)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Load the ML model
     await db.create_pool()
+    background_tasks = []
+    if settings.CACHE_INVALIDATION_ENABLED:
+        background_tasks.append(asyncio.create_task(listen_for_invalidations()))
+    if settings.SPRINT_RANK_REBALANCE_INTERVAL_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(run_periodically(
+            SprintsService().rebalance_sprint_ranks,
+            settings.SPRINT_RANK_REBALANCE_INTERVAL_SECONDS,
+            "sprint_rank_rebalance",
+        )))
+    if db.replicas:
+        background_tasks.append(asyncio.create_task(run_periodically(
+            db.check_replicas,
+            settings.DB_REPLICA_CHECK_INTERVAL_SECONDS,
+            "db_replica_health_check",
+        )))
+    if settings.ANALYTICS_REFRESH_INTERVAL_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(run_periodically(
+            AnalyticsService().refresh_snapshots_job,
+            settings.ANALYTICS_REFRESH_INTERVAL_SECONDS,
+            "analytics_snapshot_refresh",
+        )))
+    background_tasks.append(asyncio.create_task(run_periodically(
+        ack_buffer.flush,
+        settings.NOTIFICATION_ACK_FLUSH_INTERVAL_SECONDS,
+        "notification_ack_flush",
+    )))
+    background_tasks.append(asyncio.create_task(run_periodically(
+        presence.heartbeat,
+        settings.NOTIFICATION_PRESENCE_HEARTBEAT_SECONDS,
+        "notification_presence_heartbeat",
+    )))
+    background_tasks.append(asyncio.create_task(run_periodically(
+        OutboxRelay(settings.NOTIFICATION_OUTBOX_BATCH_SIZE).drain,
+        settings.NOTIFICATION_OUTBOX_POLL_SECONDS,
+        "notification_outbox_relay",
+    )))
+    if coalescer.enabled:
+        background_tasks.append(asyncio.create_task(run_periodically(
+            coalescer.flush,
+            settings.NOTIFICATION_COALESCE_FLUSH_SECONDS,
+            "notification_coalesce_flush",
+        )))
+    dispatcher.start()
+    topic_dispatcher.start()
     yield
+    await dispatcher.stop()
+    await topic_dispatcher.stop()
+    for task in background_tasks:
+        task.cancel()
+    try:
+        await ack_buffer.flush()
+        await presence.clear()
+    except Exception:
+        logger.exception("Failed to flush notification state on shutdown")
     await db.close()
 
 
@@ -39,9 +109,9 @@ app = FastAPI(lifespan=lifespan)
 
 
 # Middleware Stack (Executed in reverse order of addition)
-# Flow: CORS -> Auth -> Role -> App
+# Flow: CORS -> DB session -> Auth -> Role -> App
 
-# 2. Auth Middleware
+# 3. Auth Middleware
 app.add_middleware(
     AuthMiddleware,
     allow_paths=[
@@ -57,6 +127,10 @@ app.add_middleware(
 )
 
 
+# 2. Database session (per-request replica routing state)
+app.add_middleware(DatabaseSessionMiddleware)
+
+
 # 1. CORS Middleware (Outermost - runs first)
 app.add_middleware(
     CORSMiddleware,
@@ -93,6 +167,8 @@ app.include_router(skills_router)
 app.include_router(issue_skills_router)
 app.include_router(project_analysis_router)
 app.include_router(user_performance_router)
+app.include_router(analytics_router)
+app.include_router(metrics_router)
 @app.get("/")
 async def root():
     return {"message": "Prokoi API is running"}
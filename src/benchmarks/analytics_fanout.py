@@ -0,0 +1,234 @@
+"""Regression benchmark for the analytics snapshot queries.
+
+Builds a synthetic dataset in a scratch schema and runs the V1_11 (single wide
+join) and V1_12 (per-dimension aggregates) view definitions side by side. It
+reports the median runtime over several runs, the largest intermediate row count
+in each plan and the columns whose values changed. A view regresses when its
+peak row count grows or its median runtime is slower beyond the tolerance.
+
+    python -m src.benchmarks.analytics_fanout --scale 8 --runs 7
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import re
+import statistics
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+import asyncpg
+
+from src.core.config import settings
+
+MODELS_DIR = Path(__file__).resolve().parent.parent / "models"
+LEGACY_MIGRATION = MODELS_DIR / "V1_11_analytics_snapshots.sql"
+AGGREGATE_MIGRATION = MODELS_DIR / "V1_12_analytics_snapshot_aggregates.sql"
+
+VIEW_KEYS = {
+    "mv_project_analytics": ("project_id",),
+    "mv_user_performance": ("user_id", "organization_id"),
+    "mv_sprint_velocity": ("sprint_id",),
+    "mv_team_performance": ("team_id",),
+}
+
+# Time-dependent columns that differ between any two runs
+VOLATILE_COLUMNS = {"computed_at", "project_age_days", "days_since_joined"}
+
+SCHEMA_DDL = """
+CREATE TABLE organizations (id SERIAL PRIMARY KEY, name TEXT);
+CREATE TABLE workspaces (id SERIAL PRIMARY KEY, organization_id INT, name TEXT);
+CREATE TABLE projects (id SERIAL PRIMARY KEY, workspace_id INT, name TEXT, status TEXT, created_at TIMESTAMP);
+CREATE TABLE users (id SERIAL PRIMARY KEY, name TEXT, email TEXT, created_at TIMESTAMP);
+CREATE TABLE organization_users (user_id INT, organization_id INT);
+CREATE TABLE teams (id SERIAL PRIMARY KEY, organization_id INT, name TEXT);
+CREATE TABLE user_team (user_id INT, team_id INT);
+CREATE TABLE team_workspaces (team_id INT, workspace_id INT);
+CREATE TABLE project_teams (project_id INT, team_id INT);
+CREATE TABLE issues (id SERIAL PRIMARY KEY, project_id INT, status TEXT, story_points INT,
+                     created_by INT, created_at TIMESTAMP, updated_at TIMESTAMP);
+CREATE TABLE issue_comments (id SERIAL PRIMARY KEY, issue_id INT, user_id INT);
+CREATE TABLE issue_history (id SERIAL PRIMARY KEY, issue_id INT, user_id INT);
+CREATE TABLE issue_assignments (id SERIAL PRIMARY KEY, issue_id INT, assigned_to INT);
+CREATE TABLE user_capacity (user_id INT, organization_id INT, weekly_hours INT);
+CREATE TABLE user_workload (id SERIAL PRIMARY KEY, issue_assignments_id INT, hours_spent NUMERIC);
+CREATE TABLE sprints (id SERIAL PRIMARY KEY, project_id INT, name TEXT, start_date DATE, end_date DATE,
+                      status TEXT, velocity_target INT);
+CREATE TABLE issue_sprints (sprint_id INT, issue_id INT);
+CREATE TABLE team_velocity (id SERIAL PRIMARY KEY, team_id INT, project_id INT, avg_hours_per_point NUMERIC);
+
+CREATE INDEX ON issues (project_id);
+CREATE INDEX ON issue_comments (issue_id);
+CREATE INDEX ON issue_comments (user_id);
+CREATE INDEX ON issue_history (issue_id);
+CREATE INDEX ON issue_history (user_id);
+CREATE INDEX ON issue_assignments (issue_id);
+CREATE INDEX ON issue_assignments (assigned_to);
+CREATE INDEX ON user_workload (issue_assignments_id);
+CREATE INDEX ON issue_sprints (sprint_id);
+CREATE INDEX ON team_velocity (team_id);
+CREATE INDEX ON team_velocity (project_id);
+CREATE INDEX ON project_teams (team_id);
+CREATE INDEX ON user_team (team_id);
+"""
+
+SEED_STATEMENTS = [
+    "INSERT INTO organizations (name) SELECT 'org ' || g FROM generate_series(1, $1) g",
+    """INSERT INTO workspaces (organization_id, name)
+       SELECT o.id, 'workspace ' || g FROM organizations o, generate_series(1, 3) g""",
+    """INSERT INTO projects (workspace_id, name, status, created_at)
+       SELECT w.id, 'project ' || g, 'active', NOW() - (w.id * 7 + g) * INTERVAL '1 day'
+       FROM workspaces w, generate_series(1, 4) g""",
+    """INSERT INTO users (name, email, created_at)
+       SELECT 'user ' || g, 'user' || g || '@example.com', NOW() - g * INTERVAL '1 hour'
+       FROM generate_series(1, $1 * 50) g""",
+    """INSERT INTO organization_users (user_id, organization_id)
+       SELECT u.id, 1 + u.id % (SELECT COUNT(*) FROM organizations) FROM users u""",
+    """INSERT INTO teams (organization_id, name)
+       SELECT o.id, 'team ' || g FROM organizations o, generate_series(1, 5) g""",
+    """INSERT INTO user_team (user_id, team_id)
+       SELECT ou.user_id, t.id FROM organization_users ou
+       JOIN teams t ON t.organization_id = ou.organization_id
+       WHERE (ou.user_id + t.id) % 5 = 0""",
+    """INSERT INTO team_workspaces (team_id, workspace_id)
+       SELECT t.id, w.id FROM teams t JOIN workspaces w ON w.organization_id = t.organization_id
+       WHERE (t.id + w.id) % 2 = 0""",
+    """INSERT INTO project_teams (project_id, team_id)
+       SELECT p.id, tw.team_id FROM team_workspaces tw JOIN projects p ON p.workspace_id = tw.workspace_id""",
+    """INSERT INTO issues (project_id, status, story_points, created_by, created_at, updated_at)
+       SELECT p.id, (ARRAY['open', 'in-progress', 'completed'])[1 + g % 3], 1 + g % 8,
+              1 + (p.id * 31 + g) % (SELECT COUNT(*) FROM users),
+              NOW() - g * INTERVAL '1 hour', NOW() - g * INTERVAL '1 hour' + (g % 90) * INTERVAL '1 hour'
+       FROM projects p, generate_series(1, 150) g""",
+    """INSERT INTO issue_comments (issue_id, user_id)
+       SELECT i.id, 1 + (i.id * 7 + g) % (SELECT COUNT(*) FROM users) FROM issues i, generate_series(1, 4) g""",
+    """INSERT INTO issue_history (issue_id, user_id)
+       SELECT i.id, 1 + (i.id * 11 + g) % (SELECT COUNT(*) FROM users) FROM issues i, generate_series(1, 6) g""",
+    """INSERT INTO issue_assignments (issue_id, assigned_to)
+       SELECT i.id, 1 + (i.id * 13) % (SELECT COUNT(*) FROM users) FROM issues i""",
+    """INSERT INTO user_capacity (user_id, organization_id, weekly_hours)
+       SELECT user_id, organization_id, 40 FROM organization_users""",
+    """INSERT INTO user_workload (issue_assignments_id, hours_spent)
+       SELECT ia.id, 1 + g FROM issue_assignments ia, generate_series(1, 2) g""",
+    """INSERT INTO sprints (project_id, name, start_date, end_date, status, velocity_target)
+       SELECT p.id, 'sprint ' || g, CURRENT_DATE - g * 14, CURRENT_DATE - g * 14 + 13, 'completed', 30
+       FROM projects p, generate_series(1, 6) g""",
+    """INSERT INTO issue_sprints (sprint_id, issue_id)
+       SELECT s.id, i.id FROM issues i JOIN sprints s ON s.project_id = i.project_id
+       WHERE i.id % 6 = s.id % 6""",
+    """INSERT INTO team_velocity (team_id, project_id, avg_hours_per_point)
+       SELECT pt.team_id, pt.project_id, 1 + (pt.team_id + pt.project_id + g) % 5
+       FROM project_teams pt, generate_series(1, 3) g""",
+]
+
+
+def load_view_queries(path: Path) -> dict:
+    """Extract the SELECT body of every materialized view in a migration file"""
+    sql = path.read_text()
+    pattern = re.compile(r"CREATE MATERIALIZED VIEW IF NOT EXISTS (\w+) AS\s+(.*?);", re.S)
+    return {name: body for name, body in pattern.findall(sql)}
+
+
+def peak_rows(plan: dict) -> int:
+    """Largest number of rows produced by any node of an EXPLAIN ANALYZE plan"""
+    rows = int(plan.get("Actual Rows", 0) * plan.get("Actual Loops", 1))
+    return max([rows] + [peak_rows(child) for child in plan.get("Plans", [])])
+
+
+async def explain(conn, query: str, runs: int) -> tuple[float, int]:
+    """Median execution time (ms) over runs and the plan's peak row count, which does not vary"""
+    times = []
+    for _ in range(runs):
+        raw = await conn.fetchval(f"EXPLAIN (ANALYZE, FORMAT JSON) {query}")
+        result = (json.loads(raw) if isinstance(raw, str) else raw)[0]
+        times.append(result["Execution Time"])
+    return statistics.median(times), peak_rows(result["Plan"])
+
+
+def values_differ(a, b) -> bool:
+    if isinstance(a, (int, float, Decimal)) and isinstance(b, (int, float, Decimal)):
+        return not math.isclose(float(a), float(b), rel_tol=1e-9, abs_tol=1e-9)
+    return a != b
+
+
+async def compare(conn, view: str, legacy: str, aggregated: str) -> dict:
+    """Count, per column, how many rows differ between the two definitions"""
+    keys = VIEW_KEYS[view]
+    old_rows = {tuple(r[k] for k in keys): dict(r) for r in await conn.fetch(legacy)}
+    new_rows = {tuple(r[k] for k in keys): dict(r) for r in await conn.fetch(aggregated)}
+    changed = {}
+    for key in old_rows.keys() & new_rows.keys():
+        old, new = old_rows[key], new_rows[key]
+        for column in old.keys() & new.keys() - VOLATILE_COLUMNS:
+            if values_differ(old[column], new[column]):
+                changed[column] = changed.get(column, 0) + 1
+    return {
+        "legacy_rows": len(old_rows),
+        "aggregated_rows": len(new_rows),
+        "changed_columns": changed,
+    }
+
+
+async def run(scale: int, keep: bool, runs: int, tolerance: float) -> int:
+    legacy_queries = load_view_queries(LEGACY_MIGRATION)
+    aggregated_queries = load_view_queries(AGGREGATE_MIGRATION)
+    schema = f"analytics_bench_{os.getpid()}"
+
+    conn = await asyncpg.connect(
+        host=settings.DB_HOST,
+        user=settings.DB_USER,
+        password=settings.DB_PASSWORD,
+        port=settings.DB_PORT,
+        database=settings.DB_NAME,
+        ssl=settings.SSL_MODE,
+    )
+    regressions = 0
+    try:
+        await conn.execute(f"CREATE SCHEMA {schema}")
+        await conn.execute(f"SET search_path TO {schema}")
+        await conn.execute(SCHEMA_DDL)
+        for statement in SEED_STATEMENTS:
+            args = [scale] if "$1" in statement else []
+            await conn.execute(statement, *args)
+        await conn.execute("ANALYZE")
+
+        print(f"{'view':<22} {'legacy ms':>10} {'new ms':>10} {'legacy peak rows':>17} {'new peak rows':>14}  changed columns")
+        for view in VIEW_KEYS:
+            legacy, aggregated = legacy_queries[view], aggregated_queries[view]
+            legacy_ms, legacy_peak = await explain(conn, legacy, runs)
+            new_ms, new_peak = await explain(conn, aggregated, runs)
+            diff = await compare(conn, view, legacy, aggregated)
+            changed = ", ".join(f"{c}={n}" for c, n in sorted(diff["changed_columns"].items())) or "-"
+            print(f"{view:<22} {legacy_ms:>10.1f} {new_ms:>10.1f} {legacy_peak:>17} {new_peak:>14}  {changed}")
+
+            if diff["legacy_rows"] != diff["aggregated_rows"]:
+                print(f"  result row count changed: {diff['legacy_rows']} -> {diff['aggregated_rows']}")
+                regressions += 1
+            if new_peak > legacy_peak:
+                print("  aggregated query fans out to more rows than the legacy query")
+                regressions += 1
+            if new_ms > legacy_ms * (1 + tolerance):
+                print(f"  aggregated query is more than {tolerance:.0%} slower than the legacy query")
+                regressions += 1
+    finally:
+        if not keep:
+            await conn.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+        await conn.close()
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=4, help="number of organizations; data grows linearly")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch schema for inspection")
+    parser.add_argument("--runs", type=int, default=5, help="timed runs per query; the median is compared")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="fraction by which the median may be slower before it counts as a regression")
+    args = parser.parse_args()
+    sys.exit(1 if asyncio.run(run(args.scale, args.keep, max(1, args.runs), args.tolerance)) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""Load test for the WebSocket notification path.
+
+Starts the app with uvicorn against a local Redis, opens many WebSocket clients,
+publishes to their streams with publish_message at a fixed rate and reports
+delivery latency percentiles, throughput and the Redis connection count.
+
+    python -m src.benchmarks.notification_load --clients 2000 --rate 1000 --duration 30
+
+The app still connects to the database from .env on startup. Keys are written
+under a throwaway APP_ENV and removed afterwards. Pass --url to target an app that
+is already running; it must use the same Redis and APP_ENV as this process.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+
+import websockets
+
+WS_PATH = "/api/notifications/WebSocket/{user_id}/WS_CONNECTION"
+MESSAGE_PREFIX = "loadtest"
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def raise_fd_limit() -> None:
+    # Every client holds a socket in this process and in the app
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+class LoadStats:
+    def __init__(self):
+        self.connected = 0
+        self.connect_failures = 0
+        self.sent = 0
+        self.received = 0
+        self.frames = 0
+        self.latencies: list[float] = []
+        self.redis_clients: list[int] = []
+
+
+async def run_client(url: str, user_id: int, stats: LoadStats, ready: asyncio.Event, stop: asyncio.Event) -> None:
+    try:
+        websocket = await websockets.connect(url.format(user_id=user_id), open_timeout=30, max_queue=None)
+    except Exception:
+        stats.connect_failures += 1
+        return
+    stats.connected += 1
+    try:
+        await ready.wait()
+        while not stop.is_set():
+            try:
+                raw = await asyncio.wait_for(websocket.recv(), timeout=1)
+            except asyncio.TimeoutError:
+                continue
+            received_at = time.time()
+            frame = json.loads(raw)
+            messages = frame.get("messages", [frame])
+            stats.frames += 1
+            for message in messages:
+                parts = message.get("message", "").split()
+                if len(parts) == 3 and parts[0] == MESSAGE_PREFIX:
+                    stats.received += 1
+                    stats.latencies.append((received_at - float(parts[2])) * 1000)
+            # Ack like a real client so pending entries do not pile up
+            await websocket.send(json.dumps({"ack": [m["message_id"] for m in messages]}))
+    except websockets.ConnectionClosed:
+        pass
+    finally:
+        await websocket.close()
+
+
+async def publish(user_ids: list[int], rate: int, duration: float, stats: LoadStats) -> None:
+    from src.notification.streams import publish_message
+
+    # Publish in 10 ms ticks so the rate holds without one task per message
+    tick = 0.01
+    per_tick = rate * tick
+    budget = 0.0
+    started = time.perf_counter()
+    while time.perf_counter() - started < duration:
+        budget += per_tick
+        count, budget = int(budget), budget - int(budget)
+        if count:
+            sends = [
+                publish_message(user_id, f"{MESSAGE_PREFIX} {stats.sent + i} {time.time()}")
+                for i, user_id in enumerate(random.choices(user_ids, k=count))
+            ]
+            stats.sent += count
+            await asyncio.gather(*sends)
+        await asyncio.sleep(tick)
+
+
+async def sample_redis_clients(redis, stats: LoadStats, stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        info = await redis.info("clients")
+        stats.redis_clients.append(int(info["connected_clients"]))
+        await asyncio.sleep(0.5)
+
+
+async def wait_for_app(base_url: str, process: subprocess.Popen, timeout: float = 60) -> None:
+    # Any HTTP answer (even 401) means the server is accepting connections
+    host, port = base_url.removeprefix("http://").split(":")
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"App exited during startup with code {process.returncode}")
+        try:
+            _reader, writer = await asyncio.open_connection(host, int(port))
+            writer.close()
+            await writer.wait_closed()
+            return
+        except OSError:
+            await asyncio.sleep(0.5)
+    raise RuntimeError("App did not start in time")
+
+
+async def delete_keys(redis, env: str) -> int:
+    deleted = 0
+    async for key in redis.scan_iter(match=f"{env}:notiq:*", count=1000):
+        deleted += await redis.delete(key)
+    return deleted
+
+
+async def run(args) -> int:
+    from src.notification.client import get_redis_client
+
+    redis = get_redis_client()
+    stats = LoadStats()
+    baseline_clients = int((await redis.info("clients"))["connected_clients"])
+
+    process = None
+    base_url = args.url
+    if base_url is None:
+        base_url = f"http://127.0.0.1:{args.port}"
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "src.app:app", "--host", "127.0.0.1",
+             "--port", str(args.port), "--log-level", "warning"],
+            env=os.environ.copy(),
+        )
+    ws_url = base_url.replace("http", "ws", 1) + WS_PATH
+
+    ready, stop = asyncio.Event(), asyncio.Event()
+    clients = []
+    try:
+        if process is not None:
+            await wait_for_app(base_url, process)
+
+        user_ids = list(range(args.first_user_id, args.first_user_id + args.clients))
+        connect_started = time.perf_counter()
+        for start in range(0, len(user_ids), args.connect_batch):
+            batch = user_ids[start:start + args.connect_batch]
+            clients.extend(asyncio.create_task(run_client(ws_url, u, stats, ready, stop)) for u in batch)
+            await asyncio.sleep(0.05)
+        while stats.connected + stats.connect_failures < len(user_ids):
+            await asyncio.sleep(0.1)
+        connect_seconds = time.perf_counter() - connect_started
+        # Let the dispatcher pick up every subscription before measuring
+        await asyncio.sleep(1)
+
+        ready.set()
+        sampler = asyncio.create_task(sample_redis_clients(redis, stats, stop))
+        publish_started = time.perf_counter()
+        await publish(user_ids, args.rate, args.duration, stats)
+        publish_seconds = time.perf_counter() - publish_started
+
+        # Give in-flight messages time to arrive
+        drain_deadline = time.monotonic() + args.drain_timeout
+        while stats.received < stats.sent and time.monotonic() < drain_deadline:
+            await asyncio.sleep(0.1)
+        elapsed = time.perf_counter() - publish_started
+    finally:
+        stop.set()
+        await asyncio.gather(*clients, return_exceptions=True)
+        if process is not None:
+            process.terminate()
+            process.wait()
+        if args.url is None:
+            await delete_keys(redis, os.environ["APP_ENV"])
+
+    await sampler
+    latencies = stats.latencies
+    print(f"clients connected      {stats.connected}/{args.clients} in {connect_seconds:.1f}s ({stats.connect_failures} failed)")
+    print(f"messages sent          {stats.sent} in {publish_seconds:.1f}s ({stats.sent / publish_seconds:.0f}/s)")
+    print(f"messages received      {stats.received} in {stats.frames} frames ({stats.received / elapsed:.0f}/s)")
+    print(f"messages lost          {max(0, stats.sent - stats.received)}")
+    print(
+        "latency ms             "
+        f"p50 {percentile(latencies, 50):.1f}  p90 {percentile(latencies, 90):.1f}  "
+        f"p99 {percentile(latencies, 99):.1f}  max {max(latencies, default=0):.1f}"
+    )
+    peak_clients = max(stats.redis_clients, default=baseline_clients)
+    print(f"redis connections      baseline {baseline_clients}  peak {peak_clients}  added {peak_clients - baseline_clients}")
+    return 1 if stats.connect_failures or stats.received < stats.sent else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=1000, help="number of WebSocket clients, one user each")
+    parser.add_argument("--rate", type=int, default=500, help="messages published per second across all users")
+    parser.add_argument("--duration", type=float, default=20, help="seconds to publish for")
+    parser.add_argument("--drain-timeout", type=float, default=10, help="seconds to wait for late deliveries")
+    parser.add_argument("--connect-batch", type=int, default=200, help="clients opened per 50 ms step")
+    parser.add_argument("--first-user-id", type=int, default=1_000_000, help="lowest synthetic user id")
+    parser.add_argument("--port", type=int, default=8765, help="port for the app started by the harness")
+    parser.add_argument("--url", help="base URL of an already running app; skips starting one")
+    parser.add_argument("--redis-host", default="127.0.0.1")
+    parser.add_argument("--redis-port", type=int, default=6379)
+    parser.add_argument("--redis-db", type=int, default=0)
+    parser.add_argument("--redis-password", default="")
+    args = parser.parse_args()
+
+    if args.url is None:
+        # Settings and key helpers read the environment, so set it before importing the app
+        os.environ.update({
+            "REDIS_HOST": args.redis_host,
+            "REDIS_PORT": str(args.redis_port),
+            "REDIS_DB": str(args.redis_db),
+            "REDIS_PASSWORD": args.redis_password,
+            "APP_ENV": f"loadtest{os.getpid()}",
+        })
+        os.environ.setdefault("REDIS_USERNAME", "")
+    raise_fd_limit()
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
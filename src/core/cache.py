@@ -0,0 +1,178 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable
+
+from src.core.config import settings
+from src.core.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class TTLCache:
+    """Bounded in-process cache with per-entry TTL and LRU eviction"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> Any:
+        entry = self._data.pop(key, None)
+        return entry[1] if entry else None
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits / total) if total else 0.0,
+        }
+
+
+# Named caches that can be invalidated from other nodes
+_caches: Dict[str, TTLCache] = {}
+
+
+def register_cache(name: str, cache: TTLCache) -> TTLCache:
+    _caches[name] = cache
+    return cache
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: cache.stats() for name, cache in _caches.items()}
+
+
+def get_invalidation_channel() -> str:
+    env = os.getenv("APP_ENV", "local")
+    app = "prokoi"
+    channel_prefix = "cache_invalidation"
+    return f"{env}:{app}:{channel_prefix}"
+
+
+def get_version_key(name: str) -> str:
+    env = os.getenv("APP_ENV", "local")
+    app = "prokoi"
+    version_prefix = "cache_version"
+    return f"{env}:{app}:{version_prefix}:{name}"
+
+
+# name -> (recheck_at, version) so hot paths do not hit Redis on every call
+_versions: Dict[str, tuple[float, int]] = {}
+
+
+async def get_version(name: str) -> int:
+    """Current generation of a versioned cache, re-read from Redis at most every CACHE_VERSION_CHECK_SECONDS"""
+    now = time.monotonic()
+    cached = _versions.get(name)
+    if cached and cached[0] > now:
+        return cached[1]
+
+    from src.notification.client import get_redis_client
+
+    try:
+        value = await get_redis_client().get(get_version_key(name))
+        version = int(value) if value else 0
+    except Exception as e:
+        # Keep serving the last known generation; cache TTLs bound staleness
+        logger.warning(f"Failed to read cache version for {name}: {e}")
+        version = cached[1] if cached else 0
+
+    _versions[name] = (now + settings.CACHE_VERSION_CHECK_SECONDS, version)
+    return version
+
+
+async def bump_version(name: str) -> int:
+    """Move a versioned cache to a new generation so every worker reloads its entries"""
+    from src.notification.client import get_redis_client
+
+    cached = _versions.get(name)
+    try:
+        version = int(await get_redis_client().incr(get_version_key(name)))
+    except Exception as e:
+        logger.warning(f"Failed to bump cache version for {name}: {e}")
+        version = (cached[1] if cached else 0) + 1
+
+    # The writing node sees the new generation immediately
+    _versions[name] = (time.monotonic() + settings.CACHE_VERSION_CHECK_SECONDS, version)
+    return version
+
+
+async def invalidate(name: str, key: str, broadcast: bool = True) -> None:
+    """Drop a key locally and, optionally, tell every other node to drop it too"""
+    cache = _caches.get(name)
+    if cache is not None:
+        cache.pop(key)
+
+    if not broadcast or not settings.CACHE_INVALIDATION_ENABLED:
+        return
+
+    from src.notification.client import get_redis_client
+
+    try:
+        await get_redis_client().publish(get_invalidation_channel(), f"{name}|{key}")
+    except Exception as e:
+        # Other nodes fall back to TTL expiry
+        logger.warning(f"Failed to publish cache invalidation for {name}|{key}: {e}")
+
+
+async def listen_for_invalidations(reconnect_delay: float = 1.0) -> None:
+    """Apply invalidations published by other nodes to the local caches"""
+    from src.notification.client import get_redis_client
+
+    channel = get_invalidation_channel()
+    while True:
+        pubsub = get_redis_client().pubsub()
+        try:
+            await pubsub.subscribe(channel)
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                name, _, key = str(message["data"]).partition("|")
+                cache = _caches.get(name)
+                if cache is not None:
+                    cache.pop(key)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Cache invalidation listener error: {e}")
+            await asyncio.sleep(reconnect_delay)
+        finally:
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
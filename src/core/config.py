@@ -23,11 +23,71 @@ class Settings(BaseSettings):
     REDIS_USERNAME: str
     REDIS_PASSWORD: str
 
+    # Database pool
+    DB_POOL_MIN_SIZE: int = 2
+    DB_POOL_MAX_SIZE: int = 10
+    DB_POOL_ACQUIRE_TIMEOUT_SECONDS: float = 10.0  # 0 waits forever
+    DB_POOL_MAX_INACTIVE_CONNECTION_LIFETIME: float = 300.0
+    DB_COMMAND_TIMEOUT_SECONDS: float = 60.0  # 0 disables
+    DB_STATEMENT_TIMEOUT_MS: int = 30000  # request handlers; 0 disables
+    DB_BACKGROUND_STATEMENT_TIMEOUT_MS: int = 600000  # scheduled jobs such as snapshot refreshes
+    DB_REQUEST_SCOPED_CONNECTION: bool = True  # one pooled connection per HTTP request
+    DB_STREAM_CHUNK_SIZE: int = 1000  # rows per cursor fetch for streamed exports
+
+    # Read replicas: comma-separated host or host:port, sharing the primary's credentials
+    DB_REPLICA_HOSTS: str = ""
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5.0
+    DB_REPLICA_CHECK_INTERVAL_SECONDS: float = 2.0
+
+    # Database statement caching
+    DB_STATEMENT_CACHE_SIZE: int = 512
+    DB_MAX_CACHEABLE_STATEMENT_SIZE: int = 64 * 1024
+
+    # Cache settings
+    USER_CACHE_MAXSIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: int = 60
+    PERMISSION_CACHE_MAXSIZE: int = 10000
+    PERMISSION_CACHE_TTL_SECONDS: int = 300
+    CACHE_VERSION_CHECK_SECONDS: float = 1.0
+    CACHE_INVALIDATION_ENABLED: bool = True
+
+    # Sprint backlog ranking
+    SPRINT_RANK_MAX_LENGTH: int = 24
+    SPRINT_RANK_REBALANCE_INTERVAL_SECONDS: int = 3600
+
+    # Analytics snapshots
+    ANALYTICS_REFRESH_INTERVAL_SECONDS: int = 300
+
+    # Notification delivery
+    NOTIFICATION_STREAMS_PER_READ: int = 1000
+    NOTIFICATION_READ_COUNT: int = 100
+    NOTIFICATION_BLOCK_MS: int = 5000
+    NOTIFICATION_SEND_QUEUE_SIZE: int = 256
+    NOTIFICATION_SLOW_CONSUMER_POLICY: str = "drop_oldest"  # drop_oldest, coalesce or disconnect
+    NOTIFICATION_SEND_TIMEOUT_SECONDS: float = 10.0
+    NOTIFICATION_ACK_FLUSH_INTERVAL_SECONDS: float = 0.5
+    NOTIFICATION_ACK_MAX_PENDING: int = 1000
+    NOTIFICATION_PRESENCE_HEARTBEAT_SECONDS: float = 15.0
+    NOTIFICATION_PRESENCE_TTL_SECONDS: float = 45.0
+    NOTIFICATION_OUTBOX_POLL_SECONDS: float = 0.2
+    NOTIFICATION_OUTBOX_BATCH_SIZE: int = 500
+    NOTIFICATION_SSE_KEEPALIVE_SECONDS: float = 15.0
+    NOTIFICATION_COALESCE_WINDOW_SECONDS: float = 5.0  # 0 disables coalescing
+    NOTIFICATION_COALESCE_FLUSH_SECONDS: float = 1.0
+    NOTIFICATION_DIGEST_INTERVAL_SECONDS: float = 900.0
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8"
     )
 
+    def get_replica_addresses(self) -> list[tuple[str, int]]:
+        addresses = []
+        for entry in filter(None, (part.strip() for part in self.DB_REPLICA_HOSTS.split(","))):
+            host, _, port = entry.partition(":")
+            addresses.append((host, int(port) if port else self.DB_PORT))
+        return addresses
+
     def get_redis_url(self) -> str:
         return f"redis://:{self.REDIS_PASSWORD}@{self.REDIS_HOST}:{self.REDIS_PORT}/{self.REDIS_DB}"
 
@@ -1,84 +1,467 @@
+import asyncio
+import re
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar, Token
+from datetime import datetime, timezone
+from typing import Optional
 import asyncpg
 from src.core.config import settings
+from src.core.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Server-side name prefix for statements prepared from the query registry
+STATEMENT_PREFIX = "prokoi_"
+
+# Per-request state (routing, bound connection, open transactions), set by
+# DatabaseSessionMiddleware or db.transaction(); None outside any scope
+_request_state: ContextVar[Optional[dict]] = ContextVar("db_request_state", default=None)
+
+# Replication lag of a standby, or 0 when it has replayed everything it received
+REPLICA_LAG_QUERY = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END AS lag_seconds
+"""
+
+# Errors after which a replica is skipped until its next health check
+REPLICA_ERRORS = (OSError, asyncpg.exceptions.PostgresConnectionError, asyncpg.exceptions.InterfaceError)
+
+# Upper bounds (ms) of the pool acquire-wait histogram buckets
+ACQUIRE_WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class PoolMetrics:
+    """Counters and an acquire-wait histogram for the connection pool"""
+
+    def __init__(self):
+        self.acquired = 0
+        self.timeouts = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.wait_ms_total = 0.0
+        self.wait_buckets = [0] * (len(ACQUIRE_WAIT_BUCKETS_MS) + 1)
+
+    def start_wait(self) -> float:
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        return time.perf_counter()
+
+    def end_wait(self, started: float, timed_out: bool = False) -> None:
+        self.waiting -= 1
+        if timed_out:
+            self.timeouts += 1
+            return
+        wait_ms = (time.perf_counter() - started) * 1000
+        self.acquired += 1
+        self.wait_ms_total += wait_ms
+        for index, bound in enumerate(ACQUIRE_WAIT_BUCKETS_MS):
+            if wait_ms <= bound:
+                self.wait_buckets[index] += 1
+                return
+        self.wait_buckets[-1] += 1
+
+    def histogram(self) -> dict:
+        """Cumulative counts per upper bound, Prometheus style"""
+        cumulative, buckets = 0, {}
+        for bound, count in zip([*map(str, ACQUIRE_WAIT_BUCKETS_MS), "+Inf"], self.wait_buckets):
+            cumulative += count
+            buckets[bound] = cumulative
+        return buckets
+
+
+class RegistryConnection(asyncpg.Connection):
+    """Connection that keeps the registry's statements prepared for its whole lifetime"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._registry_statements = {}
+        self._registry_generation = 0
+
+    async def registry_statement(self, name: str, query: str, refresh: bool = False):
+        statement = None if refresh else self._registry_statements.get(name)
+        if statement is None:
+            # A new generation avoids clashing with a server statement invalidated by a schema change
+            self._registry_generation += 1
+            statement = await self.prepare(query, name=f"{STATEMENT_PREFIX}{name}_{self._registry_generation}")
+            self._registry_statements[name] = statement
+        return statement
+
+
+class ReplicaPool:
+    """A read replica's pool, metrics and last measured replication lag"""
+
+    def __init__(self, host: str, port: int, pool):
+        self.host = host
+        self.port = port
+        self.pool = pool
+        self.metrics = PoolMetrics()
+        self.lag_seconds: Optional[float] = None
+        self.healthy = False
+
+
+# A WITH query writes when any of its parts is a data-modifying statement
+DATA_MODIFYING = re.compile(r"\b(insert|update|delete|merge)\b", re.IGNORECASE)
+
+
+def is_read_statement(query: str) -> bool:
+    """True for SELECTs and for WITH queries without a data-modifying part"""
+    head = query.lstrip().lower()
+    if head.startswith("select"):
+        return True
+    return head.startswith("with") and DATA_MODIFYING.search(head) is None
+
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """TIMESTAMP columns hold naive UTC, and asyncpg will not bind an aware datetime to them"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
 
 
 class Database:
     def __init__(self):
         self.pool = None
+        self.replicas: list[ReplicaPool] = []
+        self._next_replica = 0
+        self._queries: dict[str, str] = {}
+        self.metrics = PoolMetrics()
+        # statement_timeout per workload; requests get the pool default
+        self.statement_timeouts_ms = {
+            "request": settings.DB_STATEMENT_TIMEOUT_MS,
+            "background": settings.DB_BACKGROUND_STATEMENT_TIMEOUT_MS,
+        }
 
-    async def create_pool(self):
-        self.pool = await asyncpg.create_pool(
-            host=settings.DB_HOST,
+    async def _create_pool(self, host: str, port: int):
+        return await asyncpg.create_pool(
+            host=host,
             user=settings.DB_USER,
             password=settings.DB_PASSWORD,
-            port=settings.DB_PORT,
+            port=port,
             database=settings.DB_NAME,
-            ssl="require",
-            min_size=1,
-            max_size=10,
+            ssl=settings.SSL_MODE,
+            min_size=settings.DB_POOL_MIN_SIZE,
+            max_size=settings.DB_POOL_MAX_SIZE,
+            max_inactive_connection_lifetime=settings.DB_POOL_MAX_INACTIVE_CONNECTION_LIFETIME,
+            command_timeout=settings.DB_COMMAND_TIMEOUT_SECONDS or None,
+            server_settings={"statement_timeout": str(self.statement_timeouts_ms["request"])},
+            connection_class=RegistryConnection,
+            # Ad hoc queries are prepared once per connection through asyncpg's LRU cache
+            statement_cache_size=settings.DB_STATEMENT_CACHE_SIZE,
+            max_cacheable_statement_size=settings.DB_MAX_CACHEABLE_STATEMENT_SIZE,
         )
 
-    async def get_connection(self):
-        if self.pool is None:
-            raise RuntimeError("Pool not initialized. Call create_pool() first.")
-        return await self.pool.acquire()
+    async def create_pool(self):
+        self.pool = await self._create_pool(settings.DB_HOST, settings.DB_PORT)
+        for host, port in settings.get_replica_addresses():
+            try:
+                self.replicas.append(ReplicaPool(host, port, await self._create_pool(host, port)))
+            except Exception as e:
+                # Reads fall back to the primary; a missing replica must not block startup
+                logger.warning(f"Skipping read replica {host}:{port}: {e}")
+        if self.replicas:
+            await self.check_replicas()
 
-    async def release_connection(self, conn):
-        if self.pool is None:
-            raise RuntimeError("Pool not initialized.")
-        await self.pool.release(conn)
+    def register(self, name: str, query: str) -> str:
+        """Add a hot statement to the registry; it is prepared once per connection on first use"""
+        existing = self._queries.get(name)
+        if existing is not None and existing != query:
+            raise ValueError(f"Query {name} is already registered with different SQL")
+        self._queries[name] = query
+        return name
 
-    async def execute_query(self, query: str, params=None):
-        conn = await self.get_connection()
+    def begin_request(self) -> Token:
+        """Start a request scope; reads stay on the primary once the request has written"""
+        return _request_state.set({"wrote": False, "conn": None, "transactions": 0})
+
+    async def end_request(self, token: Token) -> None:
         try:
-            result = await conn.fetch(query, *params) if params else await conn.fetch(query)
-            return [dict(record) for record in result]
+            await self.release_request_connection()
         finally:
-            await self.release_connection(conn)
+            _request_state.reset(token)
 
-    async def execute_insert(self, query: str, params=None):
-        conn = await self.get_connection()
+    async def release_request_connection(self) -> None:
+        """Give the request's bound connection back to the pool early, e.g. before a long stream"""
+        state = _request_state.get()
+        if state is None or state["conn"] is None:
+            return
+        if state["transactions"]:
+            raise RuntimeError("Cannot release the request connection inside a transaction")
+        conn, state["conn"] = state["conn"], None
+        await self.release_connection(conn)
+
+    async def _checkout(self, bind: bool = False):
+        """Return (connection, release_after_use); inside a request scope the connection is shared"""
+        state = _request_state.get()
+        if state is not None and (state["conn"] is not None or bind or settings.DB_REQUEST_SCOPED_CONNECTION):
+            if state["conn"] is None:
+                state["conn"] = await self.get_connection()
+            return state["conn"], False
+        return await self.get_connection(), True
+
+    @asynccontextmanager
+    async def transaction(self):
+        """Unit of work: every db call inside the block shares one connection and commits or rolls back together
+
+        Nested blocks (and transactions opened on db.connection()) become savepoints.
+        Outside a request a scope is opened for the block. The bound connection must
+        not be used concurrently, so do not gather db calls inside the block.
+        """
+        if _request_state.get() is None:
+            token = self.begin_request()
+            try:
+                async with self.transaction() as conn:
+                    yield conn
+            finally:
+                await self.end_request(token)
+            return
+
+        self._mark_write()
+        state = _request_state.get()
+        conn, _ = await self._checkout(bind=True)
+        state["transactions"] += 1
         try:
-            row = await conn.fetchrow(query, *params) if params else await conn.fetchrow(query)
-            # Return PostgreSQL generated id if available
-            print(row)
-            return row["id"] if row and "id" in row else None
+            async with conn.transaction():
+                yield conn
         finally:
-            await self.release_connection(conn)
+            state["transactions"] -= 1
 
-    async def execute_update(self, query: str, params=None):
-        conn = await self.get_connection()
+    def _mark_write(self) -> None:
+        state = _request_state.get()
+        if state is not None:
+            state["wrote"] = True
+
+    def _read_replica(self) -> Optional[ReplicaPool]:
+        """Next healthy replica in turn, or None when reads must use the primary"""
+        state = _request_state.get()
+        if state is not None and (state["wrote"] or state["transactions"]):
+            return None
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        self._next_replica = (self._next_replica + 1) % len(healthy)
+        return healthy[self._next_replica]
+
+    async def check_replicas(self) -> None:
+        """Measure each replica's lag; lagging or unreachable replicas stop receiving reads"""
+        for replica in self.replicas:
+            try:
+                async with replica.pool.acquire(timeout=settings.DB_POOL_ACQUIRE_TIMEOUT_SECONDS or None) as conn:
+                    replica.lag_seconds = float(await conn.fetchval(REPLICA_LAG_QUERY))
+                replica.healthy = replica.lag_seconds <= settings.DB_REPLICA_MAX_LAG_SECONDS
+            except Exception as e:
+                logger.warning(f"Read replica {replica.host}:{replica.port} health check failed: {e}")
+                replica.lag_seconds = None
+                replica.healthy = False
+
+    async def _acquire(self, pool, metrics: PoolMetrics):
+        timeout = settings.DB_POOL_ACQUIRE_TIMEOUT_SECONDS or None
+        started = metrics.start_wait()
         try:
-            result = await conn.execute(query, *params) if params else await conn.execute(query)
-            # result looks like 'UPDATE <number>'
-            return int(result.split()[-1])
-        finally:
-            await self.release_connection(conn)
+            conn = await pool.acquire(timeout=timeout)
+        except asyncio.TimeoutError:
+            metrics.end_wait(started, timed_out=True)
+            raise TimeoutError(f"No database connection available within {timeout}s") from None
+        except BaseException:
+            metrics.waiting -= 1
+            raise
+        metrics.end_wait(started)
+        return conn
+
+    async def get_connection(self):
+        if self.pool is None:
+            raise RuntimeError("Pool not initialized. Call create_pool() first.")
+        return await self._acquire(self.pool, self.metrics)
+
+    async def release_connection(self, conn):
+        if self.pool is None:
+            raise RuntimeError("Pool not initialized.")
+        await self.pool.release(conn)
 
-    async def connection(self):
-        conn = await self.get_connection()
+    async def _run(self, operation, read_only: bool = False):
+        """Run operation(conn) on a replica when read_only allows it, otherwise on the primary"""
+        replica = self._read_replica() if read_only else None
+        if replica is not None:
+            try:
+                conn = await self._acquire(replica.pool, replica.metrics)
+            except TimeoutError:
+                # Replica pool exhausted: borrow the primary without marking the replica down
+                conn = None
+            except REPLICA_ERRORS as e:
+                logger.warning(f"Read replica {replica.host}:{replica.port} unreachable, using the primary: {e}")
+                replica.healthy = False
+                conn = None
+            if conn is not None:
+                try:
+                    return await operation(conn)
+                except TimeoutError:
+                    # A slow statement, not a broken replica (TimeoutError is an OSError)
+                    raise
+                except REPLICA_ERRORS as e:
+                    logger.warning(f"Read replica {replica.host}:{replica.port} failed, using the primary: {e}")
+                    replica.healthy = False
+                finally:
+                    await replica.pool.release(conn)
+        conn, release = await self._checkout()
         try:
-            yield conn
+            return await operation(conn)
         finally:
-            await self.release_connection(conn)
+            if release:
+                await self.release_connection(conn)
 
-    async def close(self):
-        if self.pool:
-            await self.pool.close()
+    async def execute_query(self, query: str, params=None, read_only: bool = False):
+        """Fetch rows as dicts; read_only queries may be served by a replica and never pin the primary"""
+        if not read_only and not is_read_statement(query):
+            self._mark_write()
+        result = await self._run(
+            lambda conn: conn.fetch(query, *params) if params else conn.fetch(query), read_only
+        )
+        return [dict(record) for record in result]
 
+    async def fetch_records(self, query: str, params=None, read_only: bool = False) -> list[asyncpg.Record]:
+        """Like execute_query but returns the asyncpg Records without copying them into dicts"""
+        if not read_only and not is_read_statement(query):
+            self._mark_write()
+        return await self._run(
+            lambda conn: conn.fetch(query, *params) if params else conn.fetch(query), read_only
+        )
 
-db = Database()
+    async def fetch_prepared(self, name: str, params=None, read_only: bool = False) -> list[asyncpg.Record]:
+        """Run a registered statement and return its Records"""
+        query = self._queries.get(name)
+        if query is None:
+            raise KeyError(f"Query {name} is not registered")
+        if not read_only and not is_read_statement(query):
+            self._mark_write()
+        params = params or ()
 
+        async def fetch(conn):
+            statement = await conn.registry_statement(name, query)
+            try:
+                return await statement.fetch(*params)
+            except (asyncpg.exceptions.InvalidCachedStatementError, asyncpg.exceptions.OutdatedSchemaCacheError):
+                # The schema changed under the statement: prepare it again once
+                statement = await conn.registry_statement(name, query, refresh=True)
+                return await statement.fetch(*params)
 
+        return await self._run(fetch, read_only)
 
+    async def fetchrow_prepared(self, name: str, params=None, read_only: bool = False) -> asyncpg.Record | None:
+        rows = await self.fetch_prepared(name, params, read_only)
+        return rows[0] if rows else None
 
+    async def stream(self, query: str, params=None, chunk_size: Optional[int] = None, read_only: bool = False):
+        """Yield rows in chunks from a server-side cursor so memory stays flat for any result size
 
+        The cursor runs in a read-only REPEATABLE READ transaction on a connection of its
+        own (a replica when read_only allows it), held until the generator finishes or is
+        closed.
+        """
+        if not is_read_statement(query):
+            raise ValueError("Only read statements can be streamed")
+        chunk_size = chunk_size or settings.DB_STREAM_CHUNK_SIZE
+        pool, metrics, conn = self.pool, self.metrics, None
+        replica = self._read_replica() if read_only else None
+        if replica is not None:
+            try:
+                conn = await self._acquire(replica.pool, replica.metrics)
+                pool = replica.pool
+            except TimeoutError:
+                pass
+            except REPLICA_ERRORS as e:
+                logger.warning(f"Read replica {replica.host}:{replica.port} unreachable, using the primary: {e}")
+                replica.healthy = False
+        if conn is None:
+            conn = await self._acquire(pool, metrics)
+        try:
+            async with conn.transaction(isolation="repeatable_read", readonly=True):
+                cursor = await conn.cursor(query, *(params or ()))
+                while True:
+                    rows = await cursor.fetch(chunk_size)
+                    if rows:
+                        yield rows
+                    if len(rows) < chunk_size:
+                        return
+        finally:
+            await pool.release(conn)
 
+    async def execute_insert(self, query: str, params=None):
+        self._mark_write()
+        row = await self._run(lambda conn: conn.fetchrow(query, *params) if params else conn.fetchrow(query))
+        # Return PostgreSQL generated id if available
+        return row["id"] if row and "id" in row else None
 
+    async def execute_update(self, query: str, params=None):
+        self._mark_write()
+        result = await self._run(lambda conn: conn.execute(query, *params) if params else conn.execute(query))
+        # result looks like 'UPDATE <number>'
+        return int(result.split()[-1])
 
+    def command_timeout(self, role: str = "request") -> float | None:
+        """Client-side timeout (s) matching a role's statement_timeout, for long statements"""
+        timeout_ms = self.statement_timeouts_ms[role]
+        return timeout_ms / 1000 + 5 if timeout_ms else None
 
+    async def connection(self, role: str = "request"):
+        # Explicit connections are used for transactions, so they always count as writes
+        self._mark_write()
+        if role == "request":
+            conn, release = await self._checkout()
+        else:
+            # Other roles get a pool connection of their own, even inside a request, so
+            # their statement_timeout never leaks onto the request's shared connection
+            conn, release = await self.get_connection(), True
+        try:
+            if role != "request":
+                # Session setting; the pool's RESET ALL on release restores the default
+                await conn.execute(f"SET statement_timeout = {int(self.statement_timeouts_ms[role])}")
+            yield conn
+        finally:
+            if release:
+                await self.release_connection(conn)
 
+    def _pool_stats(self, pool, metrics: PoolMetrics) -> dict:
+        stats = {
+            "min_size": settings.DB_POOL_MIN_SIZE,
+            "max_size": settings.DB_POOL_MAX_SIZE,
+            "size": 0,
+            "idle": 0,
+            "in_use": 0,
+            "waiting": metrics.waiting,
+            "max_waiting": metrics.max_waiting,
+            "acquired": metrics.acquired,
+            "acquire_timeouts": metrics.timeouts,
+            "acquire_wait_ms_total": round(metrics.wait_ms_total, 3),
+            "acquire_wait_ms_buckets": metrics.histogram(),
+        }
+        if pool is not None:
+            stats["size"] = pool.get_size()
+            stats["idle"] = pool.get_idle_size()
+            stats["in_use"] = stats["size"] - stats["idle"]
+        return stats
 
+    def pool_stats(self) -> dict:
+        """Pool size, usage and acquire-wait metrics for the primary and every replica"""
+        stats = self._pool_stats(self.pool, self.metrics)
+        stats["replicas"] = [
+            {
+                "host": f"{replica.host}:{replica.port}",
+                "healthy": replica.healthy,
+                "lag_seconds": replica.lag_seconds,
+                **self._pool_stats(replica.pool, replica.metrics),
+            }
+            for replica in self.replicas
+        ]
+        return stats
 
+    async def close(self):
+        if self.pool:
+            await self.pool.close()
+        for replica in self.replicas:
+            await replica.pool.close()
 
 
+db = Database()
@@ -0,0 +1,63 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import AsyncIterator, Sequence
+
+from fastapi.responses import StreamingResponse
+
+from src.core.database import db
+
+# Formats accepted by the export endpoints, with their media types
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+EXPORT_FORMAT_PATTERN = "^(ndjson|csv)$"
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+async def ndjson_chunks(chunks: AsyncIterator[Sequence]) -> AsyncIterator[str]:
+    """One JSON object per line, one string per fetched chunk"""
+    async for rows in chunks:
+        yield "".join(
+            json.dumps(dict(row), default=_json_default, separators=(",", ":")) + "\n" for row in rows
+        )
+
+
+async def csv_chunks(chunks: AsyncIterator[Sequence]) -> AsyncIterator[str]:
+    """CSV with a header taken from the first row's columns"""
+    header_written = False
+    async for rows in chunks:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if not header_written:
+            writer.writerow(rows[0].keys())
+            header_written = True
+        writer.writerows(
+            [value.isoformat() if isinstance(value, (datetime, date)) else value for value in row.values()]
+            for row in rows
+        )
+        yield buffer.getvalue()
+
+
+async def export_response(chunks: AsyncIterator[Sequence], export_format: str, filename: str) -> StreamingResponse:
+    """Stream row chunks from db.stream as an NDJSON or CSV download"""
+    if export_format not in EXPORT_MEDIA_TYPES:
+        raise ValueError(f"Unsupported export format: {export_format}")
+    body = ndjson_chunks(chunks) if export_format == "ndjson" else csv_chunks(chunks)
+    # The stream uses its own connection; do not hold the request's while it runs
+    await db.release_request_connection()
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'},
+    )
@@ -0,0 +1,47 @@
+from typing import List, Optional
+
+# Ranks are strings over this alphabet compared byte-wise (COLLATE "C"), read as
+# base-36 fractions. Generated ranks never end in "0", so there is always room
+# for another rank between any two of them.
+ALPHABET = "0123456789abcdefghijklmnopqrstuvwxyz"
+BASE = len(ALPHABET)
+
+
+def _digit(rank: str, index: int) -> int:
+    return ALPHABET.index(rank[index]) if index < len(rank) else 0
+
+
+def rank_between(before: Optional[str], after: Optional[str]) -> str:
+    """Return a rank strictly between before and after; None means an open end"""
+    before = before or ""
+    if after is not None and before >= after:
+        raise ValueError(f"Rank {before!r} must sort before {after!r}")
+
+    result = []
+    index = 0
+    while True:
+        low = _digit(before, index)
+        high = _digit(after, index) if after is not None else BASE
+        if high - low > 1:
+            result.append(ALPHABET[(low + high) // 2])
+            return "".join(result)
+
+        result.append(ALPHABET[low])
+        if high - low == 1:
+            # Anything longer than this prefix already sorts before `after`
+            after = None
+        index += 1
+
+
+def ranks_between(before: Optional[str], after: Optional[str], count: int) -> List[str]:
+    """Return count ascending ranks between before and after, bisecting to keep them short"""
+    if count <= 0:
+        return []
+
+    middle = rank_between(before, after)
+    left = count // 2
+    return (
+        ranks_between(before, middle, left)
+        + [middle]
+        + ranks_between(middle, after, count - left - 1)
+    )
@@ -0,0 +1,34 @@
+import base64
+from datetime import datetime
+from typing import Any, Optional, Sequence, Tuple
+
+DEFAULT_PAGE_SIZE: int = 50
+MAX_PAGE_SIZE: int = 200
+
+
+def encode_cursor(sort_value: datetime, row_id: int) -> str:
+    """Encode the last row's (timestamp, id) sort key as an opaque cursor"""
+    raw = f"{sort_value.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor produced by encode_cursor, raising ValueError if it is malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        sort_value, row_id = raw.split("|", 1)
+        return datetime.fromisoformat(sort_value), int(row_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def keyset_page(rows: Sequence[Any], limit: int, sort_key: str = "created_at",
+                id_key: str = "id") -> Tuple[list, Optional[str]]:
+    """Split a limit + 1 fetch into the page rows and the cursor for the next page"""
+    if len(rows) <= limit:
+        return list(rows), None
+
+    page = list(rows[:limit])
+    last = page[-1]
+    return page, encode_cursor(last[sort_key], last[id_key])
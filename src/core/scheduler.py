@@ -0,0 +1,18 @@
+import asyncio
+from typing import Awaitable, Callable
+
+from src.core.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+async def run_periodically(job: Callable[[], Awaitable], interval_seconds: float, name: str) -> None:
+    """Run job every interval_seconds until cancelled, logging and surviving failures"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await job()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Periodic job {name} failed: {e}")
@@ -1,21 +1,42 @@
 from fastapi import HTTPException, Request, Depends
-from src.repositories.RolesRepository import RolesRepository
+from src.core.cache import TTLCache, get_version, register_cache
+from src.core.config import settings
+from src.repositories.RolesRepository import RolesRepository, PERMISSIONS_CACHE
 
 rolesRepo = RolesRepository()
 
+# user_id -> (permissions version, frozenset of permission names)
+permission_cache = register_cache(
+    PERMISSIONS_CACHE,
+    TTLCache(maxsize=settings.PERMISSION_CACHE_MAXSIZE, ttl=settings.PERMISSION_CACHE_TTL_SECONDS),
+)
+
+
+async def get_user_permissions(user_id: int) -> frozenset[str]:
+    """Return the user's effective permission names, loading them once per permissions version"""
+    version = await get_version(PERMISSIONS_CACHE)
+    entry = permission_cache.get(user_id)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+
+    permissions = frozenset(await rolesRepo.get_user_permission_names(user_id))
+    permission_cache.set(user_id, (version, permissions))
+    return permissions
+
 
 def require_permissions(permissions: list[str]):
     """Create a dependency that checks user permissions"""
+    required = frozenset(permissions)
 
     async def check_permissions(request: Request):
         user = getattr(request.state, "user", None)
         if not user:
             raise HTTPException(status_code=401, detail="Not authenticated")
 
-        has_permission = await rolesRepo.is_permission(user["id"], permissions)
-        if not has_permission:
+        user_permissions = await get_user_permissions(user["id"])
+        if required.isdisjoint(user_permissions):
             raise HTTPException(status_code=403, detail="Insufficient permissions")
 
         return user
 
-    return check_permissions
\ No newline at end of file
+    return check_permissions
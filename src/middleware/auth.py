@@ -2,13 +2,23 @@ from typing import Callable, Awaitable
 from fastapi import Request
 from fastapi.responses import JSONResponse
 from jose import JWTError, jwt
+from src.core.cache import TTLCache, register_cache
 from src.core.config import settings
 from src.repositories.users import UserRepository
-import pprint
+
+# Authenticated users keyed by JWT subject (email); only identity fields, never the password hash
+user_cache = register_cache(
+    "users",
+    TTLCache(maxsize=settings.USER_CACHE_MAXSIZE, ttl=settings.USER_CACHE_TTL_SECONDS),
+)
+CACHED_USER_FIELDS = ("id", "name", "email")
+
+
 class AuthMiddleware:
     def __init__(self, app, allow_paths: list[str] | None = None):
         self.app = app
         self.allow_paths = set(allow_paths or [])
+        self.user_repo = UserRepository()
 
     async def __call__(self, scope, receive, send):
         if scope["type"] != "http":
@@ -22,7 +32,6 @@ class AuthMiddleware:
             return await self.app(scope, receive, send)
 
         auth = request.headers.get("authorization", "")
-        print(auth)
         if not auth.startswith("Bearer "):
             return await JSONResponse({"detail": "Not authenticated"}, status_code=401)(scope, receive, send)
 
@@ -35,15 +44,18 @@ class AuthMiddleware:
         except JWTError:
             return await JSONResponse({"detail": "Invalid token"}, status_code=401)(scope, receive, send)
 
-        # Load user
-        repo = UserRepository()
-        user = await repo.find_user_by_email(email)
-        if not user:
-            return await JSONResponse({"(detail": "User not found"}, status_code=401)(scope, receive, send)
+        # Load user, hitting the database only on a cache miss
+        user = user_cache.get(email)
+        if user is None:
+            row = await self.user_repo.find_user_by_email(email)
+            if not row:
+                return await JSONResponse({"(detail": "User not found"}, status_code=401)(scope, receive, send)
+            user = {field: row[field] for field in CACHED_USER_FIELDS}
+            user_cache.set(email, user)
 
         # Attach user to request.state for downstream handlers
         scope.setdefault("state", {})
-        request.state.user = user
+        request.state.user = dict(user)
 
 
         return await self.app(scope, receive, send)
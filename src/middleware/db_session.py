@@ -0,0 +1,18 @@
+from src.core.database import db
+
+
+class DatabaseSessionMiddleware:
+    """Gives every HTTP request its own database scope: routing state and one shared connection"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        token = db.begin_request()
+        try:
+            return await self.app(scope, receive, send)
+        finally:
+            await db.end_request(token)
@@ -0,0 +1,5 @@
+-- Keyset (cursor) pagination for issue listings (PostgreSQL)
+-- Listings order by (created_at, id) DESC and seek with (created_at, id) < (cursor)
+CREATE INDEX IF NOT EXISTS idx_issues_project_created_id ON issues (project_id, created_at DESC, id DESC);
+-- Assigned-issue listings order by (assigned_at, issue_id) DESC per assignee
+CREATE INDEX IF NOT EXISTS idx_issue_assignments_assignee_assigned_at ON issue_assignments (assigned_to, assigned_at DESC, issue_id DESC);
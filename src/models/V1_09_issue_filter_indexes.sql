@@ -0,0 +1,9 @@
+-- Composite indexes for SQL-side issue filtering (PostgreSQL)
+-- Each equality filter leads with project_id and keeps the (created_at, id) keyset order
+CREATE INDEX IF NOT EXISTS idx_issues_project_status_created_id ON issues (project_id, status, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_issues_project_priority_created_id ON issues (project_id, priority, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_issues_project_type_created_id ON issues (project_id, type_id, created_at DESC, id DESC);
+-- EXISTS probes on link tables look up by (filter value, issue_id)
+CREATE INDEX IF NOT EXISTS idx_issue_assignments_issue_assignee ON issue_assignments (issue_id, assigned_to);
+CREATE INDEX IF NOT EXISTS idx_issue_labels_label_issue ON issue_labels (label_id, issue_id);
+CREATE INDEX IF NOT EXISTS idx_issue_sprints_sprint_issue ON issue_sprints (sprint_id, issue_id);
@@ -0,0 +1,16 @@
+-- Fractional (LexoRank-style) ordering for sprint backlogs (PostgreSQL)
+-- Ranks are base-36 strings compared byte-wise, so the column uses the "C" collation
+ALTER TABLE issue_sprints ADD COLUMN IF NOT EXISTS rank VARCHAR(64) COLLATE "C";
+-- Backfill from the old added_at order; hex digits are a prefix of the rank alphabet
+UPDATE issue_sprints iss
+SET rank = ordered.rank
+FROM (
+        SELECT issue_id,
+            sprint_id,
+            lpad(to_hex(row_number() OVER (PARTITION BY sprint_id ORDER BY added_at, issue_id)), 7, '0') || 'i' AS rank
+        FROM issue_sprints
+    ) ordered
+WHERE iss.issue_id = ordered.issue_id
+    AND iss.sprint_id = ordered.sprint_id
+    AND iss.rank IS NULL;
+CREATE INDEX IF NOT EXISTS idx_issue_sprints_sprint_rank ON issue_sprints (sprint_id, rank);
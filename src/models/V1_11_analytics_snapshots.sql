@@ -0,0 +1,140 @@
+-- Materialized analytics snapshots (PostgreSQL)
+-- Dashboards read these instead of aggregating live OLTP tables on every request.
+-- Each view carries computed_at and a unique index so it can be refreshed with
+-- REFRESH MATERIALIZED VIEW CONCURRENTLY (see AnalysisRepository.refresh_snapshots).
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_project_analytics AS
+SELECT p.id AS project_id,
+    p.workspace_id,
+    w.organization_id,
+    p.name AS project_name,
+    w.name AS workspace_name,
+    o.name AS organization_name,
+    COUNT(DISTINCT i.id) AS total_issues,
+    COUNT(DISTINCT CASE WHEN i.status = 'open' THEN i.id END) AS open_issues,
+    COUNT(DISTINCT CASE WHEN i.status = 'in-progress' THEN i.id END) AS in_progress_issues,
+    COUNT(DISTINCT CASE WHEN i.status = 'completed' THEN i.id END) AS completed_issues,
+    AVG(i.story_points) AS avg_story_points,
+    SUM(i.story_points) AS total_story_points,
+    COUNT(DISTINCT i.created_by) AS contributors,
+    COUNT(DISTINCT ic.id) AS total_comments,
+    EXTRACT(DAY FROM (NOW() - p.created_at)) AS project_age_days,
+    CASE
+        WHEN COUNT(DISTINCT i.id) = 0 THEN 0
+        ELSE (COUNT(DISTINCT CASE WHEN i.status = 'completed' THEN i.id END) * 100.0 / COUNT(DISTINCT i.id))
+    END AS completion_percentage,
+    NOW() AS computed_at
+FROM projects p
+    JOIN workspaces w ON p.workspace_id = w.id
+    JOIN organizations o ON w.organization_id = o.id
+    LEFT JOIN issues i ON p.id = i.project_id
+    LEFT JOIN issue_comments ic ON i.id = ic.issue_id
+WHERE p.status = 'active'
+GROUP BY p.id, p.workspace_id, w.organization_id, p.name, w.name, o.name, p.created_at;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_mv_project_analytics ON mv_project_analytics (project_id);
+CREATE INDEX IF NOT EXISTS idx_mv_project_analytics_org ON mv_project_analytics (organization_id);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_user_performance AS
+SELECT u.id AS user_id,
+    o.id AS organization_id,
+    u.name AS user_name,
+    u.email,
+    o.name AS organization_name,
+    COUNT(DISTINCT ia.issue_id) AS assigned_issues,
+    COUNT(DISTINCT CASE WHEN i.status = 'completed' THEN ia.issue_id END) AS completed_issues,
+    COUNT(DISTINCT CASE WHEN i.status = 'open' THEN ia.issue_id END) AS open_issues,
+    SUM(i.story_points) AS total_story_points_assigned,
+    SUM(CASE WHEN i.status = 'completed' THEN i.story_points ELSE 0 END) AS completed_story_points,
+    AVG(i.story_points) AS avg_story_points_per_issue,
+    COUNT(DISTINCT ic.id) AS comments_made,
+    COUNT(DISTINCT ih.id) AS activities_logged,
+    uc.weekly_hours,
+    SUM(uw.hours_spent) AS total_hours_spent,
+    CASE
+        WHEN COUNT(DISTINCT ia.issue_id) = 0 THEN 0
+        ELSE (COUNT(DISTINCT CASE WHEN i.status = 'completed' THEN ia.issue_id END) * 100.0 / COUNT(DISTINCT ia.issue_id))
+    END AS completion_rate,
+    EXTRACT(DAY FROM (NOW() - u.created_at)) AS days_since_joined,
+    NOW() AS computed_at
+FROM users u
+    JOIN organization_users ou ON u.id = ou.user_id
+    JOIN organizations o ON ou.organization_id = o.id
+    LEFT JOIN issue_assignments ia ON u.id = ia.assigned_to
+    LEFT JOIN issues i ON ia.issue_id = i.id
+    LEFT JOIN issue_comments ic ON u.id = ic.user_id
+    LEFT JOIN issue_history ih ON u.id = ih.user_id
+    LEFT JOIN user_capacity uc ON u.id = uc.user_id AND o.id = uc.organization_id
+    LEFT JOIN user_workload uw ON ia.id = uw.issue_assignments_id
+GROUP BY u.id, o.id, u.name, u.email, o.name, uc.weekly_hours, u.created_at;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_mv_user_performance ON mv_user_performance (user_id, organization_id);
+CREATE INDEX IF NOT EXISTS idx_mv_user_performance_org ON mv_user_performance (organization_id);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_sprint_velocity AS
+SELECT s.id AS sprint_id,
+    s.project_id,
+    p.workspace_id,
+    w.organization_id,
+    s.name AS sprint_name,
+    p.name AS project_name,
+    s.start_date,
+    s.end_date,
+    s.status,
+    s.velocity_target,
+    COUNT(DISTINCT iss.issue_id) AS issues_in_sprint,
+    SUM(i.story_points) AS total_story_points,
+    COUNT(DISTINCT CASE WHEN i.status = 'completed' THEN iss.issue_id END) AS completed_issues,
+    SUM(CASE WHEN i.status = 'completed' THEN i.story_points ELSE 0 END) AS completed_story_points,
+    AVG(tv.avg_hours_per_point) AS avg_hours_per_point,
+    CASE
+        WHEN s.velocity_target > 0 THEN (SUM(CASE WHEN i.status = 'completed' THEN i.story_points ELSE 0 END) * 100.0 / s.velocity_target)
+        ELSE 0
+    END AS velocity_achievement_percentage,
+    (s.end_date - s.start_date) AS sprint_duration_days,
+    CASE
+        WHEN s.end_date < CURRENT_DATE THEN 'completed'
+        WHEN s.start_date <= CURRENT_DATE AND s.end_date >= CURRENT_DATE THEN 'active'
+        ELSE 'upcoming'
+    END AS sprint_status,
+    NOW() AS computed_at
+FROM sprints s
+    JOIN projects p ON s.project_id = p.id
+    JOIN workspaces w ON p.workspace_id = w.id
+    LEFT JOIN issue_sprints iss ON s.id = iss.sprint_id
+    LEFT JOIN issues i ON iss.issue_id = i.id
+    LEFT JOIN team_velocity tv ON s.project_id = tv.project_id
+GROUP BY s.id, s.project_id, p.workspace_id, w.organization_id, s.name, p.name,
+    s.start_date, s.end_date, s.status, s.velocity_target;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_mv_sprint_velocity ON mv_sprint_velocity (sprint_id);
+CREATE INDEX IF NOT EXISTS idx_mv_sprint_velocity_org ON mv_sprint_velocity (organization_id);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_team_performance AS
+SELECT t.id AS team_id,
+    t.organization_id,
+    t.name AS team_name,
+    o.name AS organization_name,
+    COUNT(DISTINCT ut.user_id) AS team_members,
+    COUNT(DISTINCT tw.workspace_id) AS workspaces_assigned,
+    COUNT(DISTINCT pt.project_id) AS projects_assigned,
+    COUNT(DISTINCT i.id) AS total_issues_worked,
+    SUM(i.story_points) AS total_story_points_worked,
+    AVG(tv.avg_hours_per_point) AS team_velocity,
+    COUNT(DISTINCT ic.id) AS team_comments,
+    COUNT(DISTINCT ih.id) AS team_activities,
+    AVG(EXTRACT(HOUR FROM (i.updated_at - i.created_at))) AS avg_issue_resolution_time,
+    COUNT(DISTINCT CASE WHEN i.status = 'completed' THEN i.id END) AS completed_issues,
+    CASE
+        WHEN COUNT(DISTINCT i.id) = 0 THEN 0
+        ELSE (COUNT(DISTINCT CASE WHEN i.status = 'completed' THEN i.id END) * 100.0 / COUNT(DISTINCT i.id))
+    END AS team_completion_rate,
+    NOW() AS computed_at
+FROM teams t
+    JOIN organizations o ON t.organization_id = o.id
+    LEFT JOIN user_team ut ON t.id = ut.team_id
+    LEFT JOIN team_workspaces tw ON t.id = tw.team_id
+    LEFT JOIN project_teams pt ON t.id = pt.team_id
+    LEFT JOIN issues i ON pt.project_id = i.project_id
+    LEFT JOIN team_velocity tv ON t.id = tv.team_id
+    LEFT JOIN issue_comments ic ON i.id = ic.issue_id
+    LEFT JOIN issue_history ih ON i.id = ih.issue_id
+GROUP BY t.id, t.organization_id, t.name, o.name;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_mv_team_performance ON mv_team_performance (team_id);
+CREATE INDEX IF NOT EXISTS idx_mv_team_performance_org ON mv_team_performance (organization_id);
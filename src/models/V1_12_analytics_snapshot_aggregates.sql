@@ -0,0 +1,264 @@
+-- Rebuild analytics snapshots from per-dimension aggregates (PostgreSQL)
+-- V1_11 grouped one wide join of issues x comments x history x velocity rows, so
+-- intermediate row counts multiplied and SUM/AVG were inflated by the fan-out.
+-- Each dimension is now aggregated on its own and joined back on its key.
+-- avg_issue_resolution_time is now total hours (EXTRACT(EPOCH) / 3600) rather than
+-- the hour component of the interval.
+DROP MATERIALIZED VIEW IF EXISTS mv_project_analytics;
+DROP MATERIALIZED VIEW IF EXISTS mv_user_performance;
+DROP MATERIALIZED VIEW IF EXISTS mv_sprint_velocity;
+DROP MATERIALIZED VIEW IF EXISTS mv_team_performance;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_project_analytics AS
+WITH issue_stats AS (
+    SELECT i.project_id,
+        COUNT(*) AS total_issues,
+        COUNT(*) FILTER (WHERE i.status = 'open') AS open_issues,
+        COUNT(*) FILTER (WHERE i.status = 'in-progress') AS in_progress_issues,
+        COUNT(*) FILTER (WHERE i.status = 'completed') AS completed_issues,
+        AVG(i.story_points) AS avg_story_points,
+        SUM(i.story_points) AS total_story_points,
+        COUNT(DISTINCT i.created_by) AS contributors
+    FROM issues i
+    GROUP BY i.project_id
+),
+comment_stats AS (
+    SELECT i.project_id, COUNT(*) AS total_comments
+    FROM issue_comments ic
+        JOIN issues i ON ic.issue_id = i.id
+    GROUP BY i.project_id
+)
+SELECT p.id AS project_id,
+    p.workspace_id,
+    w.organization_id,
+    p.name AS project_name,
+    w.name AS workspace_name,
+    o.name AS organization_name,
+    COALESCE(ist.total_issues, 0) AS total_issues,
+    COALESCE(ist.open_issues, 0) AS open_issues,
+    COALESCE(ist.in_progress_issues, 0) AS in_progress_issues,
+    COALESCE(ist.completed_issues, 0) AS completed_issues,
+    ist.avg_story_points,
+    ist.total_story_points,
+    COALESCE(ist.contributors, 0) AS contributors,
+    COALESCE(cs.total_comments, 0) AS total_comments,
+    EXTRACT(DAY FROM (NOW() - p.created_at)) AS project_age_days,
+    CASE
+        WHEN COALESCE(ist.total_issues, 0) = 0 THEN 0
+        ELSE ist.completed_issues * 100.0 / ist.total_issues
+    END AS completion_percentage,
+    NOW() AS computed_at
+FROM projects p
+    JOIN workspaces w ON p.workspace_id = w.id
+    JOIN organizations o ON w.organization_id = o.id
+    LEFT JOIN issue_stats ist ON ist.project_id = p.id
+    LEFT JOIN comment_stats cs ON cs.project_id = p.id
+WHERE p.status = 'active';
+CREATE UNIQUE INDEX IF NOT EXISTS uq_mv_project_analytics ON mv_project_analytics (project_id);
+CREATE INDEX IF NOT EXISTS idx_mv_project_analytics_org ON mv_project_analytics (organization_id);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_user_performance AS
+WITH assigned AS (
+    SELECT DISTINCT ia.assigned_to AS user_id, i.id AS issue_id, i.status, i.story_points
+    FROM issue_assignments ia
+        JOIN issues i ON ia.issue_id = i.id
+),
+assignment_stats AS (
+    SELECT a.user_id,
+        COUNT(*) AS assigned_issues,
+        COUNT(*) FILTER (WHERE a.status = 'completed') AS completed_issues,
+        COUNT(*) FILTER (WHERE a.status = 'open') AS open_issues,
+        SUM(a.story_points) AS total_story_points_assigned,
+        SUM(a.story_points) FILTER (WHERE a.status = 'completed') AS completed_story_points,
+        AVG(a.story_points) AS avg_story_points_per_issue
+    FROM assigned a
+    GROUP BY a.user_id
+),
+hours_stats AS (
+    SELECT ia.assigned_to AS user_id, SUM(uw.hours_spent) AS total_hours_spent
+    FROM user_workload uw
+        JOIN issue_assignments ia ON uw.issue_assignments_id = ia.id
+    GROUP BY ia.assigned_to
+),
+comment_stats AS (
+    SELECT ic.user_id, COUNT(*) AS comments_made
+    FROM issue_comments ic
+    GROUP BY ic.user_id
+),
+history_stats AS (
+    SELECT ih.user_id, COUNT(*) AS activities_logged
+    FROM issue_history ih
+    GROUP BY ih.user_id
+),
+capacity AS (
+    SELECT uc.user_id, uc.organization_id, MAX(uc.weekly_hours) AS weekly_hours
+    FROM user_capacity uc
+    GROUP BY uc.user_id, uc.organization_id
+)
+SELECT u.id AS user_id,
+    o.id AS organization_id,
+    u.name AS user_name,
+    u.email,
+    o.name AS organization_name,
+    COALESCE(ast.assigned_issues, 0) AS assigned_issues,
+    COALESCE(ast.completed_issues, 0) AS completed_issues,
+    COALESCE(ast.open_issues, 0) AS open_issues,
+    ast.total_story_points_assigned,
+    COALESCE(ast.completed_story_points, 0) AS completed_story_points,
+    ast.avg_story_points_per_issue,
+    COALESCE(cs.comments_made, 0) AS comments_made,
+    COALESCE(hs.activities_logged, 0) AS activities_logged,
+    cap.weekly_hours,
+    hrs.total_hours_spent,
+    CASE
+        WHEN COALESCE(ast.assigned_issues, 0) = 0 THEN 0
+        ELSE ast.completed_issues * 100.0 / ast.assigned_issues
+    END AS completion_rate,
+    EXTRACT(DAY FROM (NOW() - u.created_at)) AS days_since_joined,
+    NOW() AS computed_at
+FROM (SELECT DISTINCT user_id, organization_id FROM organization_users) ou
+    JOIN users u ON u.id = ou.user_id
+    JOIN organizations o ON o.id = ou.organization_id
+    LEFT JOIN assignment_stats ast ON ast.user_id = u.id
+    LEFT JOIN hours_stats hrs ON hrs.user_id = u.id
+    LEFT JOIN comment_stats cs ON cs.user_id = u.id
+    LEFT JOIN history_stats hs ON hs.user_id = u.id
+    LEFT JOIN capacity cap ON cap.user_id = u.id AND cap.organization_id = o.id;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_mv_user_performance ON mv_user_performance (user_id, organization_id);
+CREATE INDEX IF NOT EXISTS idx_mv_user_performance_org ON mv_user_performance (organization_id);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_sprint_velocity AS
+WITH sprint_issues AS (
+    SELECT DISTINCT iss.sprint_id, i.id AS issue_id, i.status, i.story_points
+    FROM issue_sprints iss
+        JOIN issues i ON iss.issue_id = i.id
+),
+sprint_stats AS (
+    SELECT si.sprint_id,
+        COUNT(*) AS issues_in_sprint,
+        SUM(si.story_points) AS total_story_points,
+        COUNT(*) FILTER (WHERE si.status = 'completed') AS completed_issues,
+        SUM(si.story_points) FILTER (WHERE si.status = 'completed') AS completed_story_points
+    FROM sprint_issues si
+    GROUP BY si.sprint_id
+),
+project_velocity AS (
+    SELECT tv.project_id, AVG(tv.avg_hours_per_point) AS avg_hours_per_point
+    FROM team_velocity tv
+    GROUP BY tv.project_id
+)
+SELECT s.id AS sprint_id,
+    s.project_id,
+    p.workspace_id,
+    w.organization_id,
+    s.name AS sprint_name,
+    p.name AS project_name,
+    s.start_date,
+    s.end_date,
+    s.status,
+    s.velocity_target,
+    COALESCE(ss.issues_in_sprint, 0) AS issues_in_sprint,
+    ss.total_story_points,
+    COALESCE(ss.completed_issues, 0) AS completed_issues,
+    COALESCE(ss.completed_story_points, 0) AS completed_story_points,
+    pv.avg_hours_per_point,
+    CASE
+        WHEN s.velocity_target > 0 THEN COALESCE(ss.completed_story_points, 0) * 100.0 / s.velocity_target
+        ELSE 0
+    END AS velocity_achievement_percentage,
+    (s.end_date - s.start_date) AS sprint_duration_days,
+    CASE
+        WHEN s.end_date < CURRENT_DATE THEN 'completed'
+        WHEN s.start_date <= CURRENT_DATE AND s.end_date >= CURRENT_DATE THEN 'active'
+        ELSE 'upcoming'
+    END AS sprint_status,
+    NOW() AS computed_at
+FROM sprints s
+    JOIN projects p ON s.project_id = p.id
+    JOIN workspaces w ON p.workspace_id = w.id
+    LEFT JOIN sprint_stats ss ON ss.sprint_id = s.id
+    LEFT JOIN project_velocity pv ON pv.project_id = s.project_id;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_mv_sprint_velocity ON mv_sprint_velocity (sprint_id);
+CREATE INDEX IF NOT EXISTS idx_mv_sprint_velocity_org ON mv_sprint_velocity (organization_id);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_team_performance AS
+WITH team_projects AS (
+    SELECT DISTINCT pt.team_id, pt.project_id
+    FROM project_teams pt
+),
+team_issues AS (
+    SELECT DISTINCT tp.team_id, i.id AS issue_id, i.status, i.story_points, i.created_at, i.updated_at
+    FROM team_projects tp
+        JOIN issues i ON i.project_id = tp.project_id
+),
+member_stats AS (
+    SELECT ut.team_id, COUNT(DISTINCT ut.user_id) AS team_members
+    FROM user_team ut
+    GROUP BY ut.team_id
+),
+workspace_stats AS (
+    SELECT tw.team_id, COUNT(DISTINCT tw.workspace_id) AS workspaces_assigned
+    FROM team_workspaces tw
+    GROUP BY tw.team_id
+),
+project_stats AS (
+    SELECT tp.team_id, COUNT(*) AS projects_assigned
+    FROM team_projects tp
+    GROUP BY tp.team_id
+),
+issue_stats AS (
+    SELECT ti.team_id,
+        COUNT(*) AS total_issues_worked,
+        SUM(ti.story_points) AS total_story_points_worked,
+        COUNT(*) FILTER (WHERE ti.status = 'completed') AS completed_issues,
+        AVG(EXTRACT(EPOCH FROM (ti.updated_at - ti.created_at)) / 3600) AS avg_issue_resolution_time
+    FROM team_issues ti
+    GROUP BY ti.team_id
+),
+comment_stats AS (
+    SELECT ti.team_id, COUNT(*) AS team_comments
+    FROM team_issues ti
+        JOIN issue_comments ic ON ic.issue_id = ti.issue_id
+    GROUP BY ti.team_id
+),
+history_stats AS (
+    SELECT ti.team_id, COUNT(*) AS team_activities
+    FROM team_issues ti
+        JOIN issue_history ih ON ih.issue_id = ti.issue_id
+    GROUP BY ti.team_id
+),
+velocity_stats AS (
+    SELECT tv.team_id, AVG(tv.avg_hours_per_point) AS team_velocity
+    FROM team_velocity tv
+    GROUP BY tv.team_id
+)
+SELECT t.id AS team_id,
+    t.organization_id,
+    t.name AS team_name,
+    o.name AS organization_name,
+    COALESCE(ms.team_members, 0) AS team_members,
+    COALESCE(ws.workspaces_assigned, 0) AS workspaces_assigned,
+    COALESCE(ps.projects_assigned, 0) AS projects_assigned,
+    COALESCE(ist.total_issues_worked, 0) AS total_issues_worked,
+    ist.total_story_points_worked,
+    vs.team_velocity,
+    COALESCE(cs.team_comments, 0) AS team_comments,
+    COALESCE(hs.team_activities, 0) AS team_activities,
+    ist.avg_issue_resolution_time,
+    COALESCE(ist.completed_issues, 0) AS completed_issues,
+    CASE
+        WHEN COALESCE(ist.total_issues_worked, 0) = 0 THEN 0
+        ELSE ist.completed_issues * 100.0 / ist.total_issues_worked
+    END AS team_completion_rate,
+    NOW() AS computed_at
+FROM teams t
+    JOIN organizations o ON t.organization_id = o.id
+    LEFT JOIN member_stats ms ON ms.team_id = t.id
+    LEFT JOIN workspace_stats ws ON ws.team_id = t.id
+    LEFT JOIN project_stats ps ON ps.team_id = t.id
+    LEFT JOIN issue_stats ist ON ist.team_id = t.id
+    LEFT JOIN comment_stats cs ON cs.team_id = t.id
+    LEFT JOIN history_stats hs ON hs.team_id = t.id
+    LEFT JOIN velocity_stats vs ON vs.team_id = t.id;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_mv_team_performance ON mv_team_performance (team_id);
+CREATE INDEX IF NOT EXISTS idx_mv_team_performance_org ON mv_team_performance (organization_id);
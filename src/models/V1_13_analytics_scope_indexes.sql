@@ -0,0 +1,11 @@
+-- Tenant-scoped analytics (PostgreSQL)
+-- Scoped queries resolve organization -> workspaces -> projects -> issues, then probe
+-- per-issue link tables; issues (project_id, created_at) is covered by V1_08.
+CREATE INDEX IF NOT EXISTS idx_workspaces_organization ON workspaces (organization_id);
+CREATE INDEX IF NOT EXISTS idx_project_teams_project_team ON project_teams (project_id, team_id);
+CREATE INDEX IF NOT EXISTS idx_issue_comments_issue ON issue_comments (issue_id);
+CREATE INDEX IF NOT EXISTS idx_issue_history_issue ON issue_history (issue_id);
+CREATE INDEX IF NOT EXISTS idx_user_workload_assignment ON user_workload (issue_assignments_id);
+-- Snapshot reads filter sprint velocity by workspace or project as well as organization
+CREATE INDEX IF NOT EXISTS idx_mv_sprint_velocity_workspace ON mv_sprint_velocity (workspace_id);
+CREATE INDEX IF NOT EXISTS idx_mv_sprint_velocity_project ON mv_sprint_velocity (project_id, start_date DESC);
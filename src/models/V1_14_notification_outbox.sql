@@ -0,0 +1,16 @@
+-- Transactional outbox for notifications (PostgreSQL)
+-- Services insert rows in the same transaction as the domain change; the outbox relay
+-- XADDs them to Redis in batches and deletes them, giving at-least-once delivery.
+CREATE TABLE IF NOT EXISTS notification_outbox (
+    id BIGSERIAL PRIMARY KEY,
+    -- Exactly one target: a user's stream or an organization/project topic stream
+    user_id INT NULL,
+    scope VARCHAR(20) NULL,
+    scope_id INT NULL,
+    message TEXT NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    CONSTRAINT chk_notification_outbox_target CHECK (
+        (user_id IS NOT NULL AND scope IS NULL AND scope_id IS NULL)
+        OR (user_id IS NULL AND scope IN ('organization', 'project') AND scope_id IS NOT NULL)
+    )
+);
@@ -0,0 +1,6 @@
+-- Coalescing keys for outbox notifications (PostgreSQL)
+-- User notifications with a kind and entity (e.g. 'issue_assigned', 'issue:42') are merged
+-- with others for the same pair before they reach the user's stream.
+ALTER TABLE notification_outbox
+    ADD COLUMN IF NOT EXISTS kind VARCHAR(50) NULL,
+    ADD COLUMN IF NOT EXISTS entity VARCHAR(100) NULL;
@@ -0,0 +1,71 @@
+import asyncio
+import json
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+from src.core.config import settings
+from src.core.logger import setup_logger
+from src.notification.client import get_redis_client
+from src.notification.helpers import get_stream_key
+from src.notification.streams import GROUP_NAME
+
+logger = setup_logger(__name__)
+
+STREAM_ID_PATTERN = re.compile(r"^\d+-\d+$")
+
+
+def parse_ack_frame(data: str) -> Optional[List[str]]:
+    """Return the message ids of a client ack frame ({"ack": [...]}), or None for any other frame"""
+    try:
+        frame = json.loads(data)
+    except ValueError:
+        return None
+    if not isinstance(frame, dict) or not isinstance(frame.get("ack"), list):
+        return None
+    return [str(message_id) for message_id in frame["ack"]]
+
+
+class AckBuffer:
+    """Coalesces acknowledgements sent over sockets into periodic pipelined XACK calls"""
+
+    def __init__(self, max_pending: int):
+        self.max_pending = max_pending
+        self._pending: Dict[str, Set[str]] = defaultdict(set)
+        self._count = 0
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def add(self, user_id: int, message_ids: List[str]) -> int:
+        """Buffer valid stream ids for a user; returns how many were accepted"""
+        valid = {message_id for message_id in message_ids if STREAM_ID_PATTERN.match(message_id)}
+        if not valid:
+            return 0
+        ids = self._pending[get_stream_key(user_id)]
+        before = len(ids)
+        ids.update(valid)
+        self._count += len(ids) - before
+        if self._count >= self.max_pending and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.create_task(self.flush())
+        return len(valid)
+
+    async def flush(self) -> int:
+        """XACK everything buffered in one pipeline; returns the number of entries acknowledged"""
+        if not self._pending:
+            return 0
+        pending, self._pending, self._count = self._pending, defaultdict(set), 0
+        try:
+            async with get_redis_client().pipeline(transaction=False) as pipe:
+                for stream_key, ids in pending.items():
+                    pipe.xack(stream_key, GROUP_NAME, *ids)
+                results = await pipe.execute()
+        except Exception:
+            # Keep the ids for the next flush; XACK is idempotent
+            for stream_key, ids in pending.items():
+                self._pending[stream_key].update(ids)
+            self._count = sum(len(ids) for ids in self._pending.values())
+            raise
+        return sum(int(result) for result in results)
+
+
+# Singleton
+ack_buffer = AckBuffer(max_pending=settings.NOTIFICATION_ACK_MAX_PENDING)
@@ -1,35 +1,148 @@
-from typing import Dict, List
+from typing import Dict, List, Optional
 from fastapi import WebSocket
-from collections import defaultdict
+from collections import defaultdict, deque
 import asyncio
 
+from src.core.config import settings
+from src.core.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# What to do when a socket's outbound queue is full
+SLOW_CONSUMER_POLICIES = ("drop_oldest", "coalesce", "disconnect")
+
+# 1013 "Try Again Later": the client should reconnect, which redelivers pending stream entries
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+class ClientConnection:
+    """One socket with a bounded outbound queue drained by its own writer task"""
+
+    def __init__(self, websocket: WebSocket, user_id: str, max_queue: int, policy: str, send_timeout: float):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.max_queue = max_queue
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self.dropped = 0
+        self.closed = False
+        self._queue: deque = deque()
+        self._ready = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._writer = asyncio.create_task(self._write_loop())
+
+    def enqueue(self, message: str, key: Optional[str] = None) -> bool:
+        """Queue a frame without waiting on the socket; False if it was not queued"""
+        if self.closed:
+            return False
+        if self.policy == "coalesce" and key is not None:
+            # Replace a queued frame for the same key in place; the newest state wins
+            for index, (queued_key, _) in enumerate(self._queue):
+                if queued_key == key:
+                    self._queue[index] = (key, message)
+                    return True
+        if len(self._queue) >= self.max_queue:
+            if self.policy == "disconnect":
+                logger.warning(f"Disconnecting slow consumer for user {self.user_id}")
+                self.close(SLOW_CONSUMER_CLOSE_CODE)
+                return False
+            self._queue.popleft()
+            self.dropped += 1
+        self._queue.append((key, message))
+        self._ready.set()
+        return True
+
+    def stop(self) -> None:
+        """Stop writing and drop queued frames; the socket itself is left to its owner"""
+        self.closed = True
+        self._queue.clear()
+        if self._writer is not None:
+            self._writer.cancel()
+
+    def close(self, code: int = 1000) -> None:
+        if self.closed:
+            return
+        self.stop()
+        asyncio.create_task(self._close_socket(code))
+
+    async def _close_socket(self, code: int) -> None:
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            # Already closed by the client
+            pass
+
+    async def _send(self, message: str) -> None:
+        await self.websocket.send_text(message)
+
+    async def _write_loop(self) -> None:
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            while self._queue:
+                _key, message = self._queue.popleft()
+                try:
+                    await asyncio.wait_for(self._send(message), timeout=self.send_timeout)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning(f"Closing socket for user {self.user_id} after failed send: {e!r}")
+                    self.close(SLOW_CONSUMER_CLOSE_CODE)
+                    return
+
+
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[str, List[WebSocket]] = defaultdict(list)
-        self.lock = asyncio.Lock()
-    
-    async def connect(self, websocket: WebSocket, user_id: str):
+    def __init__(self, max_queue: int = 256, policy: str = "drop_oldest", send_timeout: float = 10.0):
+        if policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"Unknown slow consumer policy: {policy}")
+        self.active_connections: Dict[str, List[ClientConnection]] = defaultdict(list)
+        self.max_queue = max_queue
+        self.policy = policy
+        self.send_timeout = send_timeout
+
+    async def connect(self, websocket: WebSocket, user_id: str) -> ClientConnection:
         await websocket.accept()
-        async with self.lock:
-            self.active_connections[user_id].append(websocket)
-      
+        connection = ClientConnection(websocket, user_id, self.max_queue, self.policy, self.send_timeout)
+        connection.start()
+        self.register(connection)
+        return connection
+
+    def register(self, connection: ClientConnection) -> None:
+        """Route a user's frames to an already started connection"""
+        self.active_connections[connection.user_id].append(connection)
+
+    def remove(self, connection: ClientConnection) -> None:
+        connections = self.active_connections.get(connection.user_id, [])
+        if connection in connections:
+            connections.remove(connection)
+        connection.stop()
+        if not connections:
+            self.active_connections.pop(connection.user_id, None)
+
     async def disconnect(self, websocket: WebSocket, user_id: str):
-        async with self.lock:
-            if websocket in self.active_connections[user_id]:
-                self.active_connections[user_id].remove(websocket)
-            if not self.active_connections[user_id]:
-                del self.active_connections[user_id]
-    
-    async def send_personal_message(self, message: str, user_id: str):
-        async with self.lock:
-            for connection in self.active_connections.get(user_id, []):
-                await connection.send_text(message)
-    
-    async def broadcast(self, message: str):
-        async with self.lock:
-            for connections in self.active_connections.values():
-                for connection in connections:
-                    await connection.send_text(message)
+        connections = self.active_connections.get(user_id, [])
+        for connection in [c for c in connections if c.websocket is websocket]:
+            connections.remove(connection)
+            connection.stop()
+        if not connections:
+            self.active_connections.pop(user_id, None)
+
+    async def send_personal_message(self, message: str, user_id: str, key: Optional[str] = None) -> int:
+        """Queue a frame for every socket of a user; returns how many sockets accepted it"""
+        return sum(connection.enqueue(message, key) for connection in self.active_connections.get(user_id, []))
+
+    async def broadcast(self, message: str, key: Optional[str] = None) -> int:
+        return sum(
+            connection.enqueue(message, key)
+            for connections in self.active_connections.values()
+            for connection in connections
+        )
 
 # Singleton
-manager = ConnectionManager()
\ No newline at end of file
+manager = ConnectionManager(
+    max_queue=settings.NOTIFICATION_SEND_QUEUE_SIZE,
+    policy=settings.NOTIFICATION_SLOW_CONSUMER_POLICY,
+    send_timeout=settings.NOTIFICATION_SEND_TIMEOUT_SECONDS,
+)
@@ -0,0 +1,326 @@
+import asyncio
+import json
+import math
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+from redis import asyncio as aioredis
+
+from src.core.config import settings
+from src.core.logger import setup_logger
+from src.notification.client import get_redis_client
+from src.notification.connection_manager import ConnectionManager, manager
+from src.notification.helpers import get_node_id, get_stream_key, get_topic_stream_key
+from src.notification.streams import GROUP_NAME, ERROR_SLEEP_SEC, create_group
+
+logger = setup_logger(__name__)
+
+# Pause between CLIENT UNBLOCK attempts while a shard's read is still on its way to Redis
+UNBLOCK_RETRY_SEC = 0.01
+
+
+def format_notification_frame(entries, topic: Optional[str] = None) -> Optional[str]:
+    """Serialize stream entries as one frame: a single message keeps the legacy shape, several are batched"""
+    messages = []
+    for msg_id, data in entries:
+        if not data or not data.get("message"):
+            continue
+        message = {"message_id": msg_id, "message": data["message"]}
+        # Coalesced entries stand for several events
+        if int(data.get("count", 1)) > 1:
+            message["count"] = int(data["count"])
+        messages.append(message)
+    if not messages:
+        return None
+    frame = messages[0] if len(messages) == 1 else {"messages": messages}
+    if topic is not None:
+        frame["topic"] = topic
+    return json.dumps(frame, separators=(",", ":"))
+
+
+class _Shard:
+    """One reader task's keys; the task reads them with a dedicated Redis connection"""
+
+    def __init__(self):
+        self.keys: Dict[str, None] = {}
+        self.wakeup = asyncio.Event()
+        self.changed = False
+        self.reading = False
+        self.client: Optional[aioredis.Redis] = None
+        self.client_id: Optional[int] = None
+        self.reader: Optional[asyncio.Task] = None
+        self.interrupt: Optional[asyncio.Task] = None
+
+
+class ShardedStreamReader(ABC):
+    """Reads a changing set of Redis streams with one blocking read per shard of keys.
+
+    Streams are split into shards of up to streams_per_read keys; each shard has one
+    reader task blocking on a single multi-key read, so a worker holds one Redis
+    connection per shard instead of one per stream. Keys never move between shards.
+    When a shard's keys change its outstanding read is cut short with CLIENT UNBLOCK
+    and reissued, so a new stream is read right away instead of after block_ms.
+    Subclasses implement _read and _deliver.
+    """
+
+    def __init__(self, streams_per_read: int, read_count: int, block_ms: int):
+        self.streams_per_read = streams_per_read
+        self.read_count = read_count
+        self.block_ms = block_ms
+        self.redis = get_redis_client()
+        self._shards: List[_Shard] = []
+        self._positions: Dict[str, _Shard] = {}
+        self._running = False
+
+    def _add_key(self, stream_key: str) -> None:
+        if stream_key in self._positions:
+            return
+        shard = next((s for s in self._shards if len(s.keys) < self.streams_per_read), None)
+        if shard is None:
+            shard = _Shard()
+            self._shards.append(shard)
+        shard.keys[stream_key] = None
+        self._positions[stream_key] = shard
+        self._keys_changed(shard)
+
+    def _remove_key(self, stream_key: str) -> None:
+        shard = self._positions.pop(stream_key, None)
+        if shard is None:
+            return
+        del shard.keys[stream_key]
+        self._keys_changed(shard)
+
+    def _keys_changed(self, shard: _Shard) -> None:
+        shard.changed = True
+        shard.wakeup.set()
+        if not self._running:
+            return
+        if shard.reader is None:
+            shard.reader = asyncio.create_task(self._read_shard(shard))
+        elif shard.reading and (shard.interrupt is None or shard.interrupt.done()):
+            shard.interrupt = asyncio.create_task(self._interrupt(shard))
+
+    def start(self) -> None:
+        self._running = True
+        for shard in self._shards:
+            if shard.reader is None:
+                shard.reader = asyncio.create_task(self._read_shard(shard))
+
+    async def stop(self) -> None:
+        self._running = False
+        tasks = [task for shard in self._shards for task in (shard.reader, shard.interrupt) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for shard in self._shards:
+            shard.reader = shard.interrupt = None
+            shard.reading = False
+            await self._close_client(shard)
+
+    def _shard_client(self) -> aioredis.Redis:
+        # Holds one pooled connection, so CLIENT UNBLOCK can target its blocked read
+        return aioredis.Redis(connection_pool=self.redis.connection_pool, single_connection_client=True)
+
+    async def _close_client(self, shard: _Shard) -> None:
+        client, shard.client, shard.client_id = shard.client, None, None
+        if client is not None:
+            try:
+                await client.aclose()
+            except Exception as exc:
+                logger.warning(f"{type(self).__name__} failed to close a shard connection: {exc}")
+
+    async def _read_shard(self, shard: _Shard) -> None:
+        while True:
+            shard.wakeup.clear()
+            shard.changed = False
+            keys = list(shard.keys)
+            if not keys:
+                await shard.wakeup.wait()
+                continue
+
+            try:
+                if shard.client is None:
+                    shard.client = self._shard_client()
+                    shard.client_id = await shard.client.client_id()
+                # Set before the last check so a change from here on interrupts the read
+                shard.reading = True
+                if shard.changed:
+                    continue
+                response = await self._read(shard.client, keys)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.error(f"{type(self).__name__} shard {self._shards.index(shard)} read failed: {exc}")
+                # A reconnect would get a new client id, so start from a fresh connection
+                await self._close_client(shard)
+                await self._recover(keys, exc)
+                await asyncio.sleep(ERROR_SLEEP_SEC)
+                continue
+            finally:
+                shard.reading = False
+
+            for stream_key, messages in response or []:
+                await self._deliver(stream_key, messages)
+
+    async def _interrupt(self, shard: _Shard) -> None:
+        """Unblock the shard's outstanding read so it is reissued with the current keys"""
+        while shard.changed and shard.reading:
+            try:
+                if await self.redis.client_unblock(shard.client_id):
+                    return
+            except Exception as exc:
+                # The read still ends after block_ms
+                logger.warning(f"{type(self).__name__} could not interrupt a shard read: {exc}")
+                return
+            # The read has not reached Redis yet; retry until it blocks or returns
+            await asyncio.sleep(UNBLOCK_RETRY_SEC)
+
+    @abstractmethod
+    async def _read(self, client: aioredis.Redis, keys: List[str]):
+        """One blocking multi-key read of keys; returns [(stream_key, messages), ...] or None"""
+
+    async def _recover(self, keys: List[str], exc: Exception) -> None:
+        pass
+
+    @abstractmethod
+    async def _deliver(self, stream_key: str, messages) -> None:
+        """Hand the messages read from one stream to their local sockets"""
+
+
+class NotificationDispatcher(ShardedStreamReader):
+    """Reads the per-user streams of all locally connected users through the consumer group.
+
+    Messages are routed to sockets through the ConnectionManager.
+    """
+
+    def __init__(self, connection_manager: ConnectionManager, streams_per_read: int,
+                 read_count: int, block_ms: int):
+        super().__init__(streams_per_read, read_count, block_ms)
+        self.manager = connection_manager
+        self.consumer_name = get_node_id()
+        self._stream_users: Dict[str, str] = {}
+        self._refcounts: Dict[str, int] = {}
+
+    def subscribe(self, user_id: int) -> None:
+        """Start reading a user's stream; safe to call once per socket"""
+        stream_key = get_stream_key(user_id)
+        count = self._refcounts.get(stream_key, 0)
+        self._refcounts[stream_key] = count + 1
+        if count:
+            return
+        self._stream_users[stream_key] = str(user_id)
+        self._add_key(stream_key)
+
+    def unsubscribe(self, user_id: int) -> None:
+        """Stop reading a user's stream once their last local socket is gone"""
+        stream_key = get_stream_key(user_id)
+        count = self._refcounts.get(stream_key, 0) - 1
+        if count > 0:
+            self._refcounts[stream_key] = count
+            return
+        self._refcounts.pop(stream_key, None)
+        self._stream_users.pop(stream_key, None)
+        self._remove_key(stream_key)
+
+    async def _read(self, client: aioredis.Redis, keys: List[str]):
+        return await client.xreadgroup(
+            GROUP_NAME,
+            self.consumer_name,
+            {key: ">" for key in keys},
+            count=self.read_count,
+            block=self.block_ms,
+        )
+
+    async def _recover(self, keys: List[str], exc: Exception) -> None:
+        if "NOGROUP" in str(exc):
+            for key in keys:
+                await create_group(key)
+
+    async def _deliver(self, stream_key: str, messages) -> None:
+        user_id = self._stream_users.get(stream_key)
+        if user_id is None:
+            # The user disconnected mid-read; entries stay pending and are claimed on reconnect
+            return
+        frame = format_notification_frame(messages)
+        if frame:
+            await self.manager.send_personal_message(frame, user_id)
+
+
+class TopicDispatcher(ShardedStreamReader):
+    """Fans organization/project topic streams out to the local sockets subscribed to them.
+
+    Every worker reads each topic with a plain XREAD from its own last seen id, so one
+    XADD reaches all subscribed sockets on all workers. Topic entries are live only:
+    there is no consumer group and nothing to acknowledge.
+    """
+
+    def __init__(self, connection_manager: ConnectionManager, streams_per_read: int,
+                 read_count: int, block_ms: int):
+        super().__init__(streams_per_read, read_count, block_ms)
+        self.manager = connection_manager
+        self._topic_users: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._topic_names: Dict[str, str] = {}
+        self._last_ids: Dict[str, str] = {}
+
+    async def subscribe(self, user_id: int, topics: Iterable[tuple[str, int]]) -> None:
+        """Subscribe a user's socket to (scope, scope_id) topics such as ("project", 5)"""
+        for scope, scope_id in topics:
+            stream_key = get_topic_stream_key(scope, scope_id)
+            if stream_key not in self._last_ids:
+                # Start after the newest entry so a new subscriber only sees new events
+                newest = await self.redis.xrevrange(stream_key, count=1)
+                self._last_ids.setdefault(stream_key, newest[0][0] if newest else "0-0")
+                self._topic_names[stream_key] = f"{scope}:{scope_id}"
+            users = self._topic_users[stream_key]
+            users[str(user_id)] = users.get(str(user_id), 0) + 1
+            self._add_key(stream_key)
+
+    def unsubscribe(self, user_id: int, topics: Iterable[tuple[str, int]]) -> None:
+        for scope, scope_id in topics:
+            stream_key = get_topic_stream_key(scope, scope_id)
+            users = self._topic_users.get(stream_key)
+            if not users or str(user_id) not in users:
+                continue
+            users[str(user_id)] -= 1
+            if users[str(user_id)] <= 0:
+                del users[str(user_id)]
+            if not users:
+                del self._topic_users[stream_key]
+                self._last_ids.pop(stream_key, None)
+                self._topic_names.pop(stream_key, None)
+                self._remove_key(stream_key)
+
+    async def _read(self, client: aioredis.Redis, keys: List[str]):
+        streams = {key: self._last_ids[key] for key in keys if key in self._last_ids}
+        if not streams:
+            return []
+        return await client.xread(streams, count=self.read_count, block=self.block_ms)
+
+    async def _deliver(self, stream_key: str, messages) -> None:
+        if not messages:
+            return
+        if stream_key in self._last_ids:
+            self._last_ids[stream_key] = messages[-1][0]
+        users = self._topic_users.get(stream_key)
+        if not users:
+            return
+        frame = format_notification_frame(messages, topic=self._topic_names.get(stream_key))
+        if frame:
+            for user_id in list(users):
+                await self.manager.send_personal_message(frame, user_id)
+
+
+# Singletons
+dispatcher = NotificationDispatcher(
+    manager,
+    streams_per_read=settings.NOTIFICATION_STREAMS_PER_READ,
+    read_count=settings.NOTIFICATION_READ_COUNT,
+    block_ms=settings.NOTIFICATION_BLOCK_MS,
+)
+topic_dispatcher = TopicDispatcher(
+    manager,
+    streams_per_read=settings.NOTIFICATION_STREAMS_PER_READ,
+    read_count=settings.NOTIFICATION_READ_COUNT,
+    block_ms=settings.NOTIFICATION_BLOCK_MS,
+)
@@ -1,4 +1,5 @@
 import os
+import socket
 
 def get_stream_key(user_id: int) -> str:
     env = os.getenv("APP_ENV", "local")
@@ -10,4 +11,36 @@ def get_group_name() -> str:
     env = os.getenv("APP_ENV", "local")
     app = "notiq"
     group_prefix = "notification_group"
-    return f"{env}:{app}:{group_prefix}"
\ No newline at end of file
+    return f"{env}:{app}:{group_prefix}"
+
+def get_coalesce_key(user_id: int) -> str:
+    env = os.getenv("APP_ENV", "local")
+    app = "notiq"
+    coalesce_prefix = "coalesce"
+    return f"{env}:{app}:{coalesce_prefix}:{user_id}"
+
+def get_coalesce_due_key() -> str:
+    env = os.getenv("APP_ENV", "local")
+    app = "notiq"
+    return f"{env}:{app}:coalesce_due"
+
+def get_node_id() -> str:
+    # One id per worker process; doubles as its consumer name in every group
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def get_presence_key(user_id: int) -> str:
+    env = os.getenv("APP_ENV", "local")
+    app = "notiq"
+    presence_prefix = "presence"
+    return f"{env}:{app}:{presence_prefix}:{user_id}"
+
+# Scopes that have their own broadcast stream
+TOPIC_SCOPES = ("organization", "project")
+
+def get_topic_stream_key(scope: str, scope_id: int) -> str:
+    if scope not in TOPIC_SCOPES:
+        raise ValueError(f"Unknown notification topic scope: {scope}")
+    env = os.getenv("APP_ENV", "local")
+    app = "notiq"
+    topic_prefix = "topics"
+    return f"{env}:{app}:{topic_prefix}:{scope}:{scope_id}"
@@ -0,0 +1,40 @@
+from typing import List
+
+from src.core.logger import setup_logger
+from src.notification.client import get_redis_client
+from src.notification.helpers import get_stream_key, get_topic_stream_key
+from src.notification.streams import MAX_STREAM_LENGTH, coalescer
+from src.repositories.notifications import NotificationRepository
+
+logger = setup_logger(__name__)
+
+
+class OutboxRelay:
+    """Moves committed notification_outbox rows into Redis streams with pipelined XADDs"""
+
+    def __init__(self, batch_size: int):
+        self.batch_size = batch_size
+        self.notification_repo = NotificationRepository()
+
+    async def _publish(self, rows: List[dict]) -> None:
+        async with get_redis_client().pipeline(transaction=False) as pipe:
+            for row in rows:
+                if row['user_id'] is not None and row['kind'] and row['entity'] and coalescer.enabled:
+                    await coalescer.add(row['user_id'], row['message'], row['kind'], row['entity'], client=pipe)
+                    continue
+                if row['user_id'] is not None:
+                    stream_key = get_stream_key(row['user_id'])
+                else:
+                    stream_key = get_topic_stream_key(row['scope'], row['scope_id'])
+                payload = {"message": row['message'], "timestamp": str(row['created_at'].timestamp())}
+                pipe.xadd(stream_key, payload, maxlen=MAX_STREAM_LENGTH, approximate=True)
+            await pipe.execute()
+
+    async def drain(self) -> int:
+        """Relay batches until the outbox is empty; returns how many rows were published"""
+        relayed = 0
+        while True:
+            count = await self.notification_repo.relay_outbox_batch(self.batch_size, self._publish)
+            relayed += count
+            if count < self.batch_size:
+                return relayed
@@ -0,0 +1,85 @@
+import time
+from typing import Iterable, List, Set
+
+from src.core.config import settings
+from src.core.logger import setup_logger
+from src.notification.client import get_redis_client
+from src.notification.connection_manager import ConnectionManager, manager
+from src.notification.helpers import get_node_id, get_presence_key
+
+logger = setup_logger(__name__)
+
+# Users refreshed per pipeline round trip during a heartbeat
+HEARTBEAT_BATCH_SIZE = 1000
+
+
+class PresenceRegistry:
+    """Records in Redis which worker holds each connected user, kept alive by heartbeats.
+
+    Each user has a sorted set of node ids scored by expiry time. A node that dies
+    stops refreshing and drops out once its score passes, without any cleanup.
+    Publishers use online_users to choose between live entries and a digest; the
+    coalescer does this for notifications such as issue assignments.
+    """
+
+    def __init__(self, connection_manager: ConnectionManager, ttl_seconds: float):
+        self.manager = connection_manager
+        self.ttl_seconds = ttl_seconds
+        self.node_id = get_node_id()
+        self.redis = get_redis_client()
+
+    async def register(self, user_id: int) -> None:
+        try:
+            await self._touch([str(user_id)])
+        except Exception as e:
+            logger.warning(f"Failed to register presence for user {user_id}: {e}")
+
+    async def unregister(self, user_id: int) -> None:
+        """Remove this node for a user once their last local socket has gone"""
+        if self.manager.active_connections.get(str(user_id)):
+            return
+        try:
+            await self.redis.zrem(get_presence_key(user_id), self.node_id)
+        except Exception as e:
+            logger.warning(f"Failed to unregister presence for user {user_id}: {e}")
+
+    async def heartbeat(self) -> None:
+        """Refresh this node's entry for every locally connected user"""
+        user_ids = list(self.manager.active_connections)
+        for start in range(0, len(user_ids), HEARTBEAT_BATCH_SIZE):
+            await self._touch(user_ids[start:start + HEARTBEAT_BATCH_SIZE])
+
+    async def clear(self) -> None:
+        """Drop this node from every local user's presence on shutdown"""
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for user_id in list(self.manager.active_connections):
+                pipe.zrem(get_presence_key(user_id), self.node_id)
+            await pipe.execute()
+
+    async def _touch(self, user_ids: List[str]) -> None:
+        if not user_ids:
+            return
+        now = time.time()
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for user_id in user_ids:
+                key = get_presence_key(user_id)
+                pipe.zadd(key, {self.node_id: now + self.ttl_seconds})
+                pipe.zremrangebyscore(key, "-inf", now)
+                pipe.expire(key, int(self.ttl_seconds) + 1)
+            await pipe.execute()
+
+    async def online_users(self, user_ids: Iterable[int]) -> Set[int]:
+        """Subset of user_ids connected to any node, in one round trip"""
+        user_ids = list(user_ids)
+        if not user_ids:
+            return set()
+        now = time.time()
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for user_id in user_ids:
+                pipe.zcount(get_presence_key(user_id), now, "+inf")
+            counts = await pipe.execute()
+        return {user_id for user_id, count in zip(user_ids, counts) if count}
+
+
+# Singleton
+presence = PresenceRegistry(manager, ttl_seconds=settings.NOTIFICATION_PRESENCE_TTL_SECONDS)
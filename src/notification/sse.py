@@ -0,0 +1,81 @@
+import asyncio
+import json
+from typing import AsyncIterator, List, Optional, Tuple
+
+from fastapi import Request
+
+from src.core.logger import setup_logger
+from src.notification.acks import STREAM_ID_PATTERN, ack_buffer
+from src.notification.connection_manager import ClientConnection
+
+logger = setup_logger(__name__)
+
+
+def parse_stream_id(message_id: str) -> Tuple[int, int]:
+    """Order stream ids ("<ms>-<seq>") numerically"""
+    ms, seq = message_id.split("-", 1)
+    return int(ms), int(seq)
+
+
+def parse_last_event_id(value: Optional[str]) -> Optional[str]:
+    """Return a Last-Event-ID header value if it is a stream id, otherwise None"""
+    if value and STREAM_ID_PATTERN.match(value.strip()):
+        return value.strip()
+    return None
+
+
+def format_sse_event(frame: str) -> Tuple[str, List[str]]:
+    """Wrap a notification frame as an SSE event; returns the event and the stream ids it carries.
+
+    The event id is the newest stream id in the frame so EventSource resumes after it.
+    Topic frames come from other streams and carry no id, which leaves the client's
+    last event id unchanged.
+    """
+    payload = json.loads(frame)
+    if "topic" in payload:
+        return f"data: {frame}\n\n", []
+    message_ids = [message["message_id"] for message in payload.get("messages", [payload])]
+    return f"id: {message_ids[-1]}\ndata: {frame}\n\n", message_ids
+
+
+class SSEConnection(ClientConnection):
+    """A receive-only client fed through a Server-Sent Events response.
+
+    Frames are queued through the ConnectionManager exactly like socket frames; the
+    streaming response body is the writer. SSE clients cannot send acks, so entries are
+    acknowledged once written and a reconnect resumes from Last-Event-ID instead.
+    """
+
+    def __init__(self, user_id: str, max_queue: int, policy: str, keepalive_seconds: float):
+        super().__init__(None, user_id, max_queue, policy, send_timeout=0)
+        self.keepalive_seconds = keepalive_seconds
+
+    def start(self) -> None:
+        # The response body drains the queue; there is no writer task
+        pass
+
+    def stop(self) -> None:
+        super().stop()
+        self._ready.set()
+
+    def close(self, code: int = 1000) -> None:
+        # Ending the response makes EventSource reconnect with its Last-Event-ID
+        self.stop()
+
+    async def events(self, request: Request) -> AsyncIterator[str]:
+        while not self.closed:
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout=self.keepalive_seconds)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                # Comment line: keeps proxies from timing out an idle stream
+                yield ": keepalive\n\n"
+                continue
+            self._ready.clear()
+            while self._queue and not self.closed:
+                _key, frame = self._queue.popleft()
+                event, message_ids = format_sse_event(frame)
+                yield event
+                if message_ids:
+                    ack_buffer.add(int(self.user_id), message_ids)
@@ -1,25 +1,37 @@
 import logging
 import time
 import asyncio
-from typing import Any, Dict, List, Tuple
+import json
+from typing import Any, Dict, List, Optional, Tuple
 from fastapi import status
 
+from src.core.config import settings
+from src.core.logger import setup_logger
 from src.notification.client import get_redis_client
 
 from src.notification.helpers import get_group_name , get_stream_key
+from src.notification.helpers import get_coalesce_key, get_coalesce_due_key
+from src.notification.presence import presence
 
 
 
 
 
+logger = setup_logger(__name__)
+
 GROUP_NAME : str = get_group_name()
 MAX_STREAM_LENGTH :int = 1000
-XREAD_TIMEOUT : int = 5000
-XREAD_COUNT : int = 1
+PENDING_CLAIM_COUNT : int = 100
 ERROR_SLEEP_SEC: float = 1
 redis_client = get_redis_client()
 
-async def publish_message(user_id:int , message:str):
+async def publish_message(user_id:int , message:str, kind: Optional[str] = None, entity: Optional[str] = None):
+    """
+    Append a message to the user's stream; with a kind and entity it goes through the coalescer instead.
+    """
+    if kind and entity and coalescer.enabled:
+        await coalescer.add(user_id, message, kind, entity)
+        return None
     stream_key : str = get_stream_key(user_id)
     payload : Dict[str,Any] = {"message": message, "timestamp": str(time.time())}
     try:
@@ -32,11 +44,11 @@ async def publish_message(user_id:int , message:str):
         )
         return msg_id
 
-    except Exception as e:
-        print(e)
+    except Exception:
+        logger.exception(f"Failed to publish to stream {stream_key}")
+        raise
 
-async def consumer_group(user_id:int):
-    stream_key : str = get_stream_key(user_id)
+async def create_group(stream_key: str) -> None:
     try:
         await redis_client.xgroup_create(
             stream_key,GROUP_NAME,id="0-0",mkstream=True
@@ -47,52 +59,59 @@ async def consumer_group(user_id:int):
         else:
             print(e)
 
+async def consumer_group(user_id:int):
+    await create_group(get_stream_key(user_id))
+
 
 
-async def get_pending_notification(user_id:int):
+async def get_pending_notification(user_id:int, consumer_name: str):
+    """
+    Claim the user's delivered-but-unacknowledged messages for this worker's consumer and return them.
+    """
     stream_key : str = get_stream_key(user_id)
-    consumer_name = str(user_id)
     notification : List[Tuple[str, Dict[str, Any]]] = []
     try:
-        pending_resp = await redis_client.xreadgroup(GROUP_NAME,consumer_name,{stream_key: "0"},
-            count=100,
-            block=0)
-        if pending_resp:
-            for _stream, messages in pending_resp:
-                notification.extend(messages)
+        # Entries may be pending under another worker's (or a legacy per-user) consumer name
+        _next_id, messages, *_deleted = await redis_client.xautoclaim(
+            stream_key, GROUP_NAME, consumer_name,
+            min_idle_time=0,
+            start_id="0-0",
+            count=PENDING_CLAIM_COUNT,
+        )
+        # Trimmed entries come back without fields on older Redis versions
+        notification.extend((msg_id, data) for msg_id, data in messages if data)
     except Exception as exc:
         print("Error reading pending notifications from %s: %s", stream_key, exc)
     return notification
 
-    
-async def listen_for_notifications(user_id:int, websocket) -> None:
+
+async def get_notifications_after(user_id: int, last_id: str):
     """
-    Continuously listen for new notifications from the user's Redis stream and deliver them.
+    Read the user's stream entries newer than last_id (exclusive), oldest first, for resuming a client.
+
+    Only entries the consumer group has already delivered are returned; newer ones still
+    reach the client through the dispatcher's XREADGROUP, so nothing is sent twice. The
+    range is read in pages, so a client any distance behind gets everything still in the stream.
     """
-    stream_key: str = get_stream_key(user_id)
-    consumer_name = str(user_id)
-
-    while True:
-        try:
-            new_resp = await redis_client.xreadgroup(
-                GROUP_NAME,
-                consumer_name,
-                {stream_key: ">"},
-                count=XREAD_COUNT,
-                block=XREAD_TIMEOUT
-            )
-            if new_resp:
-                for _stream, messages in new_resp:
-                    for msg_id, data in messages:
-                        message = data.get("message")
-                        if message:
-                            await websocket.send_json({"message_id": msg_id, "message": message})
-            else:
-                await asyncio.sleep(ERROR_SLEEP_SEC)
-        except Exception as exc:
-            print("Error listening for notifications on stream %s: %s", stream_key, exc)
-            await asyncio.sleep(ERROR_SLEEP_SEC)
+    stream_key : str = get_stream_key(user_id)
+    notifications : List[Tuple[str, Dict[str, Any]]] = []
+    try:
+        groups = await redis_client.xinfo_groups(stream_key)
+        last_delivered = next((g["last-delivered-id"] for g in groups if g["name"] == GROUP_NAME), None)
+        if last_delivered is None:
+            return notifications
+        cursor = last_id
+        while True:
+            messages = await redis_client.xrange(stream_key, min=f"({cursor}", max=last_delivered, count=PENDING_CLAIM_COUNT)
+            notifications.extend((msg_id, data) for msg_id, data in messages if data)
+            if len(messages) < PENDING_CLAIM_COUNT:
+                return notifications
+            cursor = messages[-1][0]
+    except Exception as exc:
+        logger.warning(f"Error reading notifications after {last_id} from {stream_key}: {exc}")
+        return notifications
 
+    
 async def acknowledge_notifications(user_id: int, message_ids: List[str]) -> None:
     """
     Acknowledge (XACK) messages so that they are not redelivered.
@@ -105,5 +124,177 @@ async def acknowledge_notifications(user_id: int, message_ids: List[str]) -> Non
             await redis_client.xack(stream_key, GROUP_NAME, *message_ids)
     except Exception as exc:
         print("Error acknowledging messages on stream %s: %s", stream_key, exc)
-        raise RuntimeError(f"Error acknowledging messages on stream {stream_key}: {exc}")  
-        
\ No newline at end of file
+        raise RuntimeError(f"Error acknowledging messages on stream {stream_key}: {exc}")
+
+
+# Merge an event into its (kind, entity) slot of the user's pending hash and schedule a flush
+COALESCE_ADD_SCRIPT = """
+local current = redis.call('HGET', KEYS[1], ARGV[1])
+local count = 1
+if current then
+    count = cjson.decode(current)['count'] + 1
+end
+redis.call('HSET', KEYS[1], ARGV[1], cjson.encode({message = ARGV[2], count = count}))
+redis.call('HSETNX', KEYS[1], '#since', ARGV[3])
+redis.call('ZADD', KEYS[2], 'NX', ARGV[4], ARGV[5])
+return count
+"""
+
+# Lease a due user so only one worker flushes them; the lease lapses if that worker dies
+COALESCE_CLAIM_SCRIPT = """
+local score = redis.call('ZSCORE', KEYS[1], ARGV[1])
+if not score or tonumber(score) > tonumber(ARGV[2]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], 'XX', ARGV[3], ARGV[1])
+return 1
+"""
+
+# After publishing, drop the published slots; slots merged into meanwhile keep only their new events
+COALESCE_ACK_SCRIPT = """
+for i = 4, #ARGV, 2 do
+    local current = redis.call('HGET', KEYS[1], ARGV[i])
+    if current == ARGV[i + 1] then
+        redis.call('HDEL', KEYS[1], ARGV[i])
+    elseif current then
+        local entry = cjson.decode(current)
+        entry['count'] = entry['count'] - cjson.decode(ARGV[i + 1])['count']
+        redis.call('HSET', KEYS[1], ARGV[i], cjson.encode(entry))
+    end
+end
+if redis.call('HLEN', KEYS[1]) - redis.call('HEXISTS', KEYS[1], '#since') == 0 then
+    redis.call('DEL', KEYS[1])
+    redis.call('ZREM', KEYS[2], ARGV[1])
+else
+    redis.call('HSET', KEYS[1], '#since', ARGV[2])
+    redis.call('ZADD', KEYS[2], ARGV[3], ARGV[1])
+end
+return 0
+"""
+
+# How long a claimed user stays hidden from other workers' flushes
+COALESCE_CLAIM_SECONDS = 30
+# Users flushed per pass of the flush job
+COALESCE_FLUSH_BATCH = 500
+# Lines listed in a digest before it is summarized
+DIGEST_MAX_LINES = 10
+
+
+class NotificationCoalescer:
+    """Merges a user's events by (kind, entity) over a window before they reach the stream.
+
+    Pending events live in Redis so every worker shares them. When a user's window
+    closes, online users get one entry per (kind, entity) carrying the newest message
+    and a count; offline users keep accumulating and get a single digest entry once
+    per digest interval.
+    """
+
+    def __init__(self, window_seconds: float, digest_interval_seconds: float):
+        self.window_seconds = window_seconds
+        self.digest_interval_seconds = digest_interval_seconds
+        self._add = redis_client.register_script(COALESCE_ADD_SCRIPT)
+        self._claim = redis_client.register_script(COALESCE_CLAIM_SCRIPT)
+        self._ack = redis_client.register_script(COALESCE_ACK_SCRIPT)
+
+    @property
+    def enabled(self) -> bool:
+        return self.window_seconds > 0
+
+    async def add(self, user_id: int, message: str, kind: str, entity: str, client=None) -> None:
+        """Record an event; pass a pipeline as client to batch it with other commands"""
+        now = time.time()
+        await self._add(
+            keys=[get_coalesce_key(user_id), get_coalesce_due_key()],
+            args=[f"{kind}|{entity}", message, now, now + self.window_seconds, user_id],
+            client=client,
+        )
+
+    async def flush(self) -> int:
+        """Publish every user whose window has closed; returns the number of stream entries written
+
+        Pending events are removed only after their stream entries are written, so a Redis
+        error leaves them for a later pass (at least once) and propagates to the caller.
+        """
+        written = 0
+        now = time.time()
+        due_key = get_coalesce_due_key()
+        due_users = await redis_client.zrangebyscore(due_key, "-inf", now, start=0, num=COALESCE_FLUSH_BATCH)
+        if not due_users:
+            return 0
+        online = await presence.online_users(due_users)
+        for user_id in due_users:
+            if not await self._claim(keys=[due_key], args=[user_id, now, now + COALESCE_CLAIM_SECONDS]):
+                continue
+            if user_id not in online and not await self._digest_due(user_id, now):
+                continue
+            fields = await redis_client.hgetall(get_coalesce_key(user_id))
+            entries = parse_coalesced_entries(fields)
+            if entries and user_id in online:
+                written += await self._publish_coalesced(user_id, entries)
+            elif entries:
+                await publish_message(user_id, format_digest(entries))
+                written += 1
+            published = [item for field, value in fields.items() if field != "#since" for item in (field, value)]
+            acked_at = time.time()
+            await self._ack(
+                keys=[get_coalesce_key(user_id), due_key],
+                args=[user_id, acked_at, acked_at + self.window_seconds, *published],
+            )
+        return written
+
+    async def _digest_due(self, user_id: str, now: float) -> bool:
+        """True once an offline user's oldest event is a digest interval old; otherwise check again later"""
+        since = await redis_client.hget(get_coalesce_key(user_id), "#since")
+        if since is None:
+            return True
+        digest_at = float(since) + self.digest_interval_seconds
+        if digest_at <= now:
+            return True
+        # Re-check after another window so a user who comes back online is not kept waiting
+        await redis_client.zadd(get_coalesce_due_key(), {user_id: min(digest_at, now + self.window_seconds)}, xx=True)
+        return False
+
+    async def _publish_coalesced(self, user_id: str, entries: List[Dict[str, Any]]) -> int:
+        stream_key : str = get_stream_key(user_id)
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for entry in entries:
+                payload = {
+                    "message": entry["message"],
+                    "timestamp": str(time.time()),
+                    "kind": entry["kind"],
+                    "entity": entry["entity"],
+                    "count": str(entry["count"]),
+                }
+                pipe.xadd(stream_key, payload, maxlen=MAX_STREAM_LENGTH, approximate=True)
+            await pipe.execute()
+        return len(entries)
+
+
+def parse_coalesced_entries(fields: Dict[str, str]) -> List[Dict[str, Any]]:
+    """Turn a user's pending hash into entries with kind, entity, message and count"""
+    entries = []
+    for field, value in fields.items():
+        if field == "#since":
+            continue
+        kind, _, entity = field.partition("|")
+        entries.append({"kind": kind, "entity": entity, **json.loads(value)})
+    return entries
+
+
+def format_digest(entries: List[Dict[str, Any]]) -> str:
+    """One message summarizing everything a user missed, newest counts per (kind, entity)"""
+    total = sum(entry["count"] for entry in entries)
+    lines = [
+        entry["message"] if entry["count"] == 1 else f"{entry['message']} (x{entry['count']})"
+        for entry in entries[:DIGEST_MAX_LINES]
+    ]
+    if len(entries) > DIGEST_MAX_LINES:
+        lines.append(f"and {len(entries) - DIGEST_MAX_LINES} more")
+    return f"{total} notifications while you were away:\n" + "\n".join(lines)
+
+
+# Singleton
+coalescer = NotificationCoalescer(
+    window_seconds=settings.NOTIFICATION_COALESCE_WINDOW_SECONDS,
+    digest_interval_seconds=settings.NOTIFICATION_DIGEST_INTERVAL_SECONDS,
+)
@@ -1,50 +1,82 @@
 
-from src.notification.connection_manager import WebSocket,manager 
-from src.notification.streams import consumer_group , get_pending_notification , listen_for_notifications
-import asyncio
+from src.notification.connection_manager import WebSocket,manager
+from src.notification.streams import consumer_group , get_pending_notification, get_notifications_after
+from src.notification.dispatcher import dispatcher, topic_dispatcher, format_notification_frame
+from src.repositories.notifications import NotificationRepository
+from src.notification.acks import ack_buffer, parse_ack_frame
+from src.notification.presence import presence
+from src.notification.sse import SSEConnection, parse_last_event_id, parse_stream_id
 from src.notification.streams import publish_message
+from src.core.config import settings
+from src.core.database import db
+from src.core.logger import setup_logger
 from fastapi import WebSocket, WebSocketDisconnect
-from fastapi import APIRouter
+from fastapi import APIRouter, Header, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from typing import Optional
 
 
 router = APIRouter(prefix="/api/notifications", tags=["Notifications"])
 
+notification_repo = NotificationRepository()
+logger = setup_logger(__name__)
+
+
+async def subscribe_user_topics(user_id: int) -> list[tuple[str, int]]:
+    """Subscribe a connection to the user's organization and project topics; returns them for unsubscribe"""
+    topics = []
+    try:
+        topics = await notification_repo.get_user_topics(user_id)
+        await topic_dispatcher.subscribe(user_id, topics)
+    except Exception:
+        logger.exception(f"Error subscribing user {user_id} to topics")
+    return topics
+
 
 @router.websocket("/WebSocket/{user_id}/WS_CONNECTION", name="WebSocket Connection")
 async def websocket_endpoint(websocket: WebSocket, user_id: int):
     # Connect the WebSocket using our connection manager.
-    await manager.connect(websocket, str((user_id)))
+    connection = await manager.connect(websocket, str((user_id)))
+
 
-    
 
     # Create the consumer group (if it doesn't exist) for the user's stream.
     try:
         await consumer_group(user_id)
-        
+
     except Exception as e:
         print(e)
+        await manager.disconnect(websocket, str(user_id))
+        await presence.unregister(user_id)
         await websocket.close()
         return
 
     # Fetch and deliver any pending notifications.
     try:
-        pending = await get_pending_notification(user_id)
-        if pending:
-            for msg_id, data in pending:
-                message = data.get("message")
-                if message:
-                    # Send a JSON payload with the message and its unique message_id.
-                    await websocket.send_json({"message_id": msg_id, "message": message})
+        pending = await get_pending_notification(user_id, dispatcher.consumer_name)
+        # Queue the backlog as one frame carrying each message and its unique message_id.
+        frame = format_notification_frame(pending)
+        if frame:
+            connection.enqueue(frame)
         # Do not automatically acknowledge notifications here.
     except Exception as e:
         print("Error processing pending notifications for user %s: %s", user_id, e)
 
-    # Start a background task for listening to real-time notifications.
-    listener_task = asyncio.create_task(listen_for_notifications(user_id, websocket))
+    # New notifications are read by the worker-wide dispatcher and routed through the manager.
+    dispatcher.subscribe(user_id)
+    await presence.register(user_id)
+
+    # Organization and project topics follow the user's memberships at connect time.
+    topics = await subscribe_user_topics(user_id)
 
     try:
         while True:
             data = await websocket.receive_text()
+            # {"ack": [message_id, ...]} frames are acknowledged in bulk by the ack buffer.
+            message_ids = parse_ack_frame(data)
+            if message_ids is not None:
+                ack_buffer.add(user_id, message_ids)
+                continue
             # Echo back or handle client messages.
             await publish_message(user_id, f"[Echo] {data}")
     except WebSocketDisconnect as e:
@@ -52,6 +84,70 @@ async def websocket_endpoint(websocket: WebSocket, user_id: int):
     except Exception as e:
         print("Unexpected error on WebSocket connection: %s", e)
     finally:
+        dispatcher.unsubscribe(user_id)
+        topic_dispatcher.unsubscribe(user_id, topics)
         await manager.disconnect(websocket, str(user_id))
-        listener_task.cancel()
+        await presence.unregister(user_id)
+
+
+@router.get("/stream", name="Notification Stream")
+async def notification_stream(request: Request, last_event_id: Optional[str] = Header(None)):
+    """Server-Sent Events feed of the current user's notifications, resumable with Last-Event-ID"""
+    user = getattr(request.state, "user", None)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not authenticated")
+    user_id = user["id"]
+
+    try:
+        await consumer_group(user_id)
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=f"Notifications unavailable: {e}")
+
+    connection = SSEConnection(
+        str(user_id),
+        max_queue=settings.NOTIFICATION_SEND_QUEUE_SIZE,
+        policy=settings.NOTIFICATION_SLOW_CONSUMER_POLICY,
+        keepalive_seconds=settings.NOTIFICATION_SSE_KEEPALIVE_SECONDS,
+    )
+
+    # Queue the backlog before registering so it precedes live frames.
+    last_id = parse_last_event_id(last_event_id)
+    try:
+        pending = await get_pending_notification(user_id, dispatcher.consumer_name)
+        if last_id is None:
+            backlog = pending
+        else:
+            # The client has everything up to its last event id; replay what the group delivered
+            # after it, and leave undelivered entries to the dispatcher.
+            last_key = parse_stream_id(last_id)
+            ack_buffer.add(user_id, [msg_id for msg_id, _ in pending if parse_stream_id(msg_id) <= last_key])
+            backlog = await get_notifications_after(user_id, last_id)
+        frame = format_notification_frame(backlog)
+        if frame:
+            connection.enqueue(frame)
+    except Exception:
+        logger.exception(f"Error replaying notifications for user {user_id}")
+
+    manager.register(connection)
+    dispatcher.subscribe(user_id)
+    await presence.register(user_id)
+    topics = await subscribe_user_topics(user_id)
+
+    async def event_stream():
+        try:
+            async for event in connection.events(request):
+                yield event
+        finally:
+            dispatcher.unsubscribe(user_id)
+            topic_dispatcher.unsubscribe(user_id, topics)
+            manager.remove(connection)
+            await presence.unregister(user_id)
 
+    # The stream can stay open for hours; do not hold the request's database connection
+    await db.release_request_connection()
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        # Intermediaries must neither cache nor buffer the stream
+        headers={"Cache-Control": "no-cache, no-transform", "X-Accel-Buffering": "no"},
+    )
@@ -1,54 +1,311 @@
-from src.core.database import db
+from datetime import datetime
+from typing import Optional
+
+from src.core.database import db, naive_utc
+
+
+# Materialized views defined in V1_11_analytics_snapshots.sql
+ANALYTICS_SNAPSHOT_VIEWS = (
+    "mv_project_analytics",
+    "mv_user_performance",
+    "mv_sprint_velocity",
+    "mv_team_performance",
+)
+
+# Tenant columns shared by the snapshots, in (organization, workspace, project) order
+SNAPSHOT_SCOPE_COLUMNS = ("organization_id", "workspace_id", "project_id")
+
+# Arbitrary key for pg_try_advisory_lock so only one worker refreshes at a time
+ANALYTICS_REFRESH_LOCK_KEY = 720_091
 
 
 class AnalysisRepository:
 
-    async def User_Performance_Workload_Analysis(self):
+    async def Project_Analytics_Dashboard(self):
         query = """
-        SELECT 
-    u.id as user_id,
-    u.name as user_name,
-    u.email,
-    o.name as organization_name,
-    COUNT(DISTINCT ia.issue_id) as assigned_issues,
-    COUNT(DISTINCT CASE WHEN i.status = 'completed' THEN ia.issue_id END) as completed_issues,
-    COUNT(DISTINCT CASE WHEN i.status = 'open' THEN ia.issue_id END) as open_issues,
-    SUM(i.story_points) as total_story_points_assigned,
-    SUM(CASE WHEN i.status = 'completed' THEN i.story_points ELSE 0 END) as completed_story_points,
-    AVG(i.story_points) as avg_story_points_per_issue,
-    COUNT(DISTINCT ic.id) as comments_made,
-    COUNT(DISTINCT ih.id) as activities_logged,
-    uc.weekly_hours,
-    SUM(uw.hours_spent) as total_hours_spent,
-    CASE 
-        WHEN COUNT(DISTINCT ia.issue_id) = 0 THEN 0
-        ELSE (COUNT(DISTINCT CASE WHEN i.status = 'completed' THEN ia.issue_id END) * 100.0 / COUNT(DISTINCT ia.issue_id))
-    END as completion_rate,
-    TIMESTAMPDIFF(DAY, u.created_at, NOW()) as days_since_joined
-FROM users u
-JOIN organization_users ou ON u.id = ou.user_id
-JOIN organizations o ON ou.organization_id = o.id
-LEFT JOIN issue_assignments ia ON u.id = ia.assigned_to
-LEFT JOIN issues i ON ia.issue_id = i.id
-LEFT JOIN issue_comments ic ON u.id = ic.user_id
-LEFT JOIN issue_history ih ON u.id = ih.user_id
-LEFT JOIN user_capacity uc ON u.id = uc.user_id AND o.id = uc.organization_id
-LEFT JOIN user_workload uw ON ia.id = uw.issue_assignments_id
-GROUP BY u.id, u.name, u.email, o.name, uc.weekly_hours, u.created_at
-ORDER BY completion_rate DESC, total_story_points_assigned DESC;
-
+        SELECT *
+        FROM mv_project_analytics
+        ORDER BY completion_percentage DESC, total_issues DESC
         """
-        return await db.execute_query(query)
-
+        return await db.execute_query(query, read_only=True)
 
-  
+    def _scope_predicates(self, params: list, organization_id: Optional[int] = None,
+                          workspace_id: Optional[int] = None, project_id: Optional[int] = None,
+                          columns: tuple = SNAPSHOT_SCOPE_COLUMNS) -> list[str]:
+        """Append scope values to params and return predicates on the given tenant columns"""
+        predicates = []
+        for column, value in zip(columns, (organization_id, workspace_id, project_id)):
+            if value is not None:
+                params.append(value)
+                predicates.append(f"{column} = ${len(params)}")
+        return predicates
 
+    def _scoped_issues_cte(self, params: list, organization_id: Optional[int] = None,
+                           workspace_id: Optional[int] = None, project_id: Optional[int] = None,
+                           date_from: Optional[datetime] = None, date_to: Optional[datetime] = None) -> str:
+        """Build scoped_projects / scoped_issues CTEs so live queries start from one tenant's rows"""
+        project_predicates = self._scope_predicates(
+            params, organization_id, workspace_id, project_id, columns=("w.organization_id", "p.workspace_id", "p.id")
+        )
+        issue_predicates = []
+        if date_from is not None:
+            params.append(naive_utc(date_from))
+            issue_predicates.append(f"i.created_at >= ${len(params)}")
+        if date_to is not None:
+            params.append(naive_utc(date_to))
+            issue_predicates.append(f"i.created_at < ${len(params)}")
+        return f"""
+        scoped_projects AS (
+            SELECT p.id, p.workspace_id, w.organization_id
+            FROM projects p
+            JOIN workspaces w ON p.workspace_id = w.id
+            WHERE {' AND '.join(project_predicates) or 'TRUE'}
+        ),
+        scoped_issues AS (
+            SELECT i.id, i.project_id, i.status, i.story_points, i.created_at, i.updated_at
+            FROM scoped_projects sp
+            JOIN issues i ON i.project_id = sp.id
+            WHERE {' AND '.join(issue_predicates) or 'TRUE'}
+        )"""
 
+    @staticmethod
+    def _needs_live_query(workspace_id: Optional[int], project_id: Optional[int],
+                          date_from: Optional[datetime], date_to: Optional[datetime]) -> bool:
+        """Snapshots hold all-time figures per organization; narrower slices are computed live"""
+        return any(value is not None for value in (workspace_id, project_id, date_from, date_to))
 
+    async def User_Performance_Workload_Analysis(self, organization_id: int,
+                                                 workspace_id: Optional[int] = None,
+                                                 project_id: Optional[int] = None,
+                                                 date_from: Optional[datetime] = None,
+                                                 date_to: Optional[datetime] = None):
+        params = []
+        if not self._needs_live_query(workspace_id, project_id, date_from, date_to):
+            predicates = self._scope_predicates(params, organization_id=organization_id)
+            query = f"""
+            SELECT *
+            FROM mv_user_performance
+            WHERE {' AND '.join(predicates) or 'TRUE'}
+            ORDER BY completion_rate DESC, total_story_points_assigned DESC NULLS LAST
+            """
+            return await db.execute_query(query, params, read_only=True)
 
+        scoped = self._scoped_issues_cte(params, organization_id, workspace_id, project_id, date_from, date_to)
+        query = f"""
+        WITH {scoped},
+        assigned AS (
+            SELECT DISTINCT ia.id AS assignment_id, ia.assigned_to AS user_id, si.id AS issue_id,
+                   si.status, si.story_points
+            FROM scoped_issues si
+            JOIN issue_assignments ia ON ia.issue_id = si.id
+        ),
+        assignment_stats AS (
+            SELECT a.user_id,
+                COUNT(DISTINCT a.issue_id) AS assigned_issues,
+                COUNT(DISTINCT a.issue_id) FILTER (WHERE a.status = 'completed') AS completed_issues,
+                COUNT(DISTINCT a.issue_id) FILTER (WHERE a.status = 'open') AS open_issues,
+                SUM(a.story_points) AS total_story_points_assigned,
+                SUM(a.story_points) FILTER (WHERE a.status = 'completed') AS completed_story_points,
+                AVG(a.story_points) AS avg_story_points_per_issue
+            FROM assigned a
+            GROUP BY a.user_id
+        ),
+        hours_stats AS (
+            SELECT a.user_id, SUM(uw.hours_spent) AS total_hours_spent
+            FROM assigned a
+            JOIN user_workload uw ON uw.issue_assignments_id = a.assignment_id
+            GROUP BY a.user_id
+        ),
+        comment_stats AS (
+            SELECT ic.user_id, COUNT(*) AS comments_made
+            FROM scoped_issues si
+            JOIN issue_comments ic ON ic.issue_id = si.id
+            GROUP BY ic.user_id
+        ),
+        history_stats AS (
+            SELECT ih.user_id, COUNT(*) AS activities_logged
+            FROM scoped_issues si
+            JOIN issue_history ih ON ih.issue_id = si.id
+            GROUP BY ih.user_id
+        ),
+        scoped_members AS (
+            SELECT DISTINCT ou.user_id, ou.organization_id
+            FROM organization_users ou
+            WHERE ou.organization_id IN (SELECT organization_id FROM scoped_projects)
+        )
+        SELECT u.id AS user_id,
+            o.id AS organization_id,
+            u.name AS user_name,
+            u.email,
+            o.name AS organization_name,
+            COALESCE(ast.assigned_issues, 0) AS assigned_issues,
+            COALESCE(ast.completed_issues, 0) AS completed_issues,
+            COALESCE(ast.open_issues, 0) AS open_issues,
+            ast.total_story_points_assigned,
+            COALESCE(ast.completed_story_points, 0) AS completed_story_points,
+            ast.avg_story_points_per_issue,
+            COALESCE(cs.comments_made, 0) AS comments_made,
+            COALESCE(hs.activities_logged, 0) AS activities_logged,
+            (SELECT MAX(uc.weekly_hours) FROM user_capacity uc
+             WHERE uc.user_id = u.id AND uc.organization_id = o.id) AS weekly_hours,
+            hrs.total_hours_spent,
+            CASE
+                WHEN COALESCE(ast.assigned_issues, 0) = 0 THEN 0
+                ELSE ast.completed_issues * 100.0 / ast.assigned_issues
+            END AS completion_rate,
+            EXTRACT(DAY FROM (NOW() - u.created_at)) AS days_since_joined,
+            NOW() AS computed_at
+        FROM scoped_members sm
+        JOIN users u ON u.id = sm.user_id
+        JOIN organizations o ON o.id = sm.organization_id
+        LEFT JOIN assignment_stats ast ON ast.user_id = u.id
+        LEFT JOIN hours_stats hrs ON hrs.user_id = u.id
+        LEFT JOIN comment_stats cs ON cs.user_id = u.id
+        LEFT JOIN history_stats hs ON hs.user_id = u.id
+        WHERE ast.user_id IS NOT NULL OR cs.user_id IS NOT NULL OR hs.user_id IS NOT NULL
+        ORDER BY completion_rate DESC, total_story_points_assigned DESC NULLS LAST
+        """
+        return await db.execute_query(query, params, read_only=True)
 
+    async def Sprint_Velocity_Analysis(self, organization_id: int,
+                                       workspace_id: Optional[int] = None,
+                                       project_id: Optional[int] = None,
+                                       date_from: Optional[datetime] = None,
+                                       date_to: Optional[datetime] = None):
+        # Sprint rows already carry their tenant columns, so every scope reads the snapshot
+        params = []
+        predicates = self._scope_predicates(params, organization_id, workspace_id, project_id)
+        if date_from is not None:
+            params.append(naive_utc(date_from).date())
+            predicates.append(f"end_date >= ${len(params)}")
+        if date_to is not None:
+            params.append(naive_utc(date_to).date())
+            predicates.append(f"start_date < ${len(params)}")
+        query = f"""
+        SELECT *
+        FROM mv_sprint_velocity
+        WHERE {' AND '.join(predicates) or 'TRUE'}
+        ORDER BY start_date DESC
+        """
+        return await db.execute_query(query, params, read_only=True)
 
+    async def Team_Performance_Collaboration_Metrics(self, organization_id: int,
+                                                     workspace_id: Optional[int] = None,
+                                                     project_id: Optional[int] = None,
+                                                     date_from: Optional[datetime] = None,
+                                                     date_to: Optional[datetime] = None):
+        params = []
+        if not self._needs_live_query(workspace_id, project_id, date_from, date_to):
+            predicates = self._scope_predicates(params, organization_id=organization_id)
+            query = f"""
+            SELECT *
+            FROM mv_team_performance
+            WHERE {' AND '.join(predicates) or 'TRUE'}
+            ORDER BY team_completion_rate DESC, total_story_points_worked DESC NULLS LAST
+            """
+            return await db.execute_query(query, params, read_only=True)
 
+        scoped = self._scoped_issues_cte(params, organization_id, workspace_id, project_id, date_from, date_to)
+        query = f"""
+        WITH {scoped},
+        team_projects AS (
+            SELECT DISTINCT pt.team_id, pt.project_id
+            FROM scoped_projects sp
+            JOIN project_teams pt ON pt.project_id = sp.id
+        ),
+        team_issues AS (
+            SELECT DISTINCT tp.team_id, si.id AS issue_id, si.status, si.story_points,
+                   si.created_at, si.updated_at
+            FROM team_projects tp
+            JOIN scoped_issues si ON si.project_id = tp.project_id
+        ),
+        issue_stats AS (
+            SELECT ti.team_id,
+                COUNT(*) AS total_issues_worked,
+                SUM(ti.story_points) AS total_story_points_worked,
+                COUNT(*) FILTER (WHERE ti.status = 'completed') AS completed_issues,
+                AVG(EXTRACT(EPOCH FROM (ti.updated_at - ti.created_at)) / 3600) AS avg_issue_resolution_time
+            FROM team_issues ti
+            GROUP BY ti.team_id
+        ),
+        comment_stats AS (
+            SELECT ti.team_id, COUNT(*) AS team_comments
+            FROM team_issues ti
+            JOIN issue_comments ic ON ic.issue_id = ti.issue_id
+            GROUP BY ti.team_id
+        ),
+        history_stats AS (
+            SELECT ti.team_id, COUNT(*) AS team_activities
+            FROM team_issues ti
+            JOIN issue_history ih ON ih.issue_id = ti.issue_id
+            GROUP BY ti.team_id
+        ),
+        velocity_stats AS (
+            SELECT tv.team_id, AVG(tv.avg_hours_per_point) AS team_velocity
+            FROM team_projects tp
+            JOIN team_velocity tv ON tv.team_id = tp.team_id AND tv.project_id = tp.project_id
+            GROUP BY tv.team_id
+        )
+        SELECT t.id AS team_id,
+            t.organization_id,
+            t.name AS team_name,
+            o.name AS organization_name,
+            (SELECT COUNT(DISTINCT ut.user_id) FROM user_team ut WHERE ut.team_id = t.id) AS team_members,
+            (SELECT COUNT(DISTINCT tw.workspace_id) FROM team_workspaces tw
+             WHERE tw.team_id = t.id
+               AND tw.workspace_id IN (SELECT workspace_id FROM scoped_projects)) AS workspaces_assigned,
+            (SELECT COUNT(*) FROM team_projects tp WHERE tp.team_id = t.id) AS projects_assigned,
+            COALESCE(ist.total_issues_worked, 0) AS total_issues_worked,
+            ist.total_story_points_worked,
+            vs.team_velocity,
+            COALESCE(cs.team_comments, 0) AS team_comments,
+            COALESCE(hs.team_activities, 0) AS team_activities,
+            ist.avg_issue_resolution_time,
+            COALESCE(ist.completed_issues, 0) AS completed_issues,
+            CASE
+                WHEN COALESCE(ist.total_issues_worked, 0) = 0 THEN 0
+                ELSE ist.completed_issues * 100.0 / ist.total_issues_worked
+            END AS team_completion_rate,
+            NOW() AS computed_at
+        FROM teams t
+        JOIN organizations o ON t.organization_id = o.id
+        LEFT JOIN issue_stats ist ON ist.team_id = t.id
+        LEFT JOIN comment_stats cs ON cs.team_id = t.id
+        LEFT JOIN history_stats hs ON hs.team_id = t.id
+        LEFT JOIN velocity_stats vs ON vs.team_id = t.id
+        WHERE t.id IN (SELECT team_id FROM team_projects)
+        ORDER BY team_completion_rate DESC, total_story_points_worked DESC NULLS LAST
+        """
+        return await db.execute_query(query, params, read_only=True)
 
+    def stream_snapshot(self, view: str, organization_id: int, chunk_size: Optional[int] = None):
+        """Stream one organization's rows of an analytics snapshot in chunks of Records"""
+        if view not in ANALYTICS_SNAPSHOT_VIEWS:
+            raise ValueError(f"Unknown analytics snapshot: {view}")
+        params = []
+        predicates = self._scope_predicates(params, organization_id)
+        return db.stream(f"SELECT * FROM {view} WHERE {' AND '.join(predicates)}", params,
+                         chunk_size=chunk_size, read_only=True)
 
+    async def get_snapshot_status(self):
+        """Return computed_at for every analytics snapshot"""
+        query = " UNION ALL ".join(
+            f"SELECT '{view}' AS view_name, MAX(computed_at) AS computed_at FROM {view}"
+            for view in ANALYTICS_SNAPSHOT_VIEWS
+        )
+        return await db.execute_query(query, read_only=True)
 
+    async def refresh_snapshots(self) -> bool:
+        """Refresh all analytics snapshots concurrently; False if another worker holds the lock"""
+        async for conn in db.connection(role="background"):
+            locked = await conn.fetchval("SELECT pg_try_advisory_lock($1)", ANALYTICS_REFRESH_LOCK_KEY)
+            if not locked:
+                return False
+            try:
+                for view in ANALYTICS_SNAPSHOT_VIEWS:
+                    await conn.execute(
+                        f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}", timeout=db.command_timeout("background")
+                    )
+            finally:
+                await conn.execute("SELECT pg_advisory_unlock($1)", ANALYTICS_REFRESH_LOCK_KEY)
+            return True
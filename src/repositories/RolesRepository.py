@@ -1,6 +1,10 @@
 from typing import List, Optional
+from src.core.cache import bump_version
 from src.core.database import db
 
+# Versioned cache of per-user permission sets, see src/dependencies/permission.py
+PERMISSIONS_CACHE = "permissions"
+
 class RolesRepository:
     async def list_organization_roles(self, organization_id: int):
         query = """
@@ -31,9 +35,10 @@ class RolesRepository:
         # Remove role <-> permissions, user <-> role links, then role
         async for conn in db.connection():
             async with conn.transaction():
-                await conn.execute("DELETE FROM role_permissions WHERE role_id = $1", [role_id])
-                await conn.execute("DELETE FROM user_role WHERE role_id = $1", [role_id])
-                await conn.execute("DELETE FROM roles WHERE id = $1", [role_id])
+                await conn.execute("DELETE FROM role_permissions WHERE role_id = $1", role_id)
+                await conn.execute("DELETE FROM user_role WHERE role_id = $1", role_id)
+                await conn.execute("DELETE FROM roles WHERE id = $1", role_id)
+        await bump_version(PERMISSIONS_CACHE)
 
     async def list_all_permissions(self) :
         query = """
@@ -50,9 +55,11 @@ class RolesRepository:
                 """
         try:
             # 👇 correct parameter order!
-            return await db.execute_insert(query, [role_id, permission_name])
+            result = await db.execute_insert(query, [role_id, permission_name])
         except Exception as e:
             raise ValueError(f"Failed to add permission: {e}")
+        await bump_version(PERMISSIONS_CACHE)
+        return result
 
 
     async def remove_permission_from_role(self, role_id: int, permission_id: int) -> None:
@@ -61,6 +68,7 @@ class RolesRepository:
         WHERE role_id = $1 AND permission_id = $2
         """
         await db.execute_query(query, [role_id, permission_id])
+        await bump_version(PERMISSIONS_CACHE)
 
     async def list_role_permissions(self, role_id: int):
         query = """
@@ -116,6 +124,18 @@ class RolesRepository:
      return len(rows) > 0
 
 
+    async def get_user_permission_names(self, user_id: int) -> list[str]:
+        """Get the names of every permission granted to a user through their roles"""
+        query = """
+        SELECT DISTINCT p.name
+        FROM user_role ur
+        JOIN role_permissions rp ON ur.role_id = rp.role_id
+        JOIN permissions p ON rp.permission_id = p.id
+        WHERE ur.user_id = $1
+        """
+        rows = await db.execute_query(query, [user_id])
+        return [row["name"] for row in rows]
+
     async def get_role_permissions(self, organization_id: int):
       try:
         query = """
@@ -137,6 +157,8 @@ class RolesRepository:
         VALUES ($1, $2)
     """
      try:
-        return await db.execute_insert(query, [user_id, role_id])
+        result = await db.execute_insert(query, [user_id, role_id])
      except Exception as e:
         raise ValueError(f"Error assigning role: {e}")
+     await bump_version(PERMISSIONS_CACHE)
+     return result
@@ -1,9 +1,45 @@
-from src.core.database import db
+from src.core.database import db, naive_utc
+from src.core.pagination import DEFAULT_PAGE_SIZE, decode_cursor
+from src.repositories.notifications import NotificationRepository
+from datetime import datetime
 from typing import Optional
 
+# Columns returned by issue writes so callers never need to re-read the row
+ISSUE_RETURNING_COLUMNS = """id, project_id, type_id, title, description, story_points, status,
+               priority, created_by, parent_issue_id, created_at, updated_at"""
+LABEL_RETURNING_COLUMNS = "id, project_id, name, description, color, created_at"
+
+# Columns update_issues_bulk can write: (array type, whether None clears the value)
+BULK_UPDATE_COLUMNS = {
+    "title": ("text", False),
+    "description": ("text", True),
+    "story_points": ("int", True),
+    "status": ("text", False),
+    "priority": ("text", False),
+    "type_id": ("int", True),
+    "parent_issue_id": ("int", True),
+}
+
+# Hot lookups prepared once per connection through the database query registry
+ISSUE_BY_ID = db.register("issue_by_id", f"""
+SELECT {ISSUE_RETURNING_COLUMNS}
+FROM issues
+WHERE id = $1
+""")
+ISSUE_EXISTS = db.register("issue_exists", "SELECT 1 FROM issues WHERE id = $1")
+
 
 class IssueRepository:
 
+    def _keyset_predicate(self, cursor: Optional[str], params: list,
+                          sort_column: str = "i.created_at", id_column: str = "i.id") -> str:
+        """Append the cursor bounds to params and return the matching keyset predicate"""
+        if not cursor:
+            return ""
+        sort_value, row_id = decode_cursor(cursor)
+        params.extend([sort_value, row_id])
+        return f"AND ({sort_column}, {id_column}) < (${len(params) - 1}, ${len(params)})"
+
     async def create_issue_type(self, name: str):
        """Create a new issue type"""
        query = """
@@ -74,45 +110,215 @@ class IssueRepository:
                           type_id: Optional[int] = None, description: Optional[str] = None, 
                           story_points: Optional[int] = None, status: str = "open", 
                           priority: str = "medium", parent_issue_id: Optional[int] = None):
-        """Create a new issue"""
-        query = """
+        """Create a new issue and return the inserted row"""
+        query = f"""
         INSERT INTO issues (project_id, type_id, title, description, story_points, 
                           status, priority, created_by, parent_issue_id) 
         VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
-        RETURNING id
+        RETURNING {ISSUE_RETURNING_COLUMNS}
         """
         try:
-         return await db.execute_insert(query, [project_id, type_id, title, description,
-                                              story_points, status, priority, created_by, parent_issue_id])
+         rows = await db.execute_query(query, [project_id, type_id, title, description,
+                                               story_points, status, priority, created_by, parent_issue_id])
+         return rows[0] if rows else None
         except Exception as e:
             print("error in the query",e)
 
-    async def get_issues_by_project(self, project_id: int):
-        """Get all issues for a specific project"""
-        query = """
+    async def create_issues_bulk(self, project_id: int, created_by: int, issues: list[dict]) -> list[dict]:
+        """Insert many issues in one statement and return the inserted rows in input order"""
+        if not issues:
+            return []
+
+        query = f"""
+        INSERT INTO issues (project_id, type_id, title, description, story_points, 
+                          status, priority, created_by, parent_issue_id) 
+        SELECT $1, t.type_id, t.title, t.description, t.story_points, t.status, t.priority, $2, t.parent_issue_id
+        FROM unnest($3::int[], $4::text[], $5::text[], $6::int[], $7::text[], $8::text[], $9::int[])
+             WITH ORDINALITY AS t(type_id, title, description, story_points, status, priority, parent_issue_id, ord)
+        ORDER BY t.ord
+        RETURNING {ISSUE_RETURNING_COLUMNS}
+        """
+        columns = ["type_id", "title", "description", "story_points", "status", "priority", "parent_issue_id"]
+        params = [project_id, created_by] + [[issue.get(column) for issue in issues] for column in columns]
+        rows = await db.execute_query(query, params)
+        # Serial ids are assigned in insertion order, which follows ORDER BY t.ord
+        return sorted(rows, key=lambda row: row["id"])
+
+    async def update_issues_bulk(self, updates: list[dict]) -> list[dict]:
+        """Apply per-issue partial updates in one statement and return the updated rows
+
+        Each update needs an id; only the fields it contains are written, so a nullable
+        field given as None is cleared (None for title, status or priority is ignored).
+        Ids that do not exist are simply absent from the result.
+        """
+        if not updates:
+            return []
+
+        # Only columns some update supplies; a per-row flag keeps the current value elsewhere
+        columns = [column for column in BULK_UPDATE_COLUMNS if any(column in update for update in updates)]
+        params = [[update["id"] for update in updates]]
+        if not columns:
+            query = f"SELECT {ISSUE_RETURNING_COLUMNS} FROM issues WHERE id = ANY($1::int[])"
+            return await db.execute_query(query, params)
+
+        arrays = ["$1::int[]"]
+        names = ["id"]
+        set_clauses = []
+        for column in columns:
+            array_type, nullable = BULK_UPDATE_COLUMNS[column]
+            params.append([update.get(column) for update in updates])
+            params.append([column in update and (nullable or update[column] is not None) for update in updates])
+            arrays += [f"${len(params) - 1}::{array_type}[]", f"${len(params)}::bool[]"]
+            names += [column, f"{column}_set"]
+            set_clauses.append(f"{column} = CASE WHEN u.{column}_set THEN u.{column} ELSE i.{column} END")
+
+        query = f"""
+        UPDATE issues i
+        SET {', '.join(set_clauses)}
+        FROM unnest({', '.join(arrays)}) AS u({', '.join(names)})
+        WHERE i.id = u.id
+        RETURNING i.id, i.project_id, i.type_id, i.title, i.description, 
+                  i.story_points, i.status, i.priority, i.created_by, i.parent_issue_id,
+                  i.created_at, i.updated_at
+        """
+        rows = await db.execute_query(query, params)
+
+        # Same workload tracking as update_issue for issues moved to done
+        done_ids = {update["id"] for update in updates if update.get("status") == "done"}
+        for row in rows:
+            if row["id"] in done_ids:
+                await self._track_workload_on_completion(row["id"])
+
+        return rows
+
+    async def get_existing_issue_type_ids(self, type_ids: list[int]) -> set[int]:
+        """Return which of the given issue type IDs exist"""
+        if not type_ids:
+            return set()
+        query = """
+        SELECT id
+        FROM issue_types
+        WHERE id = ANY($1::int[])
+        """
+        rows = await db.execute_query(query, [list(type_ids)])
+        return {row["id"] for row in rows}
+
+    async def get_issue_project_ids(self, issue_ids: list[int]) -> dict[int, int]:
+        """Map each of the given issue IDs that exists to its project ID"""
+        if not issue_ids:
+            return {}
+        query = """
+        SELECT id, project_id
+        FROM issues
+        WHERE id = ANY($1::int[])
+        """
+        rows = await db.execute_query(query, [list(issue_ids)])
+        return {row["id"]: row["project_id"] for row in rows}
+
+    async def get_existing_project_issue_ids(self, project_id: int, issue_ids: list[int]) -> set[int]:
+        """Return which of the given issue IDs exist in the project"""
+        if not issue_ids:
+            return set()
+        query = """
+        SELECT id
+        FROM issues
+        WHERE project_id = $1 AND id = ANY($2::int[])
+        """
+        rows = await db.execute_query(query, [project_id, list(issue_ids)])
+        return {row["id"] for row in rows}
+
+    async def get_issues_by_project(self, project_id: int, limit: int = DEFAULT_PAGE_SIZE,
+                                    cursor: Optional[str] = None):
+        """Get a page of issues for a specific project (fetches limit + 1 rows to detect the next page)"""
+        params = [project_id]
+        keyset = self._keyset_predicate(cursor, params)
+        params.append(limit + 1)
+        query = f"""
         SELECT i.id, i.project_id, i.type_id, i.title, i.description, 
                i.story_points, i.status, i.priority, i.created_by, i.parent_issue_id,
                i.created_at, i.updated_at
         FROM issues i
-        WHERE i.project_id = $1
-        ORDER BY i.created_at DESC
+        WHERE i.project_id = $1 {keyset}
+        ORDER BY i.created_at DESC, i.id DESC
+        LIMIT ${len(params)}
         """
-        return await db.execute_query(query, [project_id])
+        return await db.fetch_records(query, params, read_only=True)
 
-    async def get_issue_by_id(self, issue_id: int):
-        """Get a specific issue by ID"""
-        query = """
+    def stream_project_issues(self, project_id: int, chunk_size: Optional[int] = None):
+        """Stream every issue of a project in chunks of Records, newest first"""
+        query = f"""
+        SELECT {ISSUE_RETURNING_COLUMNS}
+        FROM issues
+        WHERE project_id = $1
+        ORDER BY created_at DESC, id DESC
+        """
+        return db.stream(query, [project_id], chunk_size=chunk_size, read_only=True)
+
+    def _issue_filter_predicates(self, params: list, status: Optional[str] = None,
+                                 priority: Optional[str] = None, type_id: Optional[int] = None,
+                                 assigned_to: Optional[int] = None, label_id: Optional[int] = None,
+                                 sprint_id: Optional[int] = None, created_from: Optional[datetime] = None,
+                                 created_to: Optional[datetime] = None) -> list[str]:
+        """Append filter values to params and return the matching WHERE predicates"""
+        predicates = []
+
+        def bind(value) -> str:
+            params.append(value)
+            return f"${len(params)}"
+
+        if status is not None:
+            predicates.append(f"i.status = {bind(status)}")
+        if priority is not None:
+            predicates.append(f"i.priority = {bind(priority)}")
+        if type_id is not None:
+            predicates.append(f"i.type_id = {bind(type_id)}")
+        if created_from is not None:
+            predicates.append(f"i.created_at >= {bind(naive_utc(created_from))}")
+        if created_to is not None:
+            predicates.append(f"i.created_at < {bind(naive_utc(created_to))}")
+        # Link-table filters use EXISTS so an issue is never duplicated by the join
+        if assigned_to is not None:
+            predicates.append(
+                f"EXISTS (SELECT 1 FROM issue_assignments ia WHERE ia.issue_id = i.id AND ia.assigned_to = {bind(assigned_to)})"
+            )
+        if label_id is not None:
+            predicates.append(
+                f"EXISTS (SELECT 1 FROM issue_labels il WHERE il.issue_id = i.id AND il.label_id = {bind(label_id)})"
+            )
+        if sprint_id is not None:
+            predicates.append(
+                f"EXISTS (SELECT 1 FROM issue_sprints isp WHERE isp.issue_id = i.id AND isp.sprint_id = {bind(sprint_id)})"
+            )
+        return predicates
+
+    async def get_issues_with_filters(self, project_id: int, limit: int = DEFAULT_PAGE_SIZE,
+                                      cursor: Optional[str] = None, **filters):
+        """Get a page of project issues matching any combination of filters (limit + 1 rows)
+
+        Supported filters: status, priority, type_id, assigned_to, label_id, sprint_id,
+        created_from and created_to. Filters set to None are ignored.
+        """
+        params = [project_id]
+        predicates = ["i.project_id = $1"] + self._issue_filter_predicates(params, **filters)
+        keyset = self._keyset_predicate(cursor, params)
+        params.append(limit + 1)
+        query = f"""
         SELECT i.id, i.project_id, i.type_id, i.title, i.description, 
                i.story_points, i.status, i.priority, i.created_by, i.parent_issue_id,
                i.created_at, i.updated_at
         FROM issues i
-        WHERE i.id = $1
+        WHERE {' AND '.join(predicates)} {keyset}
+        ORDER BY i.created_at DESC, i.id DESC
+        LIMIT ${len(params)}
         """
-        result = await db.execute_query(query, [issue_id])
-        return result[0] if result else None
+        return await db.fetch_records(query, params, read_only=True)
+
+    async def get_issue_by_id(self, issue_id: int):
+        """Get a specific issue by ID as a Record (mapping access, no dict copy)"""
+        return await db.fetchrow_prepared(ISSUE_BY_ID, [issue_id])
 
     async def update_issue(self, issue_id: int, **kwargs):
-        """Update an existing issue"""
+        """Update an existing issue and return the updated row, or None if it does not exist"""
         # Build dynamic query based on provided fields
         set_clauses = []
         values = []
@@ -132,17 +338,18 @@ class IssueRepository:
         UPDATE issues 
         SET {', '.join(set_clauses)}
         WHERE id = ${index}
+        RETURNING {ISSUE_RETURNING_COLUMNS}
         """
         values.append(issue_id)
-        result = await db.execute_query(query, values)
+        rows = await db.execute_query(query, values)
+        if not rows:
+            return None
 
         # Handle workload tracking after successful update
-        print("this is status")
-        print(kwargs.get('status'))
         if kwargs.get('status') == "done":
             await self._track_workload_on_completion(issue_id)
 
-        return result
+        return rows[0]
 
     async def _track_workload_on_completion(self, issue_id: int):
         """Track workload when issue is marked as done and remove the assignments"""
@@ -172,37 +379,49 @@ class IssueRepository:
                 """
                 await conn.execute(delete_query, (issue_id,))
 
-    async def delete_issue(self, issue_id: int):
-        """Delete an issue"""
+    async def delete_issue(self, issue_id: int) -> bool:
+        """Delete an issue, returning False if it did not exist"""
         query = """
         DELETE FROM issues 
         WHERE id = $1
+        RETURNING id
         """
-        return await db.execute_query(query, [issue_id])
+        rows = await db.execute_query(query, [issue_id])
+        return len(rows) > 0
 
-    async def get_issues_by_status(self, project_id: int, status: str):
-        """Get all issues with a specific status for a project"""
-        query = """
+    async def get_issues_by_status(self, project_id: int, status: str, limit: int = DEFAULT_PAGE_SIZE,
+                                   cursor: Optional[str] = None):
+        """Get a page of issues with a specific status for a project (limit + 1 rows)"""
+        params = [project_id, status]
+        keyset = self._keyset_predicate(cursor, params)
+        params.append(limit + 1)
+        query = f"""
         SELECT i.id, i.project_id, i.type_id, i.title, i.description, 
                i.story_points, i.status, i.priority, i.created_by, i.parent_issue_id,
                i.created_at, i.updated_at
         FROM issues i
-        WHERE i.project_id = $1 AND i.status = $2
-        ORDER BY i.created_at DESC
-        """
-        return await db.execute_query(query, [project_id, status])
-
-    async def get_issues_by_priority(self, project_id: int, priority: str):
-        """Get all issues with a specific priority for a project"""
-        query = """
+        WHERE i.project_id = $1 AND i.status = $2 {keyset}
+        ORDER BY i.created_at DESC, i.id DESC
+        LIMIT ${len(params)}
+        """
+        return await db.fetch_records(query, params, read_only=True)
+
+    async def get_issues_by_priority(self, project_id: int, priority: str, limit: int = DEFAULT_PAGE_SIZE,
+                                   cursor: Optional[str] = None):
+        """Get a page of issues with a specific priority for a project (limit + 1 rows)"""
+        params = [project_id, priority]
+        keyset = self._keyset_predicate(cursor, params)
+        params.append(limit + 1)
+        query = f"""
         SELECT i.id, i.project_id, i.type_id, i.title, i.description, 
                i.story_points, i.status, i.priority, i.created_by, i.parent_issue_id,
                i.created_at, i.updated_at
         FROM issues i
-        WHERE i.project_id = $1 AND i.priority = $2
-        ORDER BY i.created_at DESC
+        WHERE i.project_id = $1 AND i.priority = $2 {keyset}
+        ORDER BY i.created_at DESC, i.id DESC
+        LIMIT ${len(params)}
         """
-        return await db.execute_query(query, [project_id, priority])
+        return await db.fetch_records(query, params, read_only=True)
 
     async def get_sub_issues(self, parent_issue_id: int):
         """Get all sub-issues (children) of a parent issue"""
@@ -218,46 +437,17 @@ class IssueRepository:
 
     async def issue_exists(self, issue_id: int):
         """Check if an issue exists"""
-        query = """
-        SELECT COUNT(*) as count 
-        FROM issues 
-        WHERE id = $1
-        """
-        result = await db.execute_query(query, [issue_id])
-        return result[0]['count'] > 0 if result else False
+        return await db.fetchrow_prepared(ISSUE_EXISTS, [issue_id]) is not None
 
     # Analytics methods
     async def project_analytics_dashboard(self):
-        """Get project analytics dashboard data"""
+        """Get project analytics dashboard data from its materialized snapshot"""
         query = """
-        SELECT 
-            p.id as project_id,
-            p.name as project_name,
-            w.name as workspace_name,
-            o.name as organization_name,
-            COUNT(DISTINCT i.id) as total_issues,
-            COUNT(DISTINCT CASE WHEN i.status = 'open' THEN i.id END) as open_issues,
-            COUNT(DISTINCT CASE WHEN i.status = 'in-progress' THEN i.id END) as in_progress_issues,
-            COUNT(DISTINCT CASE WHEN i.status = 'completed' THEN i.id END) as completed_issues,
-            AVG(i.story_points) as avg_story_points,
-            SUM(i.story_points) as total_story_points,
-            COUNT(DISTINCT i.created_by) as contributors,
-            COUNT(DISTINCT ic.id) as total_comments,
-            EXTRACT(DAY FROM (NOW() - p.created_at)) as project_age_days,
-            CASE 
-                WHEN COUNT(DISTINCT i.id) = 0 THEN 0
-                ELSE (COUNT(DISTINCT CASE WHEN i.status = 'completed' THEN i.id END) * 100.0 / COUNT(DISTINCT i.id))
-            END as completion_percentage
-        FROM projects p
-        JOIN workspaces w ON p.workspace_id = w.id
-        JOIN organizations o ON w.organization_id = o.id
-        LEFT JOIN issues i ON p.id = i.project_id
-        LEFT JOIN issue_comments ic ON i.id = ic.issue_id
-        WHERE p.status = 'active'
-        GROUP BY p.id, p.name, w.name, o.name, p.created_at
+        SELECT *
+        FROM mv_project_analytics
         ORDER BY completion_percentage DESC, total_issues DESC
         """
-        return await db.execute_query(query)
+        return await db.execute_query(query, read_only=True)
 
     # Issue Assignment methods
     async def assign_issue(self, issue_id: int, assigned_to: int, assigned_by: int) -> int:
@@ -312,32 +502,27 @@ class IssueRepository:
         result = await db.execute_query(query, [issue_id])
         return result[0]['count'] > 0 if result else False
 
-    async def get_user_assigned_issues(self, user_id: int, project_id: Optional[int] = None) -> list[dict]:
-        """Get all issues assigned to a user"""
+    async def get_user_assigned_issues(self, user_id: int, project_id: Optional[int] = None,
+                                       limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> list[dict]:
+        """Get a page of issues assigned to a user, most recently assigned first (limit + 1 rows)"""
+        params = [user_id]
+        project_filter = ""
         if project_id:
-            query = """
-            SELECT i.id, i.project_id, i.type_id, i.title, i.description, 
-                   i.story_points, i.status, i.priority, i.created_by, i.parent_issue_id,
-                   i.created_at, i.updated_at, ia.assigned_at, ia.assigned_by
-            FROM issue_assignments ia
-            JOIN issues i ON ia.issue_id = i.id
-            WHERE ia.assigned_to = $1 AND i.project_id = $2
-            ORDER BY ia.assigned_at DESC
-            """
-            params = [user_id, project_id]
-        else:
-            query = """
-            SELECT i.id, i.project_id, i.type_id, i.title, i.description, 
-                   i.story_points, i.status, i.priority, i.created_by, i.parent_issue_id,
-                   i.created_at, i.updated_at, ia.assigned_at, ia.assigned_by
-            FROM issue_assignments ia
-            JOIN issues i ON ia.issue_id = i.id
-            WHERE ia.assigned_to = $1
-            ORDER BY ia.assigned_at DESC
-            """
-            params = [user_id]
-        
-        return await db.execute_query(query, params)
+            params.append(project_id)
+            project_filter = "AND i.project_id = $2"
+        keyset = self._keyset_predicate(cursor, params, sort_column="ia.assigned_at", id_column="ia.issue_id")
+        params.append(limit + 1)
+        query = f"""
+        SELECT i.id, i.project_id, i.type_id, i.title, i.description, 
+               i.story_points, i.status, i.priority, i.created_by, i.parent_issue_id,
+               i.created_at, i.updated_at, ia.assigned_at, ia.assigned_by
+        FROM issue_assignments ia
+        JOIN issues i ON ia.issue_id = i.id
+        WHERE ia.assigned_to = $1 {project_filter} {keyset}
+        ORDER BY ia.assigned_at DESC, ia.issue_id DESC
+        LIMIT ${len(params)}
+        """
+        return await db.fetch_records(query, params, read_only=True)
 
     async def update_assignment(self, issue_id: int, assigned_to: int, assigned_by: int) -> bool:
         """Update existing assignment"""
@@ -353,122 +538,66 @@ class IssueRepository:
             print("Error updating assignment:", e)
             raise Exception("Failed to update assignment")
 
+    async def save_assignment(self, issue_id: int, assigned_to: int, assigned_by: int,
+                              notification: Optional[str] = None) -> None:
+        """Create or replace an issue's assignment, queueing the assignee's notification in the same transaction"""
+        async for conn in db.connection():
+            async with conn.transaction():
+                status = await conn.execute(
+                    """
+                    UPDATE issue_assignments
+                    SET assigned_to = $1, assigned_by = $2, assigned_at = CURRENT_TIMESTAMP
+                    WHERE issue_id = $3
+                    """,
+                    assigned_to, assigned_by, issue_id
+                )
+                if status == "UPDATE 0":
+                    await conn.execute(
+                        "INSERT INTO issue_assignments (issue_id, assigned_to, assigned_by) VALUES ($1, $2, $3)",
+                        issue_id, assigned_to, assigned_by
+                    )
+                if notification is not None:
+                    await NotificationRepository().add_to_outbox(
+                        conn, notification, user_id=assigned_to, kind="issue_assigned", entity=f"issue:{issue_id}"
+                    )
+
     async def user_performance_workload_analysis(self):
-        """Get user performance and workload analysis data"""
+        """Get user performance and workload analysis data from its materialized snapshot"""
         query = """
-        SELECT 
-            u.id as user_id,
-            u.name as user_name,
-            u.email,
-            o.name as organization_name,
-            COUNT(DISTINCT ia.issue_id) as assigned_issues,
-            COUNT(DISTINCT CASE WHEN i.status = 'completed' THEN ia.issue_id END) as completed_issues,
-            COUNT(DISTINCT CASE WHEN i.status = 'open' THEN ia.issue_id END) as open_issues,
-            SUM(i.story_points) as total_story_points_assigned,
-            SUM(CASE WHEN i.status = 'completed' THEN i.story_points ELSE 0 END) as completed_story_points,
-            AVG(i.story_points) as avg_story_points_per_issue,
-            COUNT(DISTINCT ic.id) as comments_made,
-            COUNT(DISTINCT ih.id) as activities_logged,
-            uc.weekly_hours,
-            SUM(uw.hours_spent) as total_hours_spent,
-            CASE 
-                WHEN COUNT(DISTINCT ia.issue_id) = 0 THEN 0
-                ELSE (COUNT(DISTINCT CASE WHEN i.status = 'completed' THEN ia.issue_id END) * 100.0 / COUNT(DISTINCT ia.issue_id))
-            END as completion_rate,
-            EXTRACT(DAY FROM (NOW() - u.created_at)) as days_since_joined
-        FROM users u
-        JOIN organization_users ou ON u.id = ou.user_id
-        JOIN organizations o ON ou.organization_id = o.id
-        LEFT JOIN issue_assignments ia ON u.id = ia.assigned_to
-        LEFT JOIN issues i ON ia.issue_id = i.id
-        LEFT JOIN issue_comments ic ON u.id = ic.user_id
-        LEFT JOIN issue_history ih ON u.id = ih.user_id
-        LEFT JOIN user_capacity uc ON u.id = uc.user_id AND o.id = uc.organization_id
-        LEFT JOIN user_workload uw ON ia.id = uw.issue_assignments_id
-        GROUP BY u.id, u.name, u.email, o.name, uc.weekly_hours, u.created_at
-        ORDER BY completion_rate DESC, total_story_points_assigned DESC
+        SELECT *
+        FROM mv_user_performance
+        ORDER BY completion_rate DESC, total_story_points_assigned DESC NULLS LAST
         """
-        return await db.execute_query(query)
+        return await db.execute_query(query, read_only=True)
 
     async def sprint_velocity_analysis(self):
-        """Get sprint velocity analysis data"""
+        """Get sprint velocity analysis data from its materialized snapshot"""
         query = """
-        SELECT 
-            s.id as sprint_id,
-            s.name as sprint_name,
-            p.name as project_name,
-            s.start_date,
-            s.end_date,
-            s.status,
-            s.velocity_target,
-            COUNT(DISTINCT iss.issue_id) as issues_in_sprint,
-            SUM(i.story_points) as total_story_points,
-            COUNT(DISTINCT CASE WHEN i.status = 'completed' THEN iss.issue_id END) as completed_issues,
-            SUM(CASE WHEN i.status = 'completed' THEN i.story_points ELSE 0 END) as completed_story_points,
-            tv.avg_hours_per_point,
-            CASE 
-                WHEN s.velocity_target > 0 THEN (SUM(CASE WHEN i.status = 'completed' THEN i.story_points ELSE 0 END) * 100.0 / s.velocity_target)
-                ELSE 0
-            END as velocity_achievement_percentage,
-            EXTRACT(DAY FROM (s.end_date - s.start_date)) as sprint_duration_days,
-            CASE 
-                WHEN s.end_date < CURRENT_DATE THEN 'completed'
-                WHEN s.start_date <= CURRENT_DATE AND s.end_date >= CURRENT_DATE THEN 'active'
-                ELSE 'upcoming'
-            END as sprint_status
-        FROM sprints s
-        JOIN projects p ON s.project_id = p.id
-        LEFT JOIN issue_sprints iss ON s.id = iss.sprint_id
-        LEFT JOIN issues i ON iss.issue_id = i.id
-        LEFT JOIN team_velocity tv ON s.project_id = tv.project_id
-        GROUP BY s.id, s.name, p.name, s.start_date, s.end_date, s.status, s.velocity_target, tv.avg_hours_per_point
-        ORDER BY s.start_date DESC
+        SELECT *
+        FROM mv_sprint_velocity
+        ORDER BY start_date DESC
         """
-        return await db.execute_query(query)
+        return await db.execute_query(query, read_only=True)
 
     async def team_performance_collaboration_metrics(self):
-        """Get team performance and collaboration metrics data"""
+        """Get team performance and collaboration metrics data from its materialized snapshot"""
         query = """
-        SELECT 
-            t.id as team_id,
-            t.name as team_name,
-            o.name as organization_name,
-            COUNT(DISTINCT ut.user_id) as team_members,
-            COUNT(DISTINCT tw.workspace_id) as workspaces_assigned,
-            COUNT(DISTINCT pt.project_id) as projects_assigned,
-            COUNT(DISTINCT i.id) as total_issues_worked,
-            SUM(i.story_points) as total_story_points_worked,
-            AVG(tv.avg_hours_per_point) as team_velocity,
-            COUNT(DISTINCT ic.id) as team_comments,
-            COUNT(DISTINCT ih.id) as team_activities,
-            AVG(EXTRACT(HOUR FROM (i.updated_at - i.created_at))) as avg_issue_resolution_time,
-            COUNT(DISTINCT CASE WHEN i.status = 'completed' THEN i.id END) as completed_issues,
-            CASE 
-                WHEN COUNT(DISTINCT i.id) = 0 THEN 0
-                ELSE (COUNT(DISTINCT CASE WHEN i.status = 'completed' THEN i.id END) * 100.0 / COUNT(DISTINCT i.id))
-            END as team_completion_rate
-        FROM teams t
-        JOIN organizations o ON t.organization_id = o.id
-        LEFT JOIN user_team ut ON t.id = ut.team_id
-        LEFT JOIN team_workspaces tw ON t.id = tw.team_id
-        LEFT JOIN project_teams pt ON t.id = pt.team_id
-        LEFT JOIN issues i ON pt.project_id = i.project_id
-        LEFT JOIN team_velocity tv ON t.id = tv.team_id
-        LEFT JOIN issue_comments ic ON i.id = ic.issue_id
-        LEFT JOIN issue_history ih ON i.id = ih.issue_id
-        GROUP BY t.id, t.name, o.name
-        ORDER BY team_completion_rate DESC, total_story_points_worked DESC
+        SELECT *
+        FROM mv_team_performance
+        ORDER BY team_completion_rate DESC, total_story_points_worked DESC NULLS LAST
         """
-        return await db.execute_query(query)
+        return await db.execute_query(query, read_only=True)
 
     # Label management methods
     async def create_label(self, project_id: int, name: str, description: Optional[str] = None, color: Optional[str] = None):
-        """Create a new label for a project"""
-        query = """
+        """Create a new label for a project and return the inserted row"""
+        query = f"""
         INSERT INTO labels (project_id, name, description, color) 
         VALUES ($1, $2, $3, $4)
+        RETURNING {LABEL_RETURNING_COLUMNS}
         """
-        return await db.execute_insert(query, [project_id, name, description, color])
+        rows = await db.execute_query(query, [project_id, name, description, color])
+        return rows[0] if rows else None
 
     async def get_project_labels(self, project_id: int):
         """Get all labels for a specific project"""
@@ -491,36 +620,58 @@ class IssueRepository:
         return result[0] if result else None
 
     async def update_label(self, label_id: int, **kwargs):
-        """Update an existing label"""
+        """Update a label and return the updated row
+
+        Returns None when the label does not exist or, if the name changes, another
+        label in the same project already uses it.
+        """
         # Build dynamic query based on provided fields
         set_clauses = []
         values = []
         index = 1
+        name_placeholder = None
         
         for field, value in kwargs.items():
             if value is not None:
                 set_clauses.append(f"{field} = ${index}")
                 values.append(value)
+                if field == "name":
+                    name_placeholder = f"${index}"
                 index += 1
         
         if not set_clauses:
             return None
+
+        name_check = ""
+        if name_placeholder:
+            name_check = f"""
+          AND NOT EXISTS (
+              SELECT 1 FROM labels other
+              WHERE other.project_id = labels.project_id
+                AND other.name = {name_placeholder}
+                AND other.id <> labels.id
+          )"""
             
         query = f"""
         UPDATE labels 
         SET {', '.join(set_clauses)}
-        WHERE id = ${index}
+        WHERE id = ${index}{name_check}
+        RETURNING {LABEL_RETURNING_COLUMNS}
         """
         values.append(label_id)
-        return await db.execute_query(query, values)
+        rows = await db.execute_query(query, values)
+        return rows[0] if rows else None
 
-    async def delete_label(self, label_id: int):
-        """Delete a label"""
+    async def delete_label(self, label_id: int) -> bool:
+        """Delete a label that no issue uses, returning False if nothing was deleted"""
         query = """
         DELETE FROM labels 
         WHERE id = $1
+          AND NOT EXISTS (SELECT 1 FROM issue_labels WHERE label_id = $1)
+        RETURNING id
         """
-        return await db.execute_query(query, [label_id])
+        rows = await db.execute_query(query, [label_id])
+        return len(rows) > 0
 
     async def label_exists(self, label_id: int):
         """Check if a label exists"""
@@ -579,18 +730,24 @@ class IssueRepository:
         """
         return await db.execute_query(query, [issue_id])
 
-    async def get_issues_by_label(self, project_id: int, label_id: int):
-        """Get all issues with a specific label in a project"""
-        query = """
-        SELECT DISTINCT i.id, i.project_id, i.type_id, i.title, i.description, 
+    async def get_issues_by_label(self, project_id: int, label_id: int, limit: int = DEFAULT_PAGE_SIZE,
+                                  cursor: Optional[str] = None):
+        """Get a page of issues with a specific label in a project (limit + 1 rows)"""
+        # (issue_id, label_id) is the primary key, so a single label never duplicates an issue
+        params = [project_id, label_id]
+        keyset = self._keyset_predicate(cursor, params)
+        params.append(limit + 1)
+        query = f"""
+        SELECT i.id, i.project_id, i.type_id, i.title, i.description, 
                i.story_points, i.status, i.priority, i.created_by, i.parent_issue_id,
                i.created_at, i.updated_at
         FROM issues i
         JOIN issue_labels il ON i.id = il.issue_id
-        WHERE i.project_id = $1 AND il.label_id = $2
-        ORDER BY i.created_at DESC
+        WHERE i.project_id = $1 AND il.label_id = $2 {keyset}
+        ORDER BY i.created_at DESC, i.id DESC
+        LIMIT ${len(params)}
         """
-        return await db.execute_query(query, [project_id, label_id])
+        return await db.fetch_records(query, params, read_only=True)
 
     async def issue_has_label(self, issue_id: int, label_id: int):
         """Check if an issue has a specific label"""
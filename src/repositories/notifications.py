@@ -0,0 +1,65 @@
+from src.core.database import db
+from typing import Awaitable, Callable, Optional
+
+
+class NotificationRepository:
+    async def get_user_topics(self, user_id: int) -> list[tuple[str, int]]:
+        """Organizations and projects whose topic streams a user's sockets subscribe to"""
+        query = """
+        SELECT 'organization' AS scope, ou.organization_id AS scope_id
+        FROM organization_users ou
+        WHERE ou.user_id = $1
+        UNION
+        SELECT 'project' AS scope, pu.project_id AS scope_id
+        FROM project_users pu
+        WHERE pu.user_id = $1
+        UNION
+        SELECT 'project' AS scope, pt.project_id AS scope_id
+        FROM user_team ut
+        JOIN project_teams pt ON pt.team_id = ut.team_id
+        WHERE ut.user_id = $1
+        """
+        rows = await db.execute_query(query, (user_id,))
+        return [(row['scope'], row['scope_id']) for row in rows]
+
+    async def add_to_outbox(self, conn, message: str, user_id: Optional[int] = None,
+                            scope: Optional[str] = None, scope_id: Optional[int] = None,
+                            kind: Optional[str] = None, entity: Optional[str] = None) -> None:
+        """Queue a notification on conn so it commits or rolls back with the caller's transaction
+
+        User notifications with a kind and entity are coalesced with others for the same pair.
+        """
+        await conn.execute(
+            """
+            INSERT INTO notification_outbox (user_id, scope, scope_id, message, kind, entity)
+            VALUES ($1, $2, $3, $4, $5, $6)
+            """,
+            user_id, scope, scope_id, message, kind, entity
+        )
+
+    async def relay_outbox_batch(self, limit: int, publish: Callable[[list[dict]], Awaitable[None]]) -> int:
+        """Lock up to limit outbox rows, hand them to publish and delete them once it succeeds
+
+        SKIP LOCKED lets every worker relay concurrently; if publish raises, the rows
+        stay in the outbox and are retried, so delivery is at-least-once.
+        """
+        async for conn in db.connection():
+            async with conn.transaction():
+                rows = await conn.fetch(
+                    """
+                    SELECT id, user_id, scope, scope_id, message, kind, entity, created_at
+                    FROM notification_outbox
+                    ORDER BY id
+                    LIMIT $1
+                    FOR UPDATE SKIP LOCKED
+                    """,
+                    limit
+                )
+                if not rows:
+                    return 0
+                await publish([dict(row) for row in rows])
+                await conn.execute(
+                    "DELETE FROM notification_outbox WHERE id = ANY($1::bigint[])",
+                    [row['id'] for row in rows]
+                )
+                return len(rows)
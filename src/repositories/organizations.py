@@ -1,4 +1,6 @@
+from src.core.cache import bump_version
 from src.core.database import db
+from src.repositories.RolesRepository import PERMISSIONS_CACHE
 
 
 class OrganizationsRepository:
@@ -42,7 +44,10 @@ class OrganizationsRepository:
 
                 print("this is id")
                 print(org_id)
-                return org_id
+
+        # The creator just gained the admin role; bump after commit so no worker caches the old set
+        await bump_version(PERMISSIONS_CACHE)
+        return org_id
 
     async def get_organization_by_id(self, org_id: int):
         query = "SELECT * FROM organizations WHERE organizations.id = $1"
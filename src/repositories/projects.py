@@ -1,4 +1,25 @@
 from src.core.database import db
+from typing import Optional
+
+# Projects of an organization with creator and workspace details, newest first
+ORGANIZATION_PROJECTS_QUERY = """
+SELECT p.id,
+       p.name,
+       p.workspace_id,
+       p.created_by,
+       p.status,
+       p.created_at,
+       p.updated_at,
+       u.name  AS creator_name,
+       u.email AS creator_email,
+       w.name  AS workspace_name,
+       w.organization_id
+FROM projects p
+         JOIN users u ON p.created_by = u.id
+         JOIN workspaces w ON p.workspace_id = w.id
+WHERE w.organization_id = $1
+ORDER BY p.created_at DESC
+"""
 
 
 class ProjectsRepository:
@@ -46,25 +67,11 @@ class ProjectsRepository:
 
     async def get_organization_projects(self, organization_id: int) -> list[dict]:
         """Get all projects that belong to an organization (via workspaces)."""
-        query = """
-        SELECT p.id,
-               p.name,
-               p.workspace_id,
-               p.created_by,
-               p.status,
-               p.created_at,
-               p.updated_at,
-               u.name  AS creator_name,
-               u.email AS creator_email,
-               w.name  AS workspace_name,
-               w.organization_id
-        FROM projects p
-                 JOIN users u ON p.created_by = u.id
-                 JOIN workspaces w ON p.workspace_id = w.id
-        WHERE w.organization_id = $1
-        ORDER BY p.created_at DESC
-        """
-        return await db.execute_query(query, (organization_id,))
+        return await db.execute_query(ORGANIZATION_PROJECTS_QUERY, (organization_id,))
+
+    def stream_organization_projects(self, organization_id: int, chunk_size: Optional[int] = None):
+        """Stream an organization's projects in chunks of Records for exports"""
+        return db.stream(ORGANIZATION_PROJECTS_QUERY, (organization_id,), chunk_size=chunk_size, read_only=True)
 
     async def user_has_workspace_access(self, user_id: int, workspace_id: int) -> bool:
         """Check if user has access to workspace (through organization)"""
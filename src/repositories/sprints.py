@@ -1,5 +1,12 @@
 from src.core.database import db
+from src.core.lexorank import ranks_between
+from src.repositories.notifications import NotificationRepository
 from datetime import datetime
+from typing import Optional
+
+# Columns returned by sprint writes so callers never need to re-read the row
+SPRINT_RETURNING_COLUMNS = """id, project_id, name, description, start_date, end_date,
+               status, goal, velocity_target, created_at, updated_at"""
 
 
 class SprintsRepository:
@@ -44,20 +51,21 @@ class SprintsRepository:
         rows = await db.execute_query(query, (sprint_id,))
         return rows[0] if rows else None
 
-    async def update_sprint(self, sprint_id: int, name: str, description: str, start_date: str, end_date: str, status: str, goal: str, velocity_target: int) -> bool:
-        """Update sprint"""
+    async def update_sprint(self, sprint_id: int, name: str, description: str, start_date: str, end_date: str, status: str, goal: str, velocity_target: int) -> dict | None:
+        """Update sprint and return the updated row"""
         # Convert string dates to datetime objects
         start_date_obj = datetime.strptime(start_date, '%Y-%m-%d').date() if isinstance(start_date, str) else start_date
         end_date_obj = datetime.strptime(end_date, '%Y-%m-%d').date() if isinstance(end_date, str) else end_date
         
-        query = """
+        query = f"""
         UPDATE sprints
         SET name = $1, description = $2, start_date = $3, end_date = $4, 
             status = $5, goal = $6, velocity_target = $7, updated_at = CURRENT_TIMESTAMP
         WHERE id = $8
+        RETURNING {SPRINT_RETURNING_COLUMNS}
         """
-        await db.execute_query(query, (name, description, start_date_obj, end_date_obj, status, goal, velocity_target, sprint_id))
-        return True
+        rows = await db.execute_query(query, (name, description, start_date_obj, end_date_obj, status, goal, velocity_target, sprint_id))
+        return rows[0] if rows else None
 
     async def delete_sprint(self, sprint_id: int) -> bool:
         """Delete sprint"""
@@ -75,24 +83,79 @@ class SprintsRepository:
         await db.execute_query(query, (status, sprint_id))
         return True
 
-    async def add_issues_to_sprint(self, sprint_id: int, issue_ids: list[int]) -> bool:
-        """Add issues to sprint"""
-        if not issue_ids:
-            return True
-            
+    async def transition_sprint_status(self, sprint_id: int, user_id: int, status: str, allowed_from: list[str],
+                                       announce: Optional[str] = None) -> dict | None:
+        """Move a sprint to status if it is in one of allowed_from and the user can access its project
+
+        Returns the updated row, or None when the sprint does not exist, the user lacks
+        access, or the current status does not allow the transition. When announce is
+        given (e.g. "sprint {name} started") it is formatted with the updated row and
+        written to the project's topic outbox in the same transaction.
+        """
+        query = f"""
+        UPDATE sprints s
+        SET status = $1, updated_at = CURRENT_TIMESTAMP
+        WHERE s.id = $2
+          AND s.status::text = ANY($3::text[])
+          AND EXISTS (
+              SELECT 1
+              FROM projects p
+              JOIN workspaces w ON p.workspace_id = w.id
+              JOIN organization_users ou ON w.organization_id = ou.organization_id
+              WHERE p.id = s.project_id AND ou.user_id = $4
+          )
+        RETURNING {SPRINT_RETURNING_COLUMNS}
+        """
+        if announce is None:
+            rows = await db.execute_query(query, (status, sprint_id, allowed_from, user_id))
+            return rows[0] if rows else None
+
         async for conn in db.connection():
             async with conn.transaction():
-                # Insert multiple issue-sprint relationships
-                for issue_id in issue_ids:
-                    await conn.execute(
-                        """INSERT INTO issue_sprints (issue_id, sprint_id, added_at)
-                           VALUES ($1, $2, CURRENT_TIMESTAMP)
-                           ON CONFLICT DO NOTHING""",
-                        issue_id, sprint_id
-                    )
-                return True
-        # Fallback return in case the async for loop doesn't execute
-        raise Exception("Failed to add issues to sprint")
+                row = await conn.fetchrow(query, status, sprint_id, allowed_from, user_id)
+                if not row:
+                    return None
+                sprint = dict(row)
+                await NotificationRepository().add_to_outbox(
+                    conn, announce.format(**sprint), scope="project", scope_id=sprint['project_id']
+                )
+                return sprint
+
+    async def add_issues_to_sprint(self, sprint_id: int, issue_ids: list[int]) -> int:
+        """Append issues to the end of the sprint backlog, returning how many were newly added"""
+        if not issue_ids:
+            return 0
+
+        issue_ids = list(dict.fromkeys(issue_ids))
+        rows = await db.execute_query(
+            "SELECT MAX(rank) AS last_rank FROM issue_sprints WHERE sprint_id = $1", (sprint_id,)
+        )
+        last_rank = rows[0]["last_rank"] if rows else None
+
+        query = """
+        INSERT INTO issue_sprints (issue_id, sprint_id, added_at, rank)
+        SELECT t.issue_id, $2::int, CURRENT_TIMESTAMP, t.rank
+        FROM unnest($1::int[], $3::text[]) AS t(issue_id, rank)
+        ON CONFLICT DO NOTHING
+        """
+        ranks = ranks_between(last_rank, None, len(issue_ids))
+        return await db.execute_update(query, (issue_ids, sprint_id, ranks))
+
+    async def find_invalid_sprint_issues(self, project_id: int, issue_ids: list[int]) -> list[dict]:
+        """Return the requested issues that do not exist or belong to another project
+
+        Each row has issue_id and project_id; project_id is None for missing issues.
+        """
+        if not issue_ids:
+            return []
+
+        query = """
+        SELECT req.issue_id, i.project_id
+        FROM unnest($1::int[]) AS req(issue_id)
+        LEFT JOIN issues i ON i.id = req.issue_id
+        WHERE i.id IS NULL OR i.project_id <> $2
+        """
+        return await db.execute_query(query, (list(issue_ids), project_id))
 
     async def remove_issue_from_sprint(self, sprint_id: int, issue_id: int) -> bool:
         """Remove issue from sprint"""
@@ -109,6 +172,7 @@ class SprintsRepository:
                 SELECT iss.issue_id, 
                        iss.sprint_id, 
                        iss.added_at,
+                       iss.rank,
                        i.title, 
                        i.description, 
                        i.status, 
@@ -122,29 +186,75 @@ class SprintsRepository:
                          JOIN issue_types AS it ON i.type_id = it.id
                          JOIN users AS u ON i.created_by = u.id
                 WHERE iss.sprint_id = $1
-                ORDER BY iss.added_at ASC 
+                ORDER BY iss.rank ASC, iss.issue_id ASC
                 """
         return await db.execute_query(query, (sprint_id,))
 
     async def reorder_sprint_backlog(self, sprint_id: int, issue_ids: list[int]) -> bool:
-        """Reorder sprint backlog by updating added_at timestamps"""
+        """Rewrite the whole sprint backlog order with fresh, evenly spread ranks in one statement"""
         if not issue_ids:
             return True
-            
-        async for conn in db.connection():
-            async with conn.transaction():
-                # Update added_at timestamps to reflect new order
-                for index, issue_id in enumerate(issue_ids):
-                    # Add index seconds to create ordering
-                    await conn.execute(
-                        """UPDATE issue_sprints 
-                           SET added_at = CURRENT_TIMESTAMP + INTERVAL '$1 seconds'
-                           WHERE sprint_id = $2 AND issue_id = $3""",
-                        index, sprint_id, issue_id
-                    )
-                return True
-        # Fallback return in case the async for loop doesn't execute
-        raise Exception("Failed to reorder sprint backlog")
+
+        query = """
+        UPDATE issue_sprints iss
+        SET rank = t.rank
+        FROM unnest($2::int[], $3::text[]) AS t(issue_id, rank)
+        WHERE iss.sprint_id = $1 AND iss.issue_id = t.issue_id
+        """
+        await db.execute_update(query, (sprint_id, list(issue_ids), ranks_between(None, None, len(issue_ids))))
+        return True
+
+    async def get_move_neighbors(self, sprint_id: int, issue_id: int, after_issue_id: int | None) -> dict:
+        """Get the ranks an issue must sit between to follow after_issue_id (None means the top)
+
+        Returns in_sprint and after_in_sprint flags plus prev_rank and next_rank.
+        """
+        query = """
+        WITH prev AS (
+            SELECT rank FROM issue_sprints WHERE sprint_id = $1 AND issue_id = $3
+        )
+        SELECT EXISTS (SELECT 1 FROM issue_sprints WHERE sprint_id = $1 AND issue_id = $2) AS in_sprint,
+               EXISTS (SELECT 1 FROM prev) AS after_in_sprint,
+               (SELECT rank FROM prev) AS prev_rank,
+               (SELECT MIN(rank)
+                FROM issue_sprints
+                WHERE sprint_id = $1
+                  AND issue_id <> $2
+                  AND ($3::int IS NULL OR rank > (SELECT rank FROM prev))) AS next_rank
+        """
+        rows = await db.execute_query(query, (sprint_id, issue_id, after_issue_id))
+        return rows[0]
+
+    async def set_issue_rank(self, sprint_id: int, issue_id: int, rank: str) -> bool:
+        """Move one issue by writing only its rank"""
+        query = """
+        UPDATE issue_sprints
+        SET rank = $1
+        WHERE sprint_id = $2 AND issue_id = $3
+        """
+        return await db.execute_update(query, (rank, sprint_id, issue_id)) > 0
+
+    async def get_ordered_sprint_issue_ids(self, sprint_id: int) -> list[int]:
+        """Get the sprint's issue IDs in backlog order"""
+        query = """
+        SELECT issue_id
+        FROM issue_sprints
+        WHERE sprint_id = $1
+        ORDER BY rank ASC NULLS LAST, added_at ASC, issue_id ASC
+        """
+        rows = await db.execute_query(query, (sprint_id,))
+        return [row["issue_id"] for row in rows]
+
+    async def get_sprints_needing_rebalance(self, max_rank_length: int) -> list[int]:
+        """Get sprints whose ranks have grown past max_rank_length or are missing"""
+        query = """
+        SELECT sprint_id
+        FROM issue_sprints
+        GROUP BY sprint_id
+        HAVING MAX(LENGTH(rank)) > $1 OR BOOL_OR(rank IS NULL)
+        """
+        rows = await db.execute_query(query, (max_rank_length,))
+        return [row["sprint_id"] for row in rows]
 
     async def get_issue_by_id(self, issue_id: int) -> dict | None:
         """Get issue by ID"""
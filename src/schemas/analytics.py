@@ -189,3 +189,12 @@ class AnalyticsFilters(BaseModel):
     end_date: Optional[date] = None
     status: Optional[str] = None
     priority: Optional[str] = None
+
+# Materialized snapshot status
+class AnalyticsSnapshotStatus(BaseModel):
+    view_name: str
+    computed_at: Optional[datetime] = None
+
+class AnalyticsSnapshotsResponse(BaseModel):
+    snapshots: List[AnalyticsSnapshotStatus]
+    refreshed: Optional[bool] = None
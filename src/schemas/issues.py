@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -42,6 +42,44 @@ class IssueResponse(BaseModel):
     updated_at: Optional[datetime] = None
 
 
+class IssuePage(BaseModel):
+    items: List[IssueResponse]
+    next_cursor: Optional[str] = None
+
+
+# Batch Schemas
+MAX_ISSUE_BATCH_SIZE = 1000
+
+
+class IssueBatchCreateItem(IssueBase):
+    type_id: Optional[int] = Field(None, gt=0)
+
+
+class IssueBatchCreate(BaseModel):
+    issues: List[IssueBatchCreateItem] = Field(..., min_length=1, max_length=MAX_ISSUE_BATCH_SIZE)
+
+
+class IssueBatchUpdateItem(IssueUpdate):
+    id: int = Field(..., gt=0)
+
+
+class IssueBatchUpdate(BaseModel):
+    issues: List[IssueBatchUpdateItem] = Field(..., min_length=1, max_length=MAX_ISSUE_BATCH_SIZE)
+
+
+class IssueBatchItemResult(BaseModel):
+    index: int
+    success: bool
+    issue: Optional[IssueResponse] = None
+    error: Optional[str] = None
+
+
+class IssueBatchResponse(BaseModel):
+    results: List[IssueBatchItemResult]
+    succeeded: int
+    failed: int
+
+
 # Issue Assignment Schemas
 class IssueAssignmentCreate(BaseModel):
     assigned_to: int = Field(..., gt=0, description="User ID to assign the issue to")
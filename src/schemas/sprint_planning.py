@@ -9,6 +9,7 @@ class SprintIssueResponse(BaseModel):
     issue_id: int
     sprint_id: int
     added_at: datetime
+    rank: Optional[str] = None
     # Issue details
     title: str
     description: Optional[str] = None
@@ -25,6 +26,14 @@ class SprintIssueResponse(BaseModel):
 class SprintBacklogReorder(BaseModel):
     issue_ids: List[int]  # Ordered list of issue IDs
 
+class SprintIssueMove(BaseModel):
+    after_issue_id: Optional[int] = None  # Issue to place it after; None moves it to the top
+
+class SprintIssueMoveResponse(BaseModel):
+    issue_id: int
+    sprint_id: int
+    rank: str
+
 class SprintIssueSummary(BaseModel):
     total_issues: int
     total_story_points: Optional[int] = None
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from typing import Optional
-from datetime import date
+from datetime import date, datetime
 
 class SprintVelocityResponse(BaseModel):
     sprint_id: int
@@ -24,6 +24,9 @@ class SprintVelocityResponse(BaseModel):
     # Sprint timing
     sprint_duration_days: int
     sprint_status: str  # completed, active, upcoming
+
+    # Snapshot staleness marker
+    computed_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import Optional
+from datetime import datetime
 
 class TeamPerformanceResponse(BaseModel):
     team_id: int
@@ -24,6 +25,9 @@ class TeamPerformanceResponse(BaseModel):
     # Collaboration metrics
     team_comments: int
     team_activities: int
+
+    # Snapshot staleness marker
+    computed_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import Optional
+from datetime import datetime
 
 class UserPerformanceResponse(BaseModel):
     user_id: int
@@ -28,6 +29,9 @@ class UserPerformanceResponse(BaseModel):
     
     # User tenure
     days_since_joined: int
+
+    # Snapshot staleness marker
+    computed_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
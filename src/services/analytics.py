@@ -0,0 +1,57 @@
+from src.repositories.Analysis import AnalysisRepository
+from src.repositories.organizations import OrganizationsRepository
+from src.schemas.analytics import AnalyticsSnapshotStatus, AnalyticsSnapshotsResponse
+from src.core.database import naive_utc
+from src.core.logger import setup_logger
+from datetime import datetime
+from typing import Optional
+
+logger = setup_logger(__name__)
+
+
+def validate_analytics_scope(date_from: Optional[datetime], date_to: Optional[datetime]) -> None:
+    """Reject empty or inverted date ranges before any query runs"""
+    # Compare in UTC so a naive bound and an aware one do not raise TypeError
+    if date_from is not None and date_to is not None and naive_utc(date_from) >= naive_utc(date_to):
+        raise ValueError("date_from must be earlier than date_to")
+
+
+organizations_repo = OrganizationsRepository()
+
+
+async def authorize_analytics_scope(user_id: int, organization_id: int) -> None:
+    """Analytics are per tenant: only members of the organization may read its figures"""
+    if not await organizations_repo.user_has_org_access(user_id, organization_id):
+        raise Exception("Access denied to organization")
+
+
+class AnalyticsService:
+    def __init__(self):
+        self.analysis_repo = AnalysisRepository()
+
+    async def get_snapshot_status(self) -> AnalyticsSnapshotsResponse:
+        """Report when each analytics snapshot was last computed"""
+        rows = await self.analysis_repo.get_snapshot_status()
+        return AnalyticsSnapshotsResponse(
+            snapshots=[AnalyticsSnapshotStatus(**row) for row in rows]
+        )
+
+    async def export_snapshot(self, name: str, organization_id: int, user_id: int):
+        """Row chunks for a streamed export of one organization's snapshot rows (requires org membership)"""
+        chunks = self.analysis_repo.stream_snapshot(f"mv_{name}", organization_id)
+        await authorize_analytics_scope(user_id, organization_id)
+        return chunks
+
+    async def refresh_snapshots(self) -> AnalyticsSnapshotsResponse:
+        """Refresh analytics snapshots now and report their new computed_at"""
+        refreshed = await self.analysis_repo.refresh_snapshots()
+        if not refreshed:
+            logger.info("Analytics snapshot refresh skipped: already running elsewhere")
+        response = await self.get_snapshot_status()
+        response.refreshed = refreshed
+        return response
+
+    async def refresh_snapshots_job(self) -> None:
+        """Periodic job entry point for the lifespan scheduler"""
+        if await self.analysis_repo.refresh_snapshots():
+            logger.info("Analytics snapshots refreshed")
@@ -1,5 +1,6 @@
 from datetime import datetime
 from fastapi import HTTPException, status
+from src.core.cache import invalidate
 from src.core.security import verify_password, get_password_hash, create_access_token
 from src.repositories.users import UserRepository
 from src.schemas.users import UserSchema, UserResponse , UserLogin
@@ -30,7 +31,8 @@ class AuthService:
 
         # Update last login time
         await self.user_repo.update_last_login(user["id"])
-
+        # Drop the cached identity on every node so a fresh login always reloads it
+        await invalidate("users", user["email"])
 
         access_token = create_access_token(data={"sub": user['email']})
         return {"access_token": access_token, "token_type": "bearer"}
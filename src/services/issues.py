@@ -1,9 +1,11 @@
+from src.core.database import db
 from src.repositories.issues import IssueRepository
 from src.repositories.users import UserRepository
-from src.schemas.issues import IssueCreate, IssueUpdate, IssueResponse, IssueAssignmentCreate, IssueAssignmentResponse, IssueStatusUpdate, IssueWithAssignment
-from typing import List, Optional
+from src.schemas.issues import IssueCreate, IssueUpdate, IssueResponse, IssueAssignmentCreate, IssueAssignmentResponse, IssueStatusUpdate, IssueWithAssignment, IssuePage
+from src.schemas.issues import IssueBatchCreate, IssueBatchUpdate, IssueBatchItemResult, IssueBatchResponse
+from src.core.pagination import DEFAULT_PAGE_SIZE, keyset_page
+from typing import List, Mapping, Optional, Sequence
 from datetime import datetime
-from src.notification.streams import publish_message
 
 class IssuesService:
     def __init__(self):
@@ -13,8 +15,8 @@ class IssuesService:
     async def create_issue(self, issue_data: IssueCreate, created_by: int) -> IssueResponse:
         """Create a new issue"""
         try:
-            # Create the issue
-            issue_id = await self.issue_repo.create_issue(
+            # Create the issue; the insert returns the full row
+            issue = await self.issue_repo.create_issue(
                 project_id=issue_data.project_id,
                 title=issue_data.title,
                 created_by=created_by,
@@ -26,27 +28,119 @@ class IssuesService:
                 parent_issue_id=issue_data.parent_issue_id
             )
             
-            if not issue_id:
-                raise Exception("Failed to create issue")
-
-            # Fetch the created issue
-            issue = await self.issue_repo.get_issue_by_id(issue_id)
             if not issue:
-                raise Exception("Issue not found after creation")
+                raise Exception("Failed to create issue")
 
             return IssueResponse(**issue)
 
         except Exception as e:
             raise Exception(f"Failed to create issue: {str(e)}")
 
-    async def get_issues_by_project(self, project_id: int) -> List[IssueResponse]:
-        """Get all issues for a specific project"""
+    def _batch_response(self, results: List[IssueBatchItemResult]) -> IssueBatchResponse:
+        results.sort(key=lambda result: result.index)
+        succeeded = sum(1 for result in results if result.success)
+        return IssueBatchResponse(results=results, succeeded=succeeded, failed=len(results) - succeeded)
+
+    async def create_issues_batch(self, project_id: int, batch: IssueBatchCreate, created_by: int) -> IssueBatchResponse:
+        """Create many issues in one insert, reporting per-item results"""
         try:
-            issues = await self.issue_repo.get_issues_by_project(project_id)
-            return [IssueResponse(**issue) for issue in issues]
+            # Validate references for the whole batch with one query each
+            type_ids = {item.type_id for item in batch.issues if item.type_id}
+            parent_ids = {item.parent_issue_id for item in batch.issues if item.parent_issue_id}
+            existing_types = await self.issue_repo.get_existing_issue_type_ids(list(type_ids))
+            existing_parents = await self.issue_repo.get_existing_project_issue_ids(project_id, list(parent_ids))
+
+            results = []
+            valid = []
+            for index, item in enumerate(batch.issues):
+                if item.type_id and item.type_id not in existing_types:
+                    results.append(IssueBatchItemResult(index=index, success=False, error="Issue type not found"))
+                elif item.parent_issue_id and item.parent_issue_id not in existing_parents:
+                    results.append(IssueBatchItemResult(index=index, success=False, error="Parent issue not found in project"))
+                else:
+                    valid.append((index, item))
+
+            rows = await self.issue_repo.create_issues_bulk(
+                project_id, created_by, [item.dict() for _, item in valid]
+            )
+            if len(rows) != len(valid):
+                raise Exception("Inserted row count does not match batch")
+
+            for (index, _), row in zip(valid, rows):
+                results.append(IssueBatchItemResult(index=index, success=True, issue=IssueResponse(**row)))
+
+            return self._batch_response(results)
+
+        except Exception as e:
+            raise Exception(f"Failed to create issues: {str(e)}")
+
+    async def update_issues_batch(self, batch: IssueBatchUpdate) -> IssueBatchResponse:
+        """Update many issues in one statement, reporting per-item results"""
+        try:
+            # Validate references for the whole batch with one query each
+            type_ids = {item.type_id for item in batch.issues if item.type_id}
+            issue_ids = {item.id for item in batch.issues}
+            issue_ids.update(item.parent_issue_id for item in batch.issues if item.parent_issue_id)
+            existing_types = await self.issue_repo.get_existing_issue_type_ids(list(type_ids))
+            issue_projects = await self.issue_repo.get_issue_project_ids(list(issue_ids))
+
+            results = []
+            valid = []
+            seen = set()
+            for index, item in enumerate(batch.issues):
+                error = None
+                if item.id in seen:
+                    error = "Duplicate issue id in batch"
+                elif item.id not in issue_projects:
+                    error = "Issue not found"
+                elif item.type_id and item.type_id not in existing_types:
+                    error = "Issue type not found"
+                elif item.parent_issue_id and item.parent_issue_id == item.id:
+                    error = "Issue cannot be its own parent"
+                elif item.parent_issue_id and issue_projects.get(item.parent_issue_id) != issue_projects[item.id]:
+                    error = "Parent issue not found in project"
+                seen.add(item.id)
+                if error:
+                    results.append(IssueBatchItemResult(index=index, success=False, error=error))
+                else:
+                    valid.append((index, item))
+
+            # Only fields the client sent are written, so an explicit null clears a nullable field
+            rows = await self.issue_repo.update_issues_bulk([item.dict(exclude_unset=True) for _, item in valid])
+            updated = {row["id"]: row for row in rows}
+
+            for index, item in valid:
+                row = updated.get(item.id)
+                if row:
+                    results.append(IssueBatchItemResult(index=index, success=True, issue=IssueResponse(**row)))
+                else:
+                    results.append(IssueBatchItemResult(index=index, success=False, error="Issue not found"))
+
+            return self._batch_response(results)
+
+        except Exception as e:
+            raise Exception(f"Failed to update issues: {str(e)}")
+
+    def _issue_page(self, rows: Sequence[Mapping], limit: int, sort_key: str = "created_at") -> IssuePage:
+        """Build a page from a limit + 1 repository fetch; Records are converted to models only here"""
+        page, next_cursor = keyset_page(rows, limit, sort_key=sort_key)
+        return IssuePage(items=[IssueResponse(**issue) for issue in page], next_cursor=next_cursor)
+
+    async def get_issues_by_project(self, project_id: int, limit: int = DEFAULT_PAGE_SIZE,
+                                    cursor: Optional[str] = None) -> IssuePage:
+        """Get a page of issues for a specific project"""
+        try:
+            issues = await self.issue_repo.get_issues_by_project(project_id, limit, cursor)
+            return self._issue_page(issues, limit)
+        except ValueError:
+            raise  # Re-raise invalid cursors
         except Exception as e:
             raise Exception(f"Failed to fetch issues: {str(e)}")
 
+    def export_project_issues(self, project_id: int):
+        """Row chunks for a streamed export of every issue in a project"""
+        return self.issue_repo.stream_project_issues(project_id)
+
     async def get_issue_by_id(self, issue_id: int) -> Optional[IssueResponse]:
         """Get issue by ID"""
         try:
@@ -61,11 +155,6 @@ class IssuesService:
     async def update_issue(self, issue_id: int, issue_data: IssueUpdate) -> IssueResponse:
         """Update an existing issue"""
         try:
-            # Check if issue exists
-            existing = await self.issue_repo.get_issue_by_id(issue_id)
-            if not existing:
-                raise ValueError("Issue not found")
-
             # Prepare update data (only include non-None values)
             update_data = {}
             for field, value in issue_data.dict(exclude_unset=True).items():
@@ -74,13 +163,16 @@ class IssuesService:
 
             if not update_data:
                 # No fields to update, return existing issue
+                existing = await self.issue_repo.get_issue_by_id(issue_id)
+                if not existing:
+                    raise ValueError("Issue not found")
                 return IssueResponse(**existing)
 
-            # Update the issue
-            await self.issue_repo.update_issue(issue_id, **update_data)
+            # Update the issue; an empty RETURNING means it does not exist
+            updated_issue = await self.issue_repo.update_issue(issue_id, **update_data)
+            if not updated_issue:
+                raise ValueError("Issue not found")
 
-            # Fetch the updated issue
-            updated_issue = await self.issue_repo.get_issue_by_id(issue_id)
             return IssueResponse(**updated_issue)
 
         except ValueError:
@@ -91,13 +183,10 @@ class IssuesService:
     async def delete_issue(self, issue_id: int) -> bool:
         """Delete an issue"""
         try:
-            # Check if issue exists
-            existing = await self.issue_repo.get_issue_by_id(issue_id)
-            if not existing:
+            # Delete the issue; nothing deleted means it does not exist
+            deleted = await self.issue_repo.delete_issue(issue_id)
+            if not deleted:
                 raise ValueError("Issue not found")
-
-            # Delete the issue
-            await self.issue_repo.delete_issue(issue_id)
             return True
 
         except ValueError:
@@ -105,19 +194,25 @@ class IssuesService:
         except Exception as e:
             raise Exception(f"Failed to delete issue: {str(e)}")
 
-    async def get_issues_by_status(self, project_id: int, status: str) -> List[IssueResponse]:
-        """Get all issues with a specific status for a project"""
+    async def get_issues_by_status(self, project_id: int, status: str, limit: int = DEFAULT_PAGE_SIZE,
+                                   cursor: Optional[str] = None) -> IssuePage:
+        """Get a page of issues with a specific status for a project"""
         try:
-            issues = await self.issue_repo.get_issues_by_status(project_id, status)
-            return [IssueResponse(**issue) for issue in issues]
+            issues = await self.issue_repo.get_issues_by_status(project_id, status, limit, cursor)
+            return self._issue_page(issues, limit)
+        except ValueError:
+            raise  # Re-raise invalid cursors
         except Exception as e:
             raise Exception(f"Failed to fetch issues by status: {str(e)}")
 
-    async def get_issues_by_priority(self, project_id: int, priority: str) -> List[IssueResponse]:
-        """Get all issues with a specific priority for a project"""
+    async def get_issues_by_priority(self, project_id: int, priority: str, limit: int = DEFAULT_PAGE_SIZE,
+                                   cursor: Optional[str] = None) -> IssuePage:
+        """Get a page of issues with a specific priority for a project"""
         try:
-            issues = await self.issue_repo.get_issues_by_priority(project_id, priority)
-            return [IssueResponse(**issue) for issue in issues]
+            issues = await self.issue_repo.get_issues_by_priority(project_id, priority, limit, cursor)
+            return self._issue_page(issues, limit)
+        except ValueError:
+            raise  # Re-raise invalid cursors
         except Exception as e:
             raise Exception(f"Failed to fetch issues by priority: {str(e)}")
 
@@ -138,26 +233,31 @@ class IssuesService:
 
     async def get_issues_with_filters(self, project_id: int, status: Optional[str] = None, 
                                     priority: Optional[str] = None, 
-                                    type_id: Optional[int] = None) -> List[IssueResponse]:
-        """Get issues with optional filters"""
+                                    type_id: Optional[int] = None,
+                                    assigned_to: Optional[int] = None,
+                                    label_id: Optional[int] = None,
+                                    sprint_id: Optional[int] = None,
+                                    created_from: Optional[datetime] = None,
+                                    created_to: Optional[datetime] = None,
+                                    limit: int = DEFAULT_PAGE_SIZE,
+                                    cursor: Optional[str] = None) -> IssuePage:
+        """Get a page of issues with optional filters, filtered in SQL"""
         try:
-            # Get all issues for the project first
-            all_issues = await self.issue_repo.get_issues_by_project(project_id)
-            
-            # Apply filters
-            filtered_issues = all_issues
-            
-            if status:
-                filtered_issues = [issue for issue in filtered_issues if issue['status'] == status]
-            
-            if priority:
-                filtered_issues = [issue for issue in filtered_issues if issue['priority'] == priority]
-            
-            if type_id:
-                filtered_issues = [issue for issue in filtered_issues if issue['type_id'] == type_id]
-            
-            return [IssueResponse(**issue) for issue in filtered_issues]
+            issues = await self.issue_repo.get_issues_with_filters(
+                project_id, limit, cursor,
+                status=status,
+                priority=priority,
+                type_id=type_id,
+                assigned_to=assigned_to,
+                label_id=label_id,
+                sprint_id=sprint_id,
+                created_from=created_from,
+                created_to=created_to
+            )
+            return self._issue_page(issues, limit)
             
+        except ValueError:
+            raise  # Re-raise invalid cursors
         except Exception as e:
             raise Exception(f"Failed to fetch filtered issues: {str(e)}")
 
@@ -165,36 +265,29 @@ class IssuesService:
     async def assign_issue(self, issue_id: int, assignment_data: IssueAssignmentCreate, assigned_by: int) -> IssueAssignmentResponse:
         """Assign an issue to a user"""
         try:
-            # Check if issue exists
-            issue = await self.issue_repo.get_issue_by_id(issue_id)
-            if not issue:
-                raise ValueError("Issue not found")
-
-            # Check if assigned user exists
-            assigned_user = await self.user_repo.find_user_by_id(assignment_data.assigned_to)
-            if not assigned_user:
-                raise ValueError("Assigned user not found")
-
-            # Check if issue is already assigned
-            is_assigned = await self.issue_repo.is_issue_assigned(issue_id)
-            if is_assigned:
-                # Update existing assignment
-                await self.issue_repo.update_assignment(issue_id, assignment_data.assigned_to, assigned_by)
-            else:
-                # Create new assignment
-                await self.issue_repo.assign_issue(issue_id, assignment_data.assigned_to, assigned_by)
-
-            # Get the assignment details
-            assignment = await self.issue_repo.get_issue_assignment(issue_id)
-            print(assignment)
-
-            if not assignment:
-                raise Exception("Assignment not found after creation")
-            await publish_message(
-    user_id=assignment_data.assigned_to,
-    message=f"task {assignment['title']}"
-)
-            return IssueAssignmentResponse(**assignment)
+            # One connection and one transaction for the checks, the write and the read-back
+            async with db.transaction():
+                # Check if issue exists
+                issue = await self.issue_repo.get_issue_by_id(issue_id)
+                if not issue:
+                    raise ValueError("Issue not found")
+
+                # Check if assigned user exists
+                assigned_user = await self.user_repo.find_user_by_id(assignment_data.assigned_to)
+                if not assigned_user:
+                    raise ValueError("Assigned user not found")
+
+                # Assignment and the assignee's notification commit together
+                await self.issue_repo.save_assignment(
+                    issue_id, assignment_data.assigned_to, assigned_by, notification=f"task {issue['title']}"
+                )
+
+                # Get the assignment details
+                assignment = await self.issue_repo.get_issue_assignment(issue_id)
+
+                if not assignment:
+                    raise Exception("Assignment not found after creation")
+                return IssueAssignmentResponse(**assignment)
 
         except ValueError:
             raise  # Re-raise validation errors
@@ -258,30 +351,26 @@ class IssuesService:
         except Exception as e:
             raise Exception(f"Failed to fetch issue with assignment: {str(e)}")
 
-    async def get_user_assigned_issues(self, user_id: int, project_id: int = None) -> List[IssueResponse]:
-        """Get all issues assigned to a user"""
+    async def get_user_assigned_issues(self, user_id: int, project_id: int = None, limit: int = DEFAULT_PAGE_SIZE,
+                                       cursor: Optional[str] = None) -> IssuePage:
+        """Get a page of issues assigned to a user"""
         try:
-            issues = await self.issue_repo.get_user_assigned_issues(user_id, project_id)
-            return [IssueResponse(**issue) for issue in issues]
+            issues = await self.issue_repo.get_user_assigned_issues(user_id, project_id, limit, cursor)
+            return self._issue_page(issues, limit, sort_key="assigned_at")
 
+        except ValueError:
+            raise  # Re-raise invalid cursors
         except Exception as e:
             raise Exception(f"Failed to fetch assigned issues: {str(e)}")
 
     async def update_issue_status(self, issue_id: int, status_data: IssueStatusUpdate) -> IssueResponse:
         """Update issue status"""
         try:
-            # Check if issue exists
-            existing = await self.issue_repo.get_issue_by_id(issue_id)
-            if not existing:
+            # Update the issue status; an empty RETURNING means it does not exist
+            updated_issue = await self.issue_repo.update_issue(issue_id, status=status_data.status)
+            if not updated_issue:
                 raise ValueError("Issue not found")
 
-            # Update the issue status
-            await self.issue_repo.update_issue(issue_id, status=status_data.status)
-
-
-            # Fetch the updated issue
-            updated_issue = await self.issue_repo.get_issue_by_id(issue_id)
-
             return IssueResponse(**updated_issue)
 
         except ValueError:
@@ -1,5 +1,7 @@
 from src.repositories.issues import IssueRepository
 from src.schemas.labels import LabelCreate, LabelUpdate, LabelResponse, IssueLabelAssignment, IssueLabelResponse
+from src.schemas.issues import IssuePage, IssueResponse
+from src.core.pagination import DEFAULT_PAGE_SIZE, keyset_page
 from typing import List, Optional
 from datetime import datetime
 
@@ -17,21 +19,16 @@ class LabelsService:
             if exists:
                 raise ValueError(f"Label '{label_data.name}' already exists in this project")
 
-            # Create the label
-            label_id = await self.issue_repo.create_label(
+            # Create the label; the insert returns the full row
+            label = await self.issue_repo.create_label(
                 project_id=project_id,
                 name=label_data.name,
                 description=label_data.description,
                 color=label_data.color
             )
             
-            if not label_id:
-                raise Exception("Failed to create label")
-
-            # Fetch the created label
-            label = await self.issue_repo.get_label_by_id(label_id)
             if not label:
-                raise Exception("Label not found after creation")
+                raise Exception("Failed to create label")
 
             return LabelResponse(**label)
 
@@ -62,35 +59,25 @@ class LabelsService:
     async def update_label(self, label_id: int, label_data: LabelUpdate) -> LabelResponse:
         """Update an existing label"""
         try:
-            # Check if label exists
-            existing = await self.issue_repo.get_label_by_id(label_id)
-            if not existing:
-                raise ValueError("Label not found")
-
-            # Check if new name conflicts with existing labels in the same project
-            if label_data.name and label_data.name != existing['name']:
-                exists = await self.issue_repo.label_name_exists_in_project(
-                    existing['project_id'], label_data.name, label_id
-                )
-                if exists:
-                    raise ValueError(f"Label '{label_data.name}' already exists in this project")
-
             # Prepare update data (only include non-None values)
             update_data = {}
             for field, value in label_data.dict(exclude_unset=True).items():
                 if value is not None:
                     update_data[field] = value
 
-            if not update_data:
-                # No fields to update, return existing label
-                return LabelResponse(**existing)
+            if update_data:
+                # The update checks name conflicts itself and returns the updated row
+                updated_label = await self.issue_repo.update_label(label_id, **update_data)
+                if updated_label:
+                    return LabelResponse(**updated_label)
 
-            # Update the label
-            await self.issue_repo.update_label(label_id, **update_data)
-
-            # Fetch the updated label
-            updated_label = await self.issue_repo.get_label_by_id(label_id)
-            return LabelResponse(**updated_label)
+            # No fields to update, or the update matched nothing: work out why
+            existing = await self.issue_repo.get_label_by_id(label_id)
+            if not existing:
+                raise ValueError("Label not found")
+            if update_data:
+                raise ValueError(f"Label '{label_data.name}' already exists in this project")
+            return LabelResponse(**existing)
 
         except ValueError:
             raise  # Re-raise validation errors
@@ -100,19 +87,18 @@ class LabelsService:
     async def delete_label(self, label_id: int) -> bool:
         """Delete a label"""
         try:
-            # Check if label exists
+            # Delete the label only if no issue uses it
+            deleted = await self.issue_repo.delete_label(label_id)
+            if deleted:
+                return True
+
+            # Nothing deleted: work out why
             existing = await self.issue_repo.get_label_by_id(label_id)
             if not existing:
                 raise ValueError("Label not found")
 
-            # Check if label is being used by any issues
             usage_count = await self.issue_repo.get_label_usage_count(label_id)
-            if usage_count > 0:
-                raise ValueError(f"Cannot delete label. It is currently used by {usage_count} issue(s)")
-
-            # Delete the label
-            await self.issue_repo.delete_label(label_id)
-            return True
+            raise ValueError(f"Cannot delete label. It is currently used by {usage_count} issue(s)")
 
         except ValueError:
             raise  # Re-raise validation errors
@@ -183,8 +169,9 @@ class LabelsService:
         except Exception as e:
             raise Exception(f"Failed to fetch issue labels: {str(e)}")
 
-    async def get_issues_by_label(self, project_id: int, label_id: int) -> List[dict]:
-        """Get all issues with a specific label in a project"""
+    async def get_issues_by_label(self, project_id: int, label_id: int, limit: int = DEFAULT_PAGE_SIZE,
+                                  cursor: Optional[str] = None) -> IssuePage:
+        """Get a page of issues with a specific label in a project"""
         try:
             # Check if label exists and belongs to the project
             label = await self.issue_repo.get_label_by_id(label_id)
@@ -194,8 +181,9 @@ class LabelsService:
             if label['project_id'] != project_id:
                 raise ValueError("Label does not belong to this project")
 
-            issues = await self.issue_repo.get_issues_by_label(project_id, label_id)
-            return issues
+            issues = await self.issue_repo.get_issues_by_label(project_id, label_id, limit, cursor)
+            page, next_cursor = keyset_page(issues, limit)
+            return IssuePage(items=[IssueResponse(**issue) for issue in page], next_cursor=next_cursor)
         except ValueError:
             raise  # Re-raise validation errors
         except Exception as e:
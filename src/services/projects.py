@@ -88,6 +88,13 @@ class ProjectsService:
             print(f"Failed to get organization projects: {e}")
             raise
 
+    async def export_organization_projects(self, organization_id: int, user_id: int):
+        """Row chunks for a streamed export of an organization's projects (requires org membership)."""
+        has_access = await self.organizationsRepo.user_has_org_access(user_id, organization_id)
+        if not has_access:
+            raise Exception("Access denied to organization")
+        return self.projectsRepo.stream_organization_projects(organization_id)
+
     async def assign_team_to_project(self, project_id: int, team_id: int, user_id: int):
         """Assign team to project"""
         # Check if user has access to project (through workspace)
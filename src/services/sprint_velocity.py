@@ -1,16 +1,24 @@
 from src.repositories.Analysis import AnalysisRepository
 from src.schemas.sprint_velocity import SprintVelocityResponse
-from typing import List
+from src.services.analytics import authorize_analytics_scope, validate_analytics_scope
+from datetime import datetime
+from typing import List, Optional
 
 class SprintVelocityService:
     def __init__(self):
         self.analysis_repo = AnalysisRepository()
 
-    async def get_sprint_velocity_analysis(self) -> List[SprintVelocityResponse]:
+    async def get_sprint_velocity_analysis(self, user_id: int, organization_id: int,
+                                           workspace_id: Optional[int] = None, project_id: Optional[int] = None,
+                                           date_from: Optional[datetime] = None, date_to: Optional[datetime] = None) -> List[SprintVelocityResponse]:
         """Get sprint velocity analysis for all sprints"""
+        validate_analytics_scope(date_from, date_to)
+        await authorize_analytics_scope(user_id, organization_id)
         try:
             # Get raw data from repository
-            raw_data = await self.analysis_repo.Sprint_Velocity_Analysis()
+            raw_data = await self.analysis_repo.Sprint_Velocity_Analysis(
+                organization_id, workspace_id, project_id, date_from, date_to
+            )
             
             if not raw_data:
                 return []
@@ -39,7 +47,8 @@ class SprintVelocityService:
                     
                     # Sprint timing
                     sprint_duration_days=int(sprint_data['sprint_duration_days']) if sprint_data['sprint_duration_days'] else 0,
-                    sprint_status=str(sprint_data['sprint_status'])
+                    sprint_status=str(sprint_data['sprint_status']),
+                    computed_at=sprint_data.get('computed_at')
                 )
                 processed_sprints.append(sprint)
             
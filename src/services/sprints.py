@@ -1,6 +1,11 @@
+from src.core.config import settings
+from src.core.lexorank import rank_between, ranks_between
+from src.core.logger import setup_logger
 from src.repositories.sprints import SprintsRepository
 from src.schemas.sprints import SprintCreate, SprintUpdate, SprintStatus
-from src.schemas.sprint_planning import IssueAddToSprint, SprintBacklogReorder
+from src.schemas.sprint_planning import IssueAddToSprint, SprintBacklogReorder, SprintIssueMove
+
+logger = setup_logger(__name__)
 
 class SprintsService:
     def __init__(self):
@@ -87,7 +92,7 @@ class SprintsService:
             raise ValueError("Start date must be before end date")
 
         try:
-            await self.sprintsRepo.update_sprint(
+            updated_sprint = await self.sprintsRepo.update_sprint(
                 sprint_id=sprint_id,
                 name=sprint_data.name if sprint_data.name else sprint['name'],
                 description=sprint_data.description if sprint_data.description is not None else sprint['description'],
@@ -97,8 +102,6 @@ class SprintsService:
                 goal=sprint_data.goal if sprint_data.goal is not None else sprint['goal'],
                 velocity_target=sprint_data.velocity_target if sprint_data.velocity_target is not None else sprint['velocity_target']
             )
-            
-            updated_sprint = await self.sprintsRepo.get_sprint_by_id(sprint_id)
             return updated_sprint
         except Exception as e:
             print(f"Failed to update sprint: {e}")
@@ -123,77 +126,69 @@ class SprintsService:
             print(f"Failed to delete sprint: {e}")
             raise
 
-    async def start_sprint(self, sprint_id: int, user_id: int):
-        """Start sprint"""
-        # Get sprint first to check project access and current status
+    async def _get_accessible_sprint(self, sprint_id: int, user_id: int):
+        """Get a sprint, raising if it does not exist or the user cannot access its project"""
         sprint = await self.sprintsRepo.get_sprint_by_id(sprint_id)
         if not sprint:
             raise Exception("Sprint not found")
 
-        # Check if user has access to project
         has_access = await self.sprintsRepo.user_has_project_access(user_id, sprint['project_id'])
         if not has_access:
             raise Exception("Access denied to sprint")
 
-        # Check if sprint can be started
-        if sprint['status'] != 'planning':
-            raise ValueError(f"Sprint can only be started from 'planning' status. Current status: {sprint['status']}")
+        return sprint
 
+    async def start_sprint(self, sprint_id: int, user_id: int):
+        """Start sprint"""
         try:
-            await self.sprintsRepo.update_sprint_status(sprint_id, 'active')
-            updated_sprint = await self.sprintsRepo.get_sprint_by_id(sprint_id)
-            return updated_sprint
+            # Access and status are checked by the update itself
+            # The project topic announcement is written to the outbox with the status change
+            updated_sprint = await self.sprintsRepo.transition_sprint_status(
+                sprint_id, user_id, 'active', ['planning'], announce="sprint {name} started"
+            )
         except Exception as e:
             print(f"Failed to start sprint: {e}")
             raise
+        if updated_sprint:
+            return updated_sprint
+
+        # Nothing updated: report why
+        sprint = await self._get_accessible_sprint(sprint_id, user_id)
+        raise ValueError(f"Sprint can only be started from 'planning' status. Current status: {sprint['status']}")
 
     async def complete_sprint(self, sprint_id: int, user_id: int):
         """Complete sprint"""
-        # Get sprint first to check project access and current status
-        sprint = await self.sprintsRepo.get_sprint_by_id(sprint_id)
-        if not sprint:
-            raise Exception("Sprint not found")
-
-        # Check if user has access to project
-        has_access = await self.sprintsRepo.user_has_project_access(user_id, sprint['project_id'])
-        if not has_access:
-            raise Exception("Access denied to sprint")
-
-        # Check if sprint can be completed
-        if sprint['status'] not in ['planning', 'active']:
-            raise ValueError(f"Sprint can only be completed from 'planning' or 'active' status. Current status: {sprint['status']}")
-
         try:
-            await self.sprintsRepo.update_sprint_status(sprint_id, 'completed')
-            updated_sprint = await self.sprintsRepo.get_sprint_by_id(sprint_id)
-            return updated_sprint
+            # Access and status are checked by the update itself
+            updated_sprint = await self.sprintsRepo.transition_sprint_status(
+                sprint_id, user_id, 'completed', ['planning', 'active']
+            )
         except Exception as e:
             print(f"Failed to complete sprint: {e}")
             raise
+        if updated_sprint:
+            return updated_sprint
+
+        # Nothing updated: report why
+        sprint = await self._get_accessible_sprint(sprint_id, user_id)
+        raise ValueError(f"Sprint can only be completed from 'planning' or 'active' status. Current status: {sprint['status']}")
 
     async def cancel_sprint(self, sprint_id: int, user_id: int):
         """Cancel sprint"""
-        # Get sprint first to check project access and current status
-        sprint = await self.sprintsRepo.get_sprint_by_id(sprint_id)
-        if not sprint:
-            raise Exception("Sprint not found")
-
-        # Check if user has access to project
-        has_access = await self.sprintsRepo.user_has_project_access(user_id, sprint['project_id'])
-        if not has_access:
-            raise Exception("Access denied to sprint")
-
-        # Check if sprint can be cancelled
-        if sprint['status'] in ['completed', 'cancelled']:
-            raise ValueError(f"Sprint cannot be cancelled from '{sprint['status']}' status")
-
         try:
-            await self.sprintsRepo.update_sprint_status(sprint_id, 'cancelled')
-            updated_sprint = await self.sprintsRepo.get_sprint_by_id(sprint_id)
-            return updated_sprint
+            # Access and status are checked by the update itself
+            updated_sprint = await self.sprintsRepo.transition_sprint_status(
+                sprint_id, user_id, 'cancelled', ['planning', 'active']
+            )
         except Exception as e:
             print(f"Failed to cancel sprint: {e}")
             raise
+        if updated_sprint:
+            return updated_sprint
+
+        # Nothing updated: report why
+        sprint = await self._get_accessible_sprint(sprint_id, user_id)
+        raise ValueError(f"Sprint cannot be cancelled from '{sprint['status']}' status")
 
     async def add_issues_to_sprint(self, sprint_id: int, issue_data: IssueAddToSprint, user_id: int):
         """Add issues to sprint"""
@@ -207,13 +202,14 @@ class SprintsService:
         if not has_access:
             raise Exception("Access denied to sprint")
 
-        # Validate issues exist and belong to the same project
-        for issue_id in issue_data.issue_ids:
-            issue = await self.sprintsRepo.get_issue_by_id(issue_id)
-            if not issue:
-                raise ValueError(f"Issue {issue_id} not found")
-            if issue['project_id'] != sprint['project_id']:
-                raise ValueError(f"Issue {issue_id} does not belong to the same project as sprint")
+        # Validate issues exist and belong to the same project in one query
+        invalid = await self.sprintsRepo.find_invalid_sprint_issues(sprint['project_id'], issue_data.issue_ids)
+        missing = [row['issue_id'] for row in invalid if row['project_id'] is None]
+        foreign = [row['issue_id'] for row in invalid if row['project_id'] is not None]
+        if missing:
+            raise ValueError(f"Issues not found: {', '.join(map(str, missing))}")
+        if foreign:
+            raise ValueError(f"Issues do not belong to the same project as sprint: {', '.join(map(str, foreign))}")
 
         try:
             await self.sprintsRepo.add_issues_to_sprint(sprint_id, issue_data.issue_ids)
@@ -295,3 +291,44 @@ class SprintsService:
         except Exception as e:
             print(f"Failed to reorder sprint backlog: {e}")
             raise
+
+    async def move_sprint_issue(self, sprint_id: int, issue_id: int, move_data: SprintIssueMove, user_id: int):
+        """Move one issue in the sprint backlog, writing only that issue's rank"""
+        await self._get_accessible_sprint(sprint_id, user_id)
+
+        if move_data.after_issue_id == issue_id:
+            raise ValueError("An issue cannot be placed after itself")
+
+        neighbors = await self.sprintsRepo.get_move_neighbors(sprint_id, issue_id, move_data.after_issue_id)
+        if not neighbors['in_sprint']:
+            raise ValueError("Issue is not in this sprint")
+        if move_data.after_issue_id is not None and not neighbors['after_in_sprint']:
+            raise ValueError(f"Issue {move_data.after_issue_id} is not in this sprint")
+
+        try:
+            rank = rank_between(neighbors['prev_rank'], neighbors['next_rank'])
+            if len(rank) <= settings.SPRINT_RANK_MAX_LENGTH:
+                await self.sprintsRepo.set_issue_rank(sprint_id, issue_id, rank)
+                return {"issue_id": issue_id, "sprint_id": sprint_id, "rank": rank}
+        except ValueError as e:
+            # Neighbours share a rank (e.g. concurrent appends); rebalance below
+            logger.warning(f"Cannot rank between neighbours in sprint {sprint_id}: {e}")
+
+        # Ranks at this spot are exhausted: apply the move while rebalancing the sprint
+        order = [i for i in await self.sprintsRepo.get_ordered_sprint_issue_ids(sprint_id) if i != issue_id]
+        position = order.index(move_data.after_issue_id) + 1 if move_data.after_issue_id is not None else 0
+        order.insert(position, issue_id)
+        await self.sprintsRepo.reorder_sprint_backlog(sprint_id, order)
+        # reorder_sprint_backlog assigns ranks_between(None, None, n) in order
+        rank = ranks_between(None, None, len(order))[position]
+        return {"issue_id": issue_id, "sprint_id": sprint_id, "rank": rank}
+
+    async def rebalance_sprint_ranks(self) -> int:
+        """Respread ranks in every sprint whose ranks grew too long; returns the number of sprints rebalanced"""
+        sprint_ids = await self.sprintsRepo.get_sprints_needing_rebalance(settings.SPRINT_RANK_MAX_LENGTH)
+        for sprint_id in sprint_ids:
+            order = await self.sprintsRepo.get_ordered_sprint_issue_ids(sprint_id)
+            await self.sprintsRepo.reorder_sprint_backlog(sprint_id, order)
+        if sprint_ids:
+            logger.info(f"Rebalanced backlog ranks for {len(sprint_ids)} sprint(s)")
+        return len(sprint_ids)
@@ -1,16 +1,24 @@
 from src.repositories.Analysis import AnalysisRepository
 from src.schemas.team_performance import TeamPerformanceResponse
-from typing import List
+from src.services.analytics import authorize_analytics_scope, validate_analytics_scope
+from datetime import datetime
+from typing import List, Optional
 
 class TeamPerformanceService:
     def __init__(self):
         self.analysis_repo = AnalysisRepository()
 
-    async def get_team_performance_metrics(self) -> List[TeamPerformanceResponse]:
+    async def get_team_performance_metrics(self, user_id: int, organization_id: int,
+                                           workspace_id: Optional[int] = None, project_id: Optional[int] = None,
+                                           date_from: Optional[datetime] = None, date_to: Optional[datetime] = None) -> List[TeamPerformanceResponse]:
         """Get team performance and collaboration metrics for all teams"""
+        validate_analytics_scope(date_from, date_to)
+        await authorize_analytics_scope(user_id, organization_id)
         try:
             # Get raw data from repository
-            raw_data = await self.analysis_repo.Team_Performance_Collaboration_Metrics()
+            raw_data = await self.analysis_repo.Team_Performance_Collaboration_Metrics(
+                organization_id, workspace_id, project_id, date_from, date_to
+            )
             
             if not raw_data:
                 return []
@@ -40,7 +48,8 @@ class TeamPerformanceService:
                     
                     # Collaboration metrics
                     team_comments=int(team_data['team_comments']) if team_data['team_comments'] else 0,
-                    team_activities=int(team_data['team_activities']) if team_data['team_activities'] else 0
+                    team_activities=int(team_data['team_activities']) if team_data['team_activities'] else 0,
+                    computed_at=team_data.get('computed_at')
                 )
                 processed_teams.append(team)
             
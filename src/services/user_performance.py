@@ -1,16 +1,24 @@
 from src.repositories.Analysis import AnalysisRepository
 from src.schemas.user_performance import UserPerformanceResponse
-from typing import List
+from src.services.analytics import authorize_analytics_scope, validate_analytics_scope
+from datetime import datetime
+from typing import List, Optional
 
 class UserPerformanceService:
     def __init__(self):
         self.analysis_repo = AnalysisRepository()
 
-    async def get_user_performance_metrics(self) -> List[UserPerformanceResponse]:
+    async def get_user_performance_metrics(self, user_id: int, organization_id: int,
+                                           workspace_id: Optional[int] = None, project_id: Optional[int] = None,
+                                           date_from: Optional[datetime] = None, date_to: Optional[datetime] = None) -> List[UserPerformanceResponse]:
         """Get user performance and workload analysis for all users"""
+        validate_analytics_scope(date_from, date_to)
+        await authorize_analytics_scope(user_id, organization_id)
         try:
             # Get raw data from repository
-            raw_data = await self.analysis_repo.User_Performance_Workload_Analysis()
+            raw_data = await self.analysis_repo.User_Performance_Workload_Analysis(
+                organization_id, workspace_id, project_id, date_from, date_to
+            )
             
             if not raw_data:
                 return []
@@ -44,7 +52,8 @@ class UserPerformanceService:
                     total_hours_spent=float(user_data['total_hours_spent']) if user_data['total_hours_spent'] else None,
                     
                     # User tenure
-                    days_since_joined=int(user_data['days_since_joined']) if user_data['days_since_joined'] else 0
+                    days_since_joined=int(user_data['days_since_joined']) if user_data['days_since_joined'] else 0,
+                    computed_at=user_data.get('computed_at')
                 )
                 processed_users.append(user)
             
@@ -1,5 +1,6 @@
 import hashlib
 
+from src.core.cache import invalidate
 from src.core.security import get_password_hash
 from src.repositories.users import UserRepository
 from src.schemas.users import *
@@ -23,6 +24,8 @@ class UsersService:
         user_id = await self.user_repo.save_user(user_dict)
         if not user_id:
             raise Exception("Failed to create user")  # safety check
+        # An earlier account with this email may still be cached under its old id
+        await invalidate("users", user_dict['email'])
 
         user = await self.user_repo.find_user_by_id(user_id)
         return user  # dict with full user info
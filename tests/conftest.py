@@ -0,0 +1,21 @@
+import os
+
+# Settings has required fields; give them throwaway values before src modules are imported
+for name, value in {
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_USER": "test",
+    "DB_PASSWORD": "test",
+    "DB_NAME": "test",
+    "SSL_MODE": "disable",
+    "CHANNEL_BINDING": "disable",
+    "SECRET_KEY": "test",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+    "REDIS_HOST": "localhost",
+    "REDIS_PORT": "6379",
+    "REDIS_DB": "0",
+    "REDIS_USERNAME": "",
+    "REDIS_PASSWORD": "",
+}.items():
+    os.environ.setdefault(name, value)
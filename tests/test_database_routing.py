@@ -0,0 +1,118 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("asyncpg")
+pytest.importorskip("pydantic_settings")
+
+from src.core.database import Database, ReplicaPool, is_read_statement, naive_utc, _request_state
+
+
+class FakeConnection:
+    def __init__(self, name: str):
+        self.name = name
+        self.queries: list[str] = []
+
+    async def fetch(self, query, *params):
+        self.queries.append(query)
+        return [{"served_by": self.name}]
+
+
+class FakePool:
+    def __init__(self, name: str):
+        self.conn = FakeConnection(name)
+
+    async def acquire(self, timeout=None):
+        return self.conn
+
+    async def release(self, conn):
+        pass
+
+
+def make_database() -> Database:
+    db = Database()
+    db.pool = FakePool("primary")
+    replica = ReplicaPool("replica", 5432, FakePool("replica"))
+    replica.healthy = True
+    db.replicas = [replica]
+    return db
+
+
+CTE = """
+WITH done AS (SELECT assigned_to, COUNT(*) AS total FROM issues GROUP BY assigned_to)
+SELECT * FROM done
+"""
+
+
+def test_read_statement_classification():
+    assert is_read_statement("SELECT 1")
+    assert is_read_statement(CTE)
+    assert not is_read_statement("WITH moved AS (DELETE FROM issues RETURNING id) SELECT * FROM moved")
+    assert not is_read_statement("UPDATE issues SET status = 'done'")
+
+
+def test_read_only_cte_uses_replica_and_does_not_pin_request():
+    db = make_database()
+
+    async def scenario():
+        token = db.begin_request()
+        try:
+            first = await db.execute_query(CTE, read_only=True)
+            state = _request_state.get()
+            second = await db.execute_query("SELECT 1", read_only=True)
+            return first, state["wrote"], second
+        finally:
+            await db.end_request(token)
+
+    first, wrote, second = asyncio.run(scenario())
+    assert first == [{"served_by": "replica"}]
+    assert wrote is False
+    assert second == [{"served_by": "replica"}]
+
+
+class SessionConnection(FakeConnection):
+    async def execute(self, query, *params):
+        self.queries.append(query)
+
+
+class CountingPool:
+    def __init__(self):
+        self.acquired: list[SessionConnection] = []
+
+    async def acquire(self, timeout=None):
+        conn = SessionConnection(f"conn{len(self.acquired)}")
+        self.acquired.append(conn)
+        return conn
+
+    async def release(self, conn):
+        pass
+
+
+def test_background_role_inside_request_gets_its_own_timeout():
+    db = Database()
+    db.pool = CountingPool()
+    db.statement_timeouts_ms = {"request": 30000, "background": 600000}
+
+    async def scenario():
+        token = db.begin_request()
+        try:
+            async for request_conn in db.connection():
+                pass
+            async for background_conn in db.connection(role="background"):
+                pass
+            return request_conn, background_conn
+        finally:
+            await db.end_request(token)
+
+    request_conn, background_conn = asyncio.run(scenario())
+    assert background_conn is not request_conn
+    assert background_conn.queries == ["SET statement_timeout = 600000"]
+    assert request_conn.queries == []
+
+
+def test_naive_utc_converts_aware_datetimes():
+    aware = datetime(2024, 5, 1, 12, 0, tzinfo=timezone(timedelta(hours=2)))
+    assert naive_utc(aware) == datetime(2024, 5, 1, 10, 0)
+    assert naive_utc(datetime(2024, 5, 1, 12, 0)) == datetime(2024, 5, 1, 12, 0)
+    assert naive_utc(None) is None
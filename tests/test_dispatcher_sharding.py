@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("redis")
+pytest.importorskip("pydantic_settings")
+
+from src.notification.dispatcher import ShardedStreamReader
+
+
+class FakeRedis:
+    """Just enough of Redis for blocking XREAD and CLIENT UNBLOCK"""
+
+    def __init__(self):
+        self.streams: dict[str, list] = {}
+        self.blocked: dict[int, asyncio.Future] = {}
+        self.next_id = 0
+
+    def add(self, key: str, message: str) -> None:
+        entries = self.streams.setdefault(key, [])
+        entries.append((f"{len(entries) + 1}-0", {"message": message}))
+        for waiter in self.blocked.values():
+            if not waiter.done():
+                waiter.set_result(True)
+
+    async def client_unblock(self, client_id: int) -> int:
+        waiter = self.blocked.get(client_id)
+        if waiter is None or waiter.done():
+            return 0
+        waiter.set_result(False)
+        return 1
+
+
+class FakeClient:
+    def __init__(self, server: FakeRedis):
+        self.server = server
+        server.next_id += 1
+        self.id = server.next_id
+
+    async def client_id(self) -> int:
+        return self.id
+
+    def _pending(self, streams: dict):
+        response = []
+        for key, last_id in streams.items():
+            entries = [e for e in self.server.streams.get(key, []) if e[0] > last_id]
+            if entries:
+                response.append((key, entries))
+        return response
+
+    async def xread(self, streams: dict, count=None, block=None):
+        response = self._pending(streams)
+        if response:
+            return response
+        waiter = asyncio.get_running_loop().create_future()
+        self.server.blocked[self.id] = waiter
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), block / 1000)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            del self.server.blocked[self.id]
+        return self._pending(streams) or None
+
+    async def aclose(self) -> None:
+        pass
+
+
+class RecordingReader(ShardedStreamReader):
+    def __init__(self, server: FakeRedis):
+        super().__init__(streams_per_read=10, read_count=100, block_ms=5000)
+        self.redis = server
+        self.last_ids: dict[str, str] = {}
+        self.delivered = asyncio.Queue()
+
+    def _shard_client(self):
+        return FakeClient(self.redis)
+
+    async def _read(self, client, keys):
+        return await client.xread({key: self.last_ids.get(key, "0-0") for key in keys}, block=self.block_ms)
+
+    async def _deliver(self, stream_key, messages):
+        self.last_ids[stream_key] = messages[-1][0]
+        for _msg_id, data in messages:
+            await self.delivered.put((stream_key, data["message"]))
+
+
+def test_new_key_is_read_without_waiting_for_the_block_timeout():
+    async def scenario():
+        server = FakeRedis()
+        reader = RecordingReader(server)
+        reader.start()
+        try:
+            reader._add_key("stream:a")
+            # Let the shard block on the first key
+            while not server.blocked:
+                await asyncio.sleep(0.001)
+
+            reader._add_key("stream:b")
+            server.add("stream:b", "hello")
+            return await asyncio.wait_for(reader.delivered.get(), timeout=1)
+        finally:
+            await reader.stop()
+
+    assert asyncio.run(scenario()) == ("stream:b", "hello")
+
+
+def test_removed_key_keeps_other_keys_in_their_shard():
+    async def scenario():
+        reader = RecordingReader(FakeRedis())
+        reader.streams_per_read = 2
+        for key in ("a", "b", "c"):
+            reader._add_key(key)
+        first, second = reader._shards
+        reader._remove_key("a")
+        return list(first.keys), list(second.keys)
+
+    assert asyncio.run(scenario()) == (["b"], ["c"])